@@ -1,17 +1,28 @@
+import time
 from typing import Callable
-from typing import Generic, Set, Tuple, TypeVar
+from typing import Generic, List, Set, Tuple, TypeVar
 
 from adversarialsearchproblem import (
     Action,
     AdversarialSearchProblem,
     State as GameState,
 )
+from forwardpruning import LateMoveReductions, ProbCut
+from searchstats import SearchStats
+from searchtrace import SearchTracer
+from iterativesearch import simulate_alpha_beta_cutoff_iterative, simulate_alpha_beta_iterative, simulate_state_iterative
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable, from_table_action, table_key, to_table_action
 
-def simulate_state(asp: AdversarialSearchProblem[GameState, Action], state: GameState) -> Tuple[float, Action]:
+def simulate_state(asp: AdversarialSearchProblem[GameState, Action], state: GameState, actions: Set[Action] = None, stats: SearchStats = None, ply: int = 0) -> Tuple[float, Action]:
     # Player 1 is +ve
     # Player 2 is -ve
 
+    if stats is not None:
+        stats.visit(ply)
+
     if asp.is_terminal_state(state):
+        if stats is not None:
+            stats.leaves += 1
         return (asp.evaluate_terminal(state)[0], None)
 
     player = state.player_to_move()
@@ -20,11 +31,13 @@ def simulate_state(asp: AdversarialSearchProblem[GameState, Action], state: Game
     else:
         best_action_so_far = (float('inf'), None)
         
-    for action in asp.get_available_actions(state):
+    if actions is None:
+        actions = asp.get_available_actions(state)
+    for action in actions:
         child_state = asp.transition(state, action)
-        child_score = simulate_state(asp,child_state)[0]
-        if state == asp.get_start_state():
-            print("min score: ", child_score, " action: ", action)
+        child_score = simulate_state(asp, child_state, stats=stats, ply=ply + 1)[0]
+        if stats is not None and ply == 0:
+            stats.root_scores.append((action, child_score))
         if (player == 0):
             if(best_action_so_far[0] < child_score):
                 best_action_so_far = (child_score, action)
@@ -34,72 +47,233 @@ def simulate_state(asp: AdversarialSearchProblem[GameState, Action], state: Game
     
     return best_action_so_far
 
-def simulate_alpha_beta(asp: AdversarialSearchProblem[GameState, Action], state: GameState, alpha: float, beta: float) -> Tuple[float, Action]:
+def simulate_alpha_beta(asp: AdversarialSearchProblem[GameState, Action], state: GameState, alpha: float, beta: float, actions: Set[Action] = None, stats: SearchStats = None, ply: int = 0, trace: SearchTracer = None) -> Tuple[float, Action]:
     # Player 1 is +ve
     # Player 2 is -ve
 
+    if stats is not None:
+        stats.visit(ply)
+
     if asp.is_terminal_state(state):
+        if stats is not None:
+            stats.leaves += 1
         return (asp.evaluate_terminal(state)[0], None)
 
+    # Mate-distance pruning: no line from here ends outside value_bounds
+    lower, upper = asp.value_bounds(state)
+    if upper <= alpha or lower >= beta:
+        if stats is not None:
+            stats.cutoff(ply)
+        return (upper if upper <= alpha else lower, None)
+    alpha, beta = max(alpha, lower), min(beta, upper)
+
     player = state.player_to_move()
     if player == 0:
         best_action_so_far = (float('-inf'), None)
     else:
         best_action_so_far = (float('inf'), None)
             
-    for action in asp.get_available_actions(state):
+    if actions is None:
+        actions = asp.get_available_actions(state)
+    for action in actions:
         child_state = asp.transition(state, action)
-        child_score = simulate_alpha_beta(asp, child_state, alpha, beta)[0]
-        if state == asp.get_start_state():
-            print("min score: ", child_score, " action: ", action)
+        if trace is not None:
+            trace.enter(ply + 1, action, alpha, beta)
+        child_score = simulate_alpha_beta(asp, child_state, alpha, beta, stats=stats, ply=ply + 1, trace=trace)[0]
+        if trace is not None:
+            trace.exit(child_score, child_score >= beta if player == 0 else child_score <= alpha)
+        if stats is not None and ply == 0:
+            stats.root_scores.append((action, child_score))
         if (player == 0):
             if(best_action_so_far[0] < child_score):
                 best_action_so_far = (child_score, action)
             if best_action_so_far[0] >= beta:
+                if stats is not None:
+                    stats.cutoff(ply)
                 return best_action_so_far
             alpha =  max(alpha, best_action_so_far[0])
         else:
             if (best_action_so_far[0] > child_score):
                 best_action_so_far = (child_score, action)
             if best_action_so_far[0] <= alpha:
+                if stats is not None:
+                    stats.cutoff(ply)
                 return best_action_so_far
             beta =  min(beta, best_action_so_far[0])
     
     return best_action_so_far
 
-def simulate_alpha_beta_cutoff(asp: AdversarialSearchProblem[GameState, Action], state: GameState, alpha: float, beta: float, cutoff: int, heuristic_func: Callable[[GameState], float]) -> Tuple[float, Action]:
+def simulate_alpha_beta_cutoff(asp: AdversarialSearchProblem[GameState, Action], state: GameState, alpha: float, beta: float, cutoff: int, heuristic_func: Callable[[GameState], float], actions: Set[Action] = None, tt: TranspositionTable = None, stats: SearchStats = None, ply: int = 0, trace: SearchTracer = None, endgame_moves: int = None, quiescence: int = 0, lmr: LateMoveReductions = None, probcut: ProbCut = None, batch_heuristic_func: Callable[[List[GameState]], List[float]] = None) -> Tuple[float, Action]:
     # Player 1 is +ve
     # Player 2 is -ve
 
+    if stats is not None:
+        stats.visit(ply)
+
     if asp.is_terminal_state(state):
+        if stats is not None:
+            stats.leaves += 1
         return (asp.evaluate_terminal(state)[0], None)
 
+    # At the root of an endgame search, stop at the first proven win
+    win = asp.win_threshold() if ply == 0 and endgame_moves is not None else None
+
+    # Endgame switch: once the rest of the game fits in endgame_moves, search
+    # it to the end. The children then never reach the heuristic.
+    if endgame_moves is not None and cutoff < endgame_moves:
+        remaining = asp.moves_remaining(state)
+        if remaining is not None and remaining <= endgame_moves:
+            cutoff = max(cutoff, remaining)
+            endgame_moves = lmr = probcut = None
+
+    # Quiescence: past the cutoff, only forcing moves are searched, and only
+    # quiet states are evaluated with the heuristic
+    child_cutoff, child_quiescence = cutoff - 1, quiescence
     if cutoff == 0:
-        return (heuristic_func(state), None)
+        forced = asp.forcing_actions(state) if quiescence > 0 else None
+        if not forced:
+            if stats is not None:
+                stats.heuristic_calls += 1
+            return (heuristic_func(state), None)
+        if stats is not None:
+            stats.extensions += 1
+        actions = forced
+        child_cutoff, child_quiescence = 0, quiescence - 1
+
+    if actions is None:
+        actions = asp.get_available_actions(state)
+
+    # Reuse or narrow the window with a stored result, and search its best action first
+    if tt is not None:
+        key, key_transform = table_key(asp, state, tt.canonical)
+        alpha_orig, beta_orig = alpha, beta
+        entry = tt.lookup(key)
+        if entry is not None:
+            if stats is not None:
+                stats.tt_hits += 1
+            depth, value, flag, tt_action = entry
+            tt_action = from_table_action(asp, tt_action, key_transform)
+            if depth >= cutoff:
+                if flag == EXACT:
+                    return (value, tt_action)
+                if flag == LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return (value, tt_action)
+            if tt_action in actions:
+                actions = [tt_action] + [action for action in actions if action != tt_action]
+
+    # Mate-distance pruning: no line from here ends outside value_bounds
+    lower, upper = asp.value_bounds(state)
+    if upper <= alpha or lower >= beta:
+        if stats is not None:
+            stats.cutoff(ply)
+        return (upper if upper <= alpha else lower, None)
+    alpha, beta = max(alpha, lower), min(beta, upper)
 
     player = state.player_to_move()
     if player == 0:
         best_action_so_far = (float('-inf'), None)
     else:
         best_action_so_far = (float('inf'), None)
+    stopped = False
+
+    # ProbCut: a shallow search failing far outside the window predicts that
+    # this search fails outside it too
+    if probcut is not None and ply > 0 and cutoff >= probcut.min_depth:
+        window = probcut.window(player, alpha, beta)
+        if window is not None:
+            shallow = simulate_alpha_beta_cutoff(asp, state, window[0], window[1], cutoff - probcut.reduction, heuristic_func, actions, tt, stats, ply, None, endgame_moves, quiescence, lmr, probcut, batch_heuristic_func)[0]
+            if probcut.cuts(player, shallow, window):
+                if stats is not None:
+                    stats.probcuts += 1
+                return (shallow, None)
             
-    for action in asp.get_available_actions(state):
-        child_state = asp.transition(state, action)
-        child_score = simulate_alpha_beta_cutoff(asp, child_state, alpha, beta, cutoff - 1, heuristic_func)[0]
-        if state == asp.get_start_state():
-            print("min score: ", child_score, " action: ", action)
+    # Frontier: every child is a leaf. The first child often cuts the node
+    # off on its own, so the rest are evaluated in one batch once it has not.
+    batch = batch_heuristic_func is not None and child_cutoff == 0 and child_quiescence == 0 and endgame_moves is None
+    if batch:
+        actions = list(actions)
+    frontier = None
+
+    for move_number, action in enumerate(actions):
+        if batch and move_number == 1:
+            children = [asp.transition(state, later) for later in actions[1:]]
+            terminal = [asp.is_terminal_state(child) for child in children]
+            leaves = [child for child, is_terminal in zip(children, terminal) if not is_terminal]
+            values = iter(batch_heuristic_func(leaves) if leaves else ())
+            frontier = [
+                asp.evaluate_terminal(child)[0] if is_terminal else next(values)
+                for child, is_terminal in zip(children, terminal)
+            ]
+            if stats is not None:
+                stats.heuristic_calls += len(leaves)
+        if frontier is not None:
+            if trace is not None:
+                trace.enter(ply + 1, action, alpha, beta)
+            if stats is not None:
+                stats.visit(ply + 1)
+                if terminal[move_number - 1]:
+                    stats.leaves += 1
+            child_score = frontier[move_number - 1]
+        else:
+            child_state = asp.transition(state, action)
+            if trace is not None:
+                trace.enter(ply + 1, action, alpha, beta)
+            reduction = lmr.reduce(cutoff, move_number) if lmr is not None and ply > 0 else 0
+            child_score = simulate_alpha_beta_cutoff(asp, child_state, alpha, beta, child_cutoff - reduction, heuristic_func, tt=tt, stats=stats, ply=ply + 1, trace=trace, endgame_moves=endgame_moves, quiescence=child_quiescence, lmr=lmr, probcut=probcut, batch_heuristic_func=batch_heuristic_func)[0]
+            if reduction:
+                if stats is not None:
+                    stats.reductions += 1
+                # A reduced move that would raise the bound is searched again in full
+                if child_score > alpha if player == 0 else child_score < beta:
+                    if stats is not None:
+                        stats.researches += 1
+                    # The reduced search and the full one are traced as two nodes
+                    if trace is not None:
+                        trace.exit(child_score, False)
+                        trace.enter(ply + 1, action, alpha, beta)
+                    child_score = simulate_alpha_beta_cutoff(asp, child_state, alpha, beta, child_cutoff, heuristic_func, tt=tt, stats=stats, ply=ply + 1, trace=trace, endgame_moves=endgame_moves, quiescence=child_quiescence, lmr=lmr, probcut=probcut, batch_heuristic_func=batch_heuristic_func)[0]
+        if trace is not None:
+            trace.exit(child_score, child_score >= beta if player == 0 else child_score <= alpha)
+        if stats is not None and ply == 0:
+            stats.root_scores.append((action, child_score))
+        if win is not None and (child_score >= win if player == 0 else child_score <= -win):
+            # Nothing searched before was a win, so this is the best action
+            best_action_so_far = (child_score, action)
+            stopped = True
+            break
         if (player == 0):
             if(best_action_so_far[0] < child_score):
                 best_action_so_far = (child_score, action)
             if best_action_so_far[0] >= beta:
-                return best_action_so_far
+                if stats is not None:
+                    stats.cutoff(ply)
+                break
             alpha =  max(alpha, best_action_so_far[0])
         else:
             if (best_action_so_far[0] > child_score):
                 best_action_so_far = (child_score, action)
             if best_action_so_far[0] <= alpha:
-                return best_action_so_far
+                if stats is not None:
+                    stats.cutoff(ply)
+                break
             beta =  min(beta, best_action_so_far[0])
+
+    if tt is not None:
+        value = best_action_so_far[0]
+        if stopped:
+            # The actions after the win were not searched
+            flag = LOWER_BOUND if player == 0 else UPPER_BOUND
+        elif value <= alpha_orig:
+            flag = UPPER_BOUND
+        elif value >= beta_orig:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        tt.store(key, cutoff, value, flag, to_table_action(asp, best_action_so_far[1], key_transform))
     
     return best_action_so_far
 
@@ -143,36 +317,110 @@ def min_value_cutoff (asp: AdversarialSearchProblem[GameState, Action], state: G
 
     return score 
 
-def minimax(asp: AdversarialSearchProblem[GameState, Action]) -> Action:
+def root_actions(asp: AdversarialSearchProblem[GameState, Action], prune_symmetric: bool = False) -> Set[Action]:
+    """
+    Returns the actions to search from the start state of the asp. With
+    prune_symmetric, only one action is kept from each class of actions that
+    lead to symmetric states (see asps/symmetry.py); games without a symmetry
+    are unaffected.
+    """
+    state = asp.get_start_state()
+    actions = asp.get_available_actions(state)
+    symmetry = asp.symmetry()
+    if prune_symmetric and symmetry is not None:
+        return symmetry.distinct_actions(state, actions)
+    return actions
+
+def search_is_exact(asp: AdversarialSearchProblem[GameState, Action], state: GameState, cutoff_ply: int, endgame_moves: int = None) -> bool:
+    """
+    Returns whether alpha_beta_cutoff from state, with the given cutoff_ply
+    and endgame_moves, searches every line to the end of the game, so that
+    its value is the game-theoretic value of state.
+    """
+    remaining = asp.moves_remaining(state)
+    if remaining is None:
+        return False
+    return remaining <= cutoff_ply or (endgame_moves is not None and remaining <= endgame_moves)
+
+def _finish(action: Action, stats: SearchStats, start: float):
+    # Returns what an entry point returns: the action, or (action, stats)
+    if stats is None:
+        return action
+    stats.elapsed = time.perf_counter() - start
+    return (action, stats)
+
+def minimax(asp: AdversarialSearchProblem[GameState, Action], prune_symmetric: bool = False, return_stats: bool = False, iterative: bool = False) -> Action:
     """
     Implement the minimax algorithm on ASPs, assuming that the given game is
     both 2-player and constant-sum.
 
     Input:
         asp - an AdversarialSearchProblem
+        prune_symmetric - if True, skip root actions that are symmetric to
+            another root action (see root_actions)
+        return_stats - if True, return a tuple (action, SearchStats) describing
+            the search, instead of just the action
+        iterative - if True, search with an explicit stack instead of
+            recursion (see iterativesearch.py)
     Output:
         an action (an element of asp.get_available_actions(asp.get_start_state()))
     """
-    return simulate_state(asp, asp.get_start_state())[1]
+    actions = root_actions(asp, prune_symmetric)
+    stats = SearchStats() if return_stats else None
+    start = time.perf_counter()
+    simulate = simulate_state_iterative if iterative else simulate_state
+    value, action = simulate(asp, asp.get_start_state(), actions, stats)
+    if stats is not None:
+        stats.value, stats.proven = value, True
+    return _finish(action, stats, start)
 
 
-def alpha_beta(asp: AdversarialSearchProblem[GameState, Action]) -> Action:
+def alpha_beta(asp: AdversarialSearchProblem[GameState, Action], prune_symmetric: bool = False, return_stats: bool = False, trace: SearchTracer = None, iterative: bool = False) -> Action:
     """
     Implement the alpha-beta pruning algorithm on ASPs,
     assuming that the given game is both 2-player and constant-sum.
 
     Input:
         asp - an AdversarialSearchProblem
+        prune_symmetric - if True, skip root actions that are symmetric to
+            another root action (see root_actions)
+        return_stats - if True, return a tuple (action, SearchStats) describing
+            the search, instead of just the action
+        trace - a SearchTracer to stream every visited node to (see
+            searchtrace.py)
+        iterative - if True, search with an explicit stack instead of
+            recursion (see iterativesearch.py)
     Output:
         an action(an element of asp.get_available_actions(asp.get_start_state()))
     """
     #return max_value(asp, asp.get_start_state(), float('-inf'), float('inf'))[1]
-    return simulate_alpha_beta(asp, asp.get_start_state(), float('-inf'), float('inf'))[1]
+    actions = root_actions(asp, prune_symmetric)
+    stats = SearchStats() if return_stats else None
+    start = time.perf_counter()
+    if trace is not None:
+        trace.enter(0, None, float('-inf'), float('inf'))
+    simulate = simulate_alpha_beta_iterative if iterative else simulate_alpha_beta
+    value, action = simulate(asp, asp.get_start_state(), float('-inf'), float('inf'), actions, stats, trace=trace)
+    if trace is not None:
+        trace.exit(value, False)
+    if stats is not None:
+        stats.value, stats.proven = value, True
+    return _finish(action, stats, start)
 
 def alpha_beta_cutoff(
     asp: AdversarialSearchProblem[GameState, Action],
     cutoff_ply: int,
     heuristic_func: Callable[[GameState], float],
+    prune_symmetric: bool = False,
+    tt: TranspositionTable = None,
+    return_stats: bool = False,
+    trace: SearchTracer = None,
+    iterative: bool = False,
+    endgame_moves: int = None,
+    quiescence: int = 0,
+    lmr: LateMoveReductions = None,
+    probcut: ProbCut = None,
+    batch_heuristic_func: Callable[[List[GameState]], List[float]] = None,
 ) -> Action:
     # See AdversarialSearchProblem:heuristic_func
     """
@@ -197,7 +445,59 @@ def alpha_beta_cutoff(
             evaluation functions to test your implemention. The heuristic_func
             we provide does not handle terminal states, so evaluate terminal
             states the same way you evaluated them in the previous algorithms.
+        prune_symmetric - if True, skip root actions that are symmetric to
+            another root action (see root_actions)
+        tt - a TranspositionTable to read and fill during the search. Passing
+            the same table to later searches (with the same heuristic_func)
+            lets them reuse this search's results.
+        return_stats - if True, return a tuple (action, SearchStats) describing
+            the search, instead of just the action
+        trace - a SearchTracer to stream every visited node to (see
+            searchtrace.py)
+        iterative - if True, search with an explicit stack instead of
+            recursion (see iterativesearch.py)
+        endgame_moves - if given, any state with at most this many moves
+            left (see AdversarialSearchProblem:moves_remaining) is searched to
+            the end of the game instead of cut off, and the search stops at
+            the first root action found to win (see
+            AdversarialSearchProblem:win_threshold). The stats then report
+            the value as proven. The endgame is solved with tt, or with a new
+            TranspositionTable for this search if tt is None.
+        quiescence - the number of plies past cutoff_ply to keep searching
+            forcing moves (see AdversarialSearchProblem:forcing_actions)
+            before calling heuristic_func, so that threats just past the
+            cutoff are not missed
+        lmr - a LateMoveReductions, to search late moves at reduced depth
+            (see forwardpruning.py)
+        probcut - a ProbCut, to cut off nodes predicted by a shallow search
+            (see forwardpruning.py)
+        Neither lmr nor probcut is used if the search is exact (see
+        search_is_exact).
+        batch_heuristic_func - a function taking a list of GameStates to a
+            list of their heuristic_func values (see
+            AdversarialSearchProblem:heuristic_batch). If given, the children
+            of a node just above the cutoff are evaluated in one call.
     Output:
         an action(an element of asp.get_available_actions(asp.get_start_state()))
     """
-    return simulate_alpha_beta_cutoff(asp, asp.get_start_state(), float('-inf'), float('inf'), cutoff_ply, heuristic_func)[1]
+    actions = root_actions(asp, prune_symmetric)
+    stats = SearchStats() if return_stats else None
+    start = time.perf_counter()
+    if trace is not None:
+        trace.enter(0, None, float('-inf'), float('inf'))
+    exact = search_is_exact(asp, asp.get_start_state(), cutoff_ply, endgame_moves)
+    if exact:
+        lmr = probcut = None
+    if endgame_moves is not None and tt is None:
+        tt = TranspositionTable()
+    simulate = simulate_alpha_beta_cutoff_iterative if iterative else simulate_alpha_beta_cutoff
+    value, action = simulate(asp, asp.get_start_state(), float('-inf'), float('inf'), cutoff_ply, heuristic_func, actions, tt, stats, trace=trace, endgame_moves=endgame_moves, quiescence=quiescence, lmr=lmr, probcut=probcut, batch_heuristic_func=batch_heuristic_func)
+    if trace is not None:
+        trace.exit(value, False)
+    if stats is not None:
+        win = asp.win_threshold()
+        stats.value = value
+        stats.proven = exact or (
+            win is not None and abs(value) >= win
+        )
+    return _finish(action, stats, start)
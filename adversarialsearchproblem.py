@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Generic, Set, Tuple, TypeVar
+from typing import Generic, List, Set, Tuple, TypeVar
 
 ###############################################################################
 # An AdversarialSearchProblem is a representation of a game that is convenient
@@ -132,6 +132,122 @@ class AdversarialSearchProblem(ABC, Generic[State, Action]):
         """
         pass
 
+    def heuristic_batch(self, states: List[State], player_index: int) -> List[float]:
+        """
+        Evaluates many states at once, for searches that collect their leaves
+        before evaluating them. The default calls heuristic_func on each
+        state; games can override it with a vectorized version, which must
+        return the same values.
+
+        Input:
+                states- a list of non-terminal GameStates
+                player_index- as in heuristic_func
+        Output:
+                A list with heuristic_func(state, player_index) for each state
+        """
+        return [self.heuristic_func(state, player_index) for state in states]
+
+    def state_key(self, state: State):
+        """
+        A hashable key that identifies the given state, for use in caches and
+        tables keyed on game states. Two states with equal keys must be
+        interchangeable for search purposes.
+
+        The default returns the state itself, which only identifies states by
+        identity; subclasses should override this with a value-based key.
+
+        Input:
+                state- a GameState
+        Output:
+                A hashable key for the state
+        """
+        return state
+
+    def symmetry(self):
+        """
+        Output- Returns an object describing the board symmetries of this game
+                (see asps/symmetry.py), or None if the game has none that
+                search can exploit.
+        """
+        return None
+
+    def value_bounds(self, state: State) -> Tuple[float, float]:
+        """
+        Bounds on the value, to player 0, of the terminal states that can
+        still be reached from a non-terminal state. The alpha-beta searches
+        never look for values outside them, so a game whose terminal values
+        encode how soon a win happens can cut off lines that cannot win (or
+        lose) sooner than one already found.
+
+        The bounds must hold for every terminal state reachable from state,
+        and also contain every value heuristic_func returns for states
+        reachable from it. The default is (-inf, inf), which prunes nothing.
+
+        Input:
+                state- a non-terminal GameState
+        Output:
+                A tuple (lower, upper) of player 0's values
+        """
+        return (float("-inf"), float("inf"))
+
+    def moves_remaining(self, state: State):
+        """
+        Input:
+                state- a GameState
+        Output:
+                An upper bound on the number of moves left before the game
+                ends from state (e.g. the number of empty cells), or None if
+                the game cannot bound it. Searches use it to solve endgames
+                exactly.
+        """
+        return None
+
+    def forcing_actions(self, state: State):
+        """
+        The actions from a non-terminal state that the player to move is
+        forced to choose between: the moves that win at once if there are
+        any, otherwise the moves that stop the opponent winning with their
+        next move. Every other action must be no better for the player to
+        move than the best of these. Returns an empty list when the state is
+        quiet (nothing is forced), which is also the default.
+
+        Cutoff searches with quiescence search forcing moves past the cutoff
+        instead of calling heuristic_func on unstable states.
+
+        Input:
+                state- a non-terminal GameState
+        Output:
+                A list of actions (elements of get_available_actions(state))
+        """
+        return []
+
+    def win_threshold(self):
+        """
+        Output- Returns a value T such that a value of at least T to player 0
+                can only come from a state that player 0 has won, and a value of
+                at most -T from one that player 1 has won; heuristic_func must
+                stay strictly between -T and T. Returns None (the default) if
+                the game's values do not separate wins from heuristic scores.
+        """
+        return None
+
+
+def forward_hooks(wrapper, asp: AdversarialSearchProblem):
+    """
+    For ASPs that wrap another one (e.g. profiling.ProfiledASP): binds every
+    method of AdversarialSearchProblem that type(wrapper) does not override
+    to the same method of asp, so that the wrapped game's optional hooks
+    (value_bounds, forcing_actions, ...) are used through the wrapper instead
+    of the defaults above.
+
+    Input:
+            wrapper- the wrapping AdversarialSearchProblem
+            asp- the AdversarialSearchProblem it wraps
+    """
+    for name, method in vars(AdversarialSearchProblem).items():
+        if callable(method) and not name.startswith("_") and getattr(type(wrapper), name) is method:
+            setattr(wrapper, name, getattr(asp, name))
+
 
 ###############################################################################
 # GameUI is an abstraction that allows you to interact directly with
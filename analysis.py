@@ -0,0 +1,258 @@
+import argparse
+import json
+import multiprocessing
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+)
+from adversarialsearch import search_is_exact, simulate_alpha_beta_cutoff
+from bots import InterruptibleASP, PonderInterrupted
+import gameregistry
+from persistenttable import PersistentTranspositionTable
+from searchstats import SearchStats
+from transposition import TranspositionTable
+
+###############################################################################
+# Analysis of many positions at once (puzzle sets, game reviews).
+#
+# analyze_many() deepens alpha_beta_cutoff from each position in turn, to a
+# fixed depth or for a fixed time per position, and yields a
+# PositionAnalysis for each as soon as it is done. Positions are searched
+# from the states themselves, so the asp's start state is never changed.
+#
+# One transposition table (and the asp's evaluation cache) is shared by all
+# the positions, so positions that share lines, such as consecutive positions
+# of a game, reuse each other's results and move ordering. With workers, the
+# positions are split into chunks across a process pool; each worker keeps
+# its own table and cache for every chunk it analyzes, and results are still
+# yielded in order.
+###############################################################################
+
+
+class PositionAnalysis:
+    def __init__(self, index, action, value, depth, proven, stats):
+        """
+        Inputs:
+                index- the position's index in the states analyzed
+                action- the best action found (None for a terminal state)
+                value- the value of the position, to player 0
+                depth- the cutoff of the deepest completed search
+                proven- whether value is the game-theoretic value (or a
+                        proven win or loss)
+                stats- the combined SearchStats of the completed searches
+        """
+        self.index = index
+        self.action = action
+        self.value = value
+        self.depth = depth
+        self.proven = proven
+        self.stats = stats
+
+    def to_json(self) -> dict:
+        return {
+            "index": self.index,
+            "action": self.action,
+            "value": self.value,
+            "depth": self.depth,
+            "proven": self.proven,
+            "nodes": self.stats.nodes,
+            "elapsed": self.stats.elapsed,
+        }
+
+
+class _Deadline:
+    # A stop condition for InterruptibleASP, set once the deadline has passed
+    def __init__(self, deadline):
+        self._deadline = deadline
+
+    def is_set(self):
+        return time.perf_counter() >= self._deadline
+
+
+def analyze(
+    asp: AdversarialSearchProblem[GameState, Action],
+    state: GameState,
+    depth: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    heuristic_func: Optional[Callable[[GameState], float]] = None,
+    tt: Optional[TranspositionTable] = None,
+    endgame_moves: Optional[int] = None,
+    quiescence: int = 0,
+    index: int = 0,
+) -> PositionAnalysis:
+    """
+    Deepens alpha_beta_cutoff from state one ply at a time, until depth, until
+    time_limit_ms has passed or until the search is exact, whichever comes
+    first. The first iteration always completes; a later one that runs out
+    of time is abandoned. The inputs are as in analyze_many.
+    """
+    if depth is None and time_limit_ms is None:
+        raise ValueError("analyze needs a depth or a time limit")
+    if heuristic_func is None:
+        heuristic_func = lambda s: asp.heuristic_func(s, 0)
+    if tt is None:
+        tt = TranspositionTable()
+    stats = SearchStats()
+    if asp.is_terminal_state(state):
+        value = asp.evaluate_terminal(state)[0]
+        return PositionAnalysis(index, None, value, 0, True, stats)
+
+    start = time.perf_counter()
+    interruptible = asp
+    if time_limit_ms is not None:
+        interruptible = InterruptibleASP(asp, _Deadline(start + time_limit_ms / 1000))
+    win = asp.win_threshold()
+    inf = float("inf")
+    value = action = None
+    completed = 0
+    proven = False
+    while depth is None or completed < depth:
+        iteration = SearchStats()
+        iteration_start = time.perf_counter()
+        try:
+            value, action = simulate_alpha_beta_cutoff(
+                interruptible if completed else asp, state, -inf, inf, completed + 1,
+                heuristic_func, tt=tt, stats=iteration,
+                endgame_moves=endgame_moves, quiescence=quiescence,
+            )
+        except PonderInterrupted:
+            break
+        iteration.elapsed = time.perf_counter() - iteration_start
+        stats.merge(iteration)
+        completed += 1
+        exact = search_is_exact(asp, state, completed, endgame_moves)
+        proven = exact or (win is not None and abs(value) >= win)
+        if exact or (
+            time_limit_ms is not None and time.perf_counter() - start >= time_limit_ms / 1000
+        ):
+            break
+    stats.value, stats.proven = value, proven
+    return PositionAnalysis(index, action, value, completed, proven, stats)
+
+
+def analyze_many(
+    asp: AdversarialSearchProblem[GameState, Action],
+    states: Iterable[GameState],
+    depth: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    heuristic_func: Optional[Callable[[GameState], float]] = None,
+    tt: Optional[TranspositionTable] = None,
+    endgame_moves: Optional[int] = None,
+    quiescence: int = 0,
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+) -> Iterator[PositionAnalysis]:
+    """
+    Analyzes each of the states and yields a PositionAnalysis for each, in
+    order, as soon as it is known.
+
+    Input:
+        asp - an AdversarialSearchProblem
+        states - the positions to analyze
+        depth - the cutoff ply to deepen each position to
+        time_limit_ms - the time to spend on each position, in milliseconds
+            (at least one of depth and time_limit_ms must be given)
+        heuristic_func - the heuristic of the cutoff search, to player 0. It
+            must be the same for every position, since its values are shared
+            through the table. Defaults to asp.heuristic_func(state, 0).
+        tt - the TranspositionTable to share between the positions (a new one
+            by default). With workers, each worker starts from a copy.
+        endgame_moves, quiescence - as in alpha_beta_cutoff
+        workers - if given, the number of processes to analyze positions in.
+            The asp, heuristic_func and states must then be picklable.
+        chunksize - the number of consecutive positions each worker takes at
+            a time
+    Output:
+        an iterator of PositionAnalysis
+    """
+    if depth is None and time_limit_ms is None:
+        raise ValueError("analyze_many needs a depth or a time limit")
+    if tt is None:
+        tt = TranspositionTable()
+    options = (depth, time_limit_ms, heuristic_func, tt, endgame_moves, quiescence)
+    if workers is None:
+        for index, state in enumerate(states):
+            yield analyze(asp, state, *options, index=index)
+        return
+    with multiprocessing.Pool(workers, _start_worker, (asp, options)) as pool:
+        yield from pool.imap(_analyze_in_worker, enumerate(states), chunksize)
+
+
+_worker = None  # (asp, options) of this worker process
+
+
+def _start_worker(asp, options):
+    global _worker
+    _worker = (asp, options)
+
+
+def _analyze_in_worker(task):
+    index, state = task
+    asp, options = _worker
+    return analyze(asp, state, *options, index=index)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--game", choices=gameregistry.game_names(), default="connect4")
+    parser.add_argument("--dimension", type=int, default=None)
+    positions = parser.add_mutually_exclusive_group(required=True)
+    positions.add_argument(
+        "--positions", help="file with one JSON list of moves from the start state per line"
+    )
+    positions.add_argument(
+        "--review", help="JSON list of the moves of a game, to analyze every position of"
+    )
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument("--time-limit", type=float, default=None, help="per position, in milliseconds")
+    parser.add_argument("--endgame", type=int, default=None)
+    parser.add_argument("--quiescence", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--tt-file", default=None,
+        help="keep the transposition table in this file, resuming from it if it exists",
+    )
+    parser.add_argument(
+        "--warm-start", default=None, help="start a new --tt-file with the entries of this one"
+    )
+    args = parser.parse_args()
+    if args.depth is None and args.time_limit is None:
+        parser.error("give --depth or --time-limit")
+    if args.tt_file is not None and args.workers is not None:
+        parser.error("--tt-file cannot be shared with --workers")
+
+    asp = gameregistry.get_game(args.game).make_problem(args.dimension)
+
+    def play(moves):
+        state = asp.get_start_state()
+        for action in moves:
+            state = asp.transition(state, tuple(action) if isinstance(action, list) else action)
+        return state
+
+    if args.review is not None:
+        moves = json.loads(args.review)
+        states = (play(moves[:ply]) for ply in range(len(moves) + 1))
+    else:
+        with open(args.positions) as lines:
+            states = [play(json.loads(line)) for line in lines if line.strip()]
+
+    tt = None
+    if args.tt_file is not None:
+        tt = PersistentTranspositionTable(args.tt_file, warm_start=args.warm_start)
+    try:
+        for result in analyze_many(
+            asp, states, args.depth, args.time_limit, tt=tt,
+            endgame_moves=args.endgame, quiescence=args.quiescence, workers=args.workers,
+        ):
+            print(json.dumps(result.to_json(), default=str))
+    finally:
+        if tt is not None:
+            tt.close()
+
+
+if __name__ == "__main__":
+    main()
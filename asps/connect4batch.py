@@ -0,0 +1,110 @@
+###############################################################################
+# Batched Connect Four simulation.
+#
+# Connect4BatchSimulator plays out K boards at once, held in a single
+# (K, rows, cols) NumPy array laid out like Connect4State.board (row 0 is the
+# bottom row; 0 is empty, 1 is player 1 and 2 is player 2). Every step picks a
+# random legal column for all unfinished boards, drops the pieces using the
+# column heights, and checks all boards for four-in-a-row with strided window
+# sums, so each NumPy call advances thousands of playouts.
+#
+# BatchedRollout wraps the simulator as an MCTS rollout policy (see mcts.py).
+###############################################################################
+
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class Connect4BatchSimulator:
+    def __init__(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def has_four(pieces):
+        """
+        Input:
+                pieces - a (K, rows, cols) boolean array marking one player's pieces
+        Output:
+                A (K,) boolean array indicating which boards contain four of
+                those pieces in a row
+        """
+        pieces = pieces.astype(np.int8)
+        rows, cols = pieces.shape[1:]
+        wins = (sliding_window_view(pieces, 4, axis=2).sum(axis=-1) == 4).any(axis=(1, 2))
+        wins |= (sliding_window_view(pieces, 4, axis=1).sum(axis=-1) == 4).any(axis=(1, 2))
+        diagonal = sum(pieces[:, i : rows - 3 + i, i : cols - 3 + i] for i in range(4))
+        wins |= (diagonal == 4).any(axis=(1, 2))
+        anti_diagonal = sum(pieces[:, i : rows - 3 + i, 3 - i : cols - i] for i in range(4))
+        wins |= (anti_diagonal == 4).any(axis=(1, 2))
+        return wins
+
+    @staticmethod
+    def winners(boards):
+        """
+        Output- A (K,) array holding 1 or 2 for boards won by that player, and
+                0 for boards without four in a row.
+        """
+        result = np.zeros(len(boards), dtype=np.int8)
+        result[Connect4BatchSimulator.has_four(boards == 1)] = 1
+        result[Connect4BatchSimulator.has_four(boards == 2)] = 2
+        return result
+
+    def rollout(self, boards, ptm):
+        """
+        Plays uniformly random moves on every board until each is won or full.
+        The boards array is modified in place.
+
+        Input:
+                boards - a (K, rows, cols) integer array of non-terminal boards
+                ptm - a (K,) array (or a scalar) holding the index of the player
+                to move on each board, as in Connect4State
+        Output:
+                A (K,) array holding the winner of each playout: 1 or 2 for
+                that player, and 0 for a draw
+        """
+        num_boards, rows, cols = boards.shape
+        piece = np.broadcast_to(np.asarray(ptm) + 1, (num_boards,)).astype(np.int8)
+        heights = (boards != 0).sum(axis=1)
+        winners = np.zeros(num_boards, dtype=np.int8)
+        active = np.arange(num_boards)
+
+        while len(active):
+            legal = heights[active] < rows
+            has_moves = legal.any(axis=1)
+            # Full boards without a winner are draws
+            active, legal = active[has_moves], legal[has_moves]
+            if not len(active):
+                break
+
+            # Random legal column per board: argmax of random keys, masked by legality
+            keys = self._rng.random(legal.shape)
+            keys[~legal] = -1.0
+            columns = keys.argmax(axis=1)
+            boards[active, heights[active, columns], columns] = piece[active]
+            heights[active, columns] += 1
+
+            mover = piece[active]
+            won = Connect4BatchSimulator.has_four(boards[active] == mover[:, None, None])
+            winners[active[won]] = mover[won]
+            active = active[~won]
+            piece[active] = 3 - piece[active]
+
+        return winners
+
+
+class BatchedRollout:
+    """
+    An MCTS rollout policy for Connect4Problem that plays batch_size random
+    playouts of a state at once, returning player 1's mean reward. MCTS
+    counts each call as batch_size playouts.
+    """
+
+    def __init__(self, batch_size=64, seed=None):
+        self.batch_size = batch_size
+        self._simulator = Connect4BatchSimulator(seed)
+
+    def __call__(self, asp, state, rng):
+        boards = np.repeat(state.board[None].astype(np.int8), self.batch_size, axis=0)
+        winners = self._simulator.rollout(boards, state.ptm)
+        return (np.count_nonzero(winners == 1) + 0.5 * np.count_nonzero(winners == 0)) / self.batch_size
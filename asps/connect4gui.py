@@ -0,0 +1,107 @@
+# authors: Jason Crowley and Eli Zucker
+
+###############################################################################
+# A pygame window for playing Connect Four (see connect4problem.py).
+#
+# This lives in its own module so that pygame is only imported when a window
+# is actually wanted; Connect4Problem and Connect4NullUI do not need it.
+###############################################################################
+
+
+from adversarialsearchproblem import GameUI
+from .connect4problem import Connect4Problem, Connect4State
+import numpy as np
+import pygame
+import sys
+
+
+class Connect4GUI(GameUI):
+    # Define GUI colors
+    BOARD = (0, 0, 255)  # blue
+    EMPTY = (0, 0, 0)  # black
+    P1 = (255, 0, 0)  # red
+    P2 = (255, 255, 0)  # yellow
+    COLOR_MAP = [EMPTY, P1, P2]
+
+    def __init__(self, asp: Connect4Problem, squaresize=100):
+        self._asp = asp
+        self._state = asp.get_start_state()
+        self._rows, self._cols = asp._start_state.board.shape
+        self._cursor = self._cols // 2
+
+        self.squaresize = int(squaresize)
+        self.width = self._cols * self.squaresize
+        self.height = (self._rows + 1) * self.squaresize
+        self.radius = self.squaresize // 2 - 5
+
+        # Initial pygame window setup:
+        pygame.init()
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        self.draw_board()
+        self.draw_cursor()
+        self.render()
+
+    def render(self):
+        pygame.display.update()
+
+    # Process each event in the GUI window.
+    # Required for the GUI to function as a standard OS application window.
+    def process_window_event(self, event):
+        if event.type == pygame.QUIT:
+            sys.exit()
+
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_LEFT:
+                self._cursor -= 1
+            if event.key == pygame.K_RIGHT:
+                self._cursor += 1
+            self._cursor = np.clip(self._cursor, 0, self._cols - 1)
+
+            self.draw_cursor()
+            self.render()
+
+    # Continuously process events until action is found, then returns that action.
+    def get_user_input_action(self):
+        user_action = None
+        available_actions = self._asp.get_available_actions(self._state)
+
+        while user_action not in available_actions:
+            for event in pygame.event.get():
+                self.process_window_event(event)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                    user_action = self._cursor
+
+        return user_action
+
+    # Update the board state being rendered.
+    def update_state(self, state: Connect4State):
+        self._state = state
+        self.draw_board()
+        self.draw_cursor()
+
+    def draw_piece(self, row, col, piece):
+        pygame.draw.circle(
+            self.screen,
+            Connect4GUI.COLOR_MAP[piece],
+            (int((col + 0.5) * self.squaresize), int((row + 1.5) * self.squaresize)),
+            self.radius,
+        )
+
+    def draw_cursor(self):
+        pygame.draw.rect(
+            self.screen, Connect4GUI.EMPTY, (0, 0, self.width, self.squaresize)
+        )
+        piece = self._state.player_to_move() + 1
+        self.draw_piece(-1, self._cursor, piece)
+
+    def draw_board(self):
+        # Fill in board area:
+        pygame.draw.rect(
+            self.screen,
+            Connect4GUI.BOARD,
+            (0, self.squaresize, self.width, self.height),
+        )
+        # Fill in circles:
+        board = self._state.board
+        for (r, c), piece in np.ndenumerate(np.flipud(board)):
+            self.draw_piece(r, c, piece)
@@ -15,10 +15,10 @@
 
 from typing import Tuple
 from adversarialsearchproblem import AdversarialSearchProblem, GameUI, GameState
+from evalcache import EvaluationCache, cached_batch_evaluation, cached_evaluation
 from . import connect4utils as c4utils
+from .symmetry import Connect4Symmetry
 import numpy as np
-import pygame
-import sys
 
 
 class Connect4State(GameState):
@@ -50,6 +50,10 @@ Action = int
 class Connect4Problem(AdversarialSearchProblem[Connect4State, Action]):
     DEFAULT_ROWS = 6
     DEFAULT_COLS = 7
+    # A win is worth WIN_SCORE plus the number of empty cells left on the
+    # board, so sooner wins are worth more. WIN_SCORE is far above anything
+    # heuristic_func returns.
+    WIN_SCORE = 1000000
 
     def __init__(self, dims=(DEFAULT_ROWS, DEFAULT_COLS), board=None, player_to_move=0):
         """
@@ -65,7 +69,17 @@ class Connect4Problem(AdversarialSearchProblem[Connect4State, Action]):
             board = c4utils.create_board(dims)
         self._rows, self._cols = board.shape
         self._start_state = Connect4State(board, player_to_move)
+        self._symmetry = Connect4Symmetry(self._cols)
+        # Caches heuristic_func's results (see evalcache.py); None disables it
+        self.evaluation_cache = EvaluationCache()
 
+    def state_key(self, state):
+        return (state.board.tobytes(), state.ptm)
+
+    def symmetry(self):
+        return self._symmetry
+
+    @cached_evaluation
     def heuristic_func(self, state: Connect4State, player_index):
         player_index += 1
         board = state.board
@@ -83,6 +97,25 @@ class Connect4Problem(AdversarialSearchProblem[Connect4State, Action]):
 
         return score
 
+    @cached_batch_evaluation
+    def heuristic_batch(self, states, player_index):
+        # heuristic_func over a stack of boards: every slice is scored at once
+        piece = player_index + 1
+        opponent = piece % 2 + 1
+        boards = np.stack([state.board for state in states])
+        windows = boards.reshape(len(states), -1)[:, c4utils.connect_four_windows(boards.shape[1:])]
+        own = (windows == piece).sum(axis=2)
+        theirs = (windows == opponent).sum(axis=2)
+        empty = (windows == 0).sum(axis=2)
+        slice_scores = (
+            100 * (own == 4)
+            + 5 * ((own == 3) & (empty == 1))
+            + 2 * ((own == 2) & (empty == 2))
+            - 4 * ((theirs == 3) & (empty == 1))
+        )
+        center = (boards[:, :, boards.shape[2] // 2] == piece).sum(axis=1) * 3
+        return (slice_scores.sum(axis=1) + center).tolist()
+
     def get_available_actions(self, state):
         actions = {
             col
@@ -108,13 +141,44 @@ class Connect4Problem(AdversarialSearchProblem[Connect4State, Action]):
     def evaluate_terminal(self, state):
         assert self.is_terminal_state(state)
 
+        score = Connect4Problem.WIN_SCORE + int(np.count_nonzero(state.board == 0))
         if c4utils.winning_move(state.board, 1):
-            return [float("inf"), float("-inf")]
+            return [score, -score]
         elif c4utils.winning_move(state.board, 2):
-            return [float("-inf"), float("inf")]
+            return [-score, score]
         else:
             return [0, 0]
 
+    def forcing_actions(self, state):
+        # Columns where the player to move connects four, otherwise columns
+        # where the opponent would
+        rows = state.board.tolist()
+        landing = [
+            (c4utils.get_next_open_row(state.board, col), col)
+            for col in range(self._cols)
+            if rows[-1][col] == 0
+        ]
+        for piece in (state.ptm + 1, 2 - state.ptm):
+            forced = [col for row, col in landing if c4utils.makes_four(rows, row, col, piece)]
+            if forced:
+                return forced
+        return []
+
+    def moves_remaining(self, state):
+        return int(np.count_nonzero(state.board == 0))
+
+    def win_threshold(self):
+        return Connect4Problem.WIN_SCORE
+
+    def value_bounds(self, state):
+        # The player to move can win at the earliest with their next piece,
+        # and the other player with the piece after that
+        empty = int(np.count_nonzero(state.board == 0))
+        soonest = Connect4Problem.WIN_SCORE + empty - 1
+        if state.ptm == 0:
+            return (-(soonest - 1), soonest)
+        return (-soonest, soonest - 1)
+
     @staticmethod
     def evaluate_slice(slice, player_index):
         score = 0
@@ -138,96 +202,46 @@ class Connect4Problem(AdversarialSearchProblem[Connect4State, Action]):
         print()
 
 
-class Connect4GUI(GameUI):
-    # Define GUI colors
-    BOARD = (0, 0, 255)  # blue
-    EMPTY = (0, 0, 0)  # black
-    P1 = (255, 0, 0)  # red
-    P2 = (255, 255, 0)  # yellow
-    COLOR_MAP = [EMPTY, P1, P2]
+class Connect4NullUI(GameUI):
+    """
+    A GameUI that draws nothing, for running Connect Four without a display.
+    Human moves, if any, are read from the console as column indices.
+    """
 
-    def __init__(self, asp: Connect4Problem, squaresize=100):
+    def __init__(self, asp: Connect4Problem):
         self._asp = asp
         self._state = asp.get_start_state()
-        self._rows, self._cols = asp._start_state.board.shape
-        self._cursor = self._cols // 2
-
-        self.squaresize = int(squaresize)
-        self.width = self._cols * self.squaresize
-        self.height = (self._rows + 1) * self.squaresize
-        self.radius = self.squaresize // 2 - 5
-
-        # Initial pygame window setup:
-        pygame.init()
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        self.draw_board()
-        self.draw_cursor()
-        self.render()
 
     def render(self):
-        pygame.display.update()
-
-    # Process each event in the GUI window.
-    # Required for the GUI to function as a standard OS application window.
-    def process_window_event(self, event):
-        if event.type == pygame.QUIT:
-            sys.exit()
-
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_LEFT:
-                self._cursor -= 1
-            if event.key == pygame.K_RIGHT:
-                self._cursor += 1
-            self._cursor = np.clip(self._cursor, 0, self._cols - 1)
-
-            self.draw_cursor()
-            self.render()
+        pass
 
-    # Continuously process events until action is found, then returns that action.
     def get_user_input_action(self):
         user_action = None
         available_actions = self._asp.get_available_actions(self._state)
 
         while user_action not in available_actions:
-            for event in pygame.event.get():
-                self.process_window_event(event)
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                    user_action = self._cursor
+            try:
+                line = input("Enter column index: ")
+            except EOFError:
+                # No more moves will come, so end the game instead of waiting
+                raise SystemExit("no more input: the game was abandoned")
+            try:
+                user_action = int(line)
+            except ValueError:
+                user_action = None
+            if user_action not in available_actions:
+                print(f"Enter one of the columns {sorted(available_actions)}.")
 
         return user_action
 
-    # Update the board state being rendered.
-    def update_state(self, state: Connect4State):
-        self._state = state
-        self.draw_board()
-        self.draw_cursor()
-
-    def draw_piece(self, row, col, piece):
-        pygame.draw.circle(
-            self.screen,
-            Connect4GUI.COLOR_MAP[piece],
-            (int((col + 0.5) * self.squaresize), int((row + 1.5) * self.squaresize)),
-            self.radius,
-        )
 
-    def draw_cursor(self):
-        pygame.draw.rect(
-            self.screen, Connect4GUI.EMPTY, (0, 0, self.width, self.squaresize)
-        )
-        piece = self._state.player_to_move() + 1
-        self.draw_piece(-1, self._cursor, piece)
-
-    def draw_board(self):
-        # Fill in board area:
-        pygame.draw.rect(
-            self.screen,
-            Connect4GUI.BOARD,
-            (0, self.squaresize, self.width, self.height),
-        )
-        # Fill in circles:
-        board = self._state.board
-        for (r, c), piece in np.ndenumerate(np.flipud(board)):
-            self.draw_piece(r, c, piece)
+def __getattr__(name):
+    # Connect4GUI needs pygame, which is only imported once the GUI is used
+    if name == "Connect4GUI":
+        from .connect4gui import Connect4GUI
+
+        return Connect4GUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main():
@@ -263,7 +277,8 @@ def main():
     winning_state = Connect4State(winning_board, 1)
 
     assert t.is_terminal_state(winning_state)
-    assert t.evaluate_terminal(winning_state) == [float("inf"), float("-inf")]
+    win_score = Connect4Problem.WIN_SCORE + 35
+    assert t.evaluate_terminal(winning_state) == [win_score, -win_score]
 
     tie_board = c4utils.create_board()
     tie_board[:, 0::2] = np.array([1, 1, 1, 2, 2, 2])[:, None]
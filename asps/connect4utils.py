@@ -1,3 +1,4 @@
+import functools
 import numpy as np
 import copy
 
@@ -50,5 +51,34 @@ def all_connect_four_slices(board):
     return np.concatenate(connect_fours).astype(int)
 
 
+def makes_four(rows, row, col, piece):
+    """
+    Whether a piece at (row, col) would complete four in a row for piece.
+    rows is the board as a list of lists (board.tolist()), and the cell
+    itself is treated as holding piece whatever it holds.
+    """
+    height, width = len(rows), len(rows[0])
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        count = 1
+        for sign in (1, -1):
+            r, c = row + sign * dr, col + sign * dc
+            while 0 <= r < height and 0 <= c < width and rows[r][c] == piece:
+                count += 1
+                r, c = r + sign * dr, c + sign * dc
+        if count >= 4:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def connect_four_windows(shape):
+    """
+    The cells of every connect-four slice of a board of the given shape, as
+    an array of flat (row-major) indices with one row of 4 per slice.
+    """
+    cells = np.arange(shape[0] * shape[1]).reshape(shape)
+    return all_connect_four_slices(cells)
+
+
 def winning_move(board, piece):
     return (all_connect_four_slices(board) == piece).all(axis=1).any()
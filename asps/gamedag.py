@@ -1,3 +1,4 @@
+import random
 from typing import Dict, List, Set, Tuple
 
 from adversarialsearchproblem import AdversarialSearchProblem, GameState
@@ -67,6 +68,9 @@ class GameDAG(AdversarialSearchProblem[DAGState, Action]):
         _, _ = state, player_index
         return 0
 
+    def state_key(self, state: DAGState):
+        return (state._index, state._ptm)
+
     def get_available_actions(self, state: DAGState) -> Set[Action]:
         """
         Inputs:
@@ -126,3 +130,45 @@ class GameDAG(AdversarialSearchProblem[DAGState, Action]):
         assert self.is_terminal_state(state)
 
         return self._terminal_evaluations[state._index]
+
+
+def random_game_dag(
+    depth: int,
+    width: int,
+    branching: int,
+    seed=None,
+    terminal_probability: float = 0.1,
+) -> GameDAG:
+    """
+    Generates a random layered GameDAG for testing and benchmarking.
+
+    Inputs:
+        depth - the number of plies from the start state to the last layer
+        width - the number of states in each layer after the start state
+        branching - the maximum number of actions from a non-terminal state;
+            each state links to between 1 and branching random states of the
+            next layer, so different lines transpose into shared states
+        seed - seed for the random generator
+        terminal_probability - chance that a state before the last layer is
+            terminal (every state in the last layer is terminal)
+    Output:
+        A GameDAG whose start state is state 0 with player 0 to move, and
+        whose terminal values are multiples of 0.25 for player 0.
+    """
+    rng = random.Random(seed)
+    n = 1 + depth * width
+    matrix = [[False] * n for _ in range(n)]
+    terminal_evaluations = {}
+
+    def layer(l):
+        return range(0, 1) if l == 0 else range(1 + (l - 1) * width, 1 + l * width)
+
+    for l in range(depth + 1):
+        for i in layer(l):
+            if l == depth or (l > 0 and rng.random() < terminal_probability):
+                value = rng.choice([0.0, 0.25, 0.5, 0.75, 1.0])
+                terminal_evaluations[i] = (value, 1.0 - value)
+                continue
+            for j in rng.sample(layer(l + 1), rng.randint(1, min(branching, width))):
+                matrix[i][j] = True
+    return GameDAG(matrix, DAGState(0, 0), terminal_evaluations)
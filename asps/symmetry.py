@@ -0,0 +1,192 @@
+###############################################################################
+# Board symmetries for grid games.
+#
+# A Symmetry describes a group of board transforms under which a game's rules
+# (and heuristic) are invariant. Transform t maps a state to an equivalent
+# state, and maps an action in the original frame to the corresponding action
+# in the transformed frame. Transform 0 is always the identity.
+#
+# - TTTProblem boards have the 8 symmetries of the square.
+# - Connect4Problem boards only have the left/right mirror.
+#
+# Obtain the symmetry of a game with asp.symmetry(); it returns None for games
+# that have no usable symmetry (e.g. GameDAG).
+###############################################################################
+
+
+from abc import ABC, abstractmethod
+
+
+class Symmetry(ABC):
+    # Number of transforms in the group, including the identity (transform 0).
+    num_transforms = 1
+
+    @abstractmethod
+    def transform_board(self, board, t):
+        """
+        Returns a new board equal to the given board under transform t.
+        """
+        pass
+
+    @abstractmethod
+    def transform_action(self, action, t):
+        """
+        Maps an action on a board to the equivalent action on the board
+        transformed by t.
+        """
+        pass
+
+    @abstractmethod
+    def inverse(self, t) -> int:
+        """
+        Returns the index of the transform that undoes transform t.
+        """
+        pass
+
+    @abstractmethod
+    def board_key(self, board):
+        """
+        Returns a hashable, totally ordered key for a board.
+        """
+        pass
+
+    def transform_state(self, state, t):
+        return type(state)(self.transform_board(state.board, t), state.ptm)
+
+    def restore_action(self, action, t):
+        """
+        Maps an action chosen in the frame of a state transformed by t back to
+        the frame of the original state.
+        """
+        return self.transform_action(action, self.inverse(t))
+
+    def canonicalize(self, state):
+        """
+        Input:
+                state- a GameState of the game this symmetry belongs to
+        Output:
+                A tuple (canonical_state, t) such that canonical_state is
+                transform_state(state, t). Every state in an equivalence class
+                has the same canonical state.
+        """
+        best_key, best_t = None, 0
+        for t in range(self.num_transforms):
+            key = self.board_key(self.transform_board(state.board, t))
+            if best_key is None or key < best_key:
+                best_key, best_t = key, t
+        return self.transform_state(state, best_t), best_t
+
+    def canonical_key(self, state):
+        """
+        Returns a hashable key shared by every state in the equivalence class
+        of the given state.
+        """
+        return self.canonical_frame(state)[0]
+
+    def canonical_frame(self, state):
+        """
+        Returns a tuple (canonical_key(state), t) such that t transforms state
+        into the canonical state of its class, without building that state.
+        """
+        best_key, best_t = None, 0
+        for t in range(self.num_transforms):
+            key = self.board_key(self.transform_board(state.board, t))
+            if best_key is None or key < best_key:
+                best_key, best_t = key, t
+        return (best_key, state.ptm), best_t
+
+    def stabilizer(self, state):
+        """
+        Returns the transforms that leave the given state unchanged.
+        """
+        key = self.board_key(state.board)
+        return [
+            t
+            for t in range(self.num_transforms)
+            if self.board_key(self.transform_board(state.board, t)) == key
+        ]
+
+    def distinct_actions(self, state, actions):
+        """
+        Input:
+                state- a GameState
+                actions- the actions available from state
+        Output:
+                A subset of actions containing exactly one action from each
+                class of actions that lead to symmetric child states.
+        """
+        stabilizer = self.stabilizer(state)
+        distinct = set()
+        covered = set()
+        for action in sorted(actions):
+            if action in covered:
+                continue
+            distinct.add(action)
+            covered.update(self.transform_action(action, t) for t in stabilizer)
+        return distinct
+
+
+class TTTSymmetry(Symmetry):
+    """
+    The 8 symmetries of a square Tic-Tac-Toe board: the identity, three
+    rotations, and four reflections. Boards are 2D lists and actions are
+    (row, column) pairs, as in tttproblem.py.
+    """
+
+    num_transforms = 8
+    _INVERSES = [0, 3, 2, 1, 4, 5, 6, 7]
+
+    def __init__(self, dim):
+        self._dim = dim
+
+    def transform_action(self, action, t):
+        r, c = action
+        n = self._dim - 1
+        return [
+            (r, c),  # identity
+            (c, n - r),  # rotate 90 clockwise
+            (n - r, n - c),  # rotate 180
+            (n - c, r),  # rotate 270 clockwise
+            (r, n - c),  # mirror left/right
+            (n - r, c),  # mirror top/bottom
+            (c, r),  # transpose
+            (n - c, n - r),  # anti-transpose
+        ][t]
+
+    def transform_board(self, board, t):
+        new_board = [[None] * self._dim for _ in range(self._dim)]
+        for r in range(self._dim):
+            for c in range(self._dim):
+                new_r, new_c = self.transform_action((r, c), t)
+                new_board[new_r][new_c] = board[r][c]
+        return new_board
+
+    def inverse(self, t):
+        return TTTSymmetry._INVERSES[t]
+
+    def board_key(self, board):
+        return tuple(tuple(row) for row in board)
+
+
+class Connect4Symmetry(Symmetry):
+    """
+    The left/right mirror symmetry of a Connect Four board. Boards are 2D
+    NumPy arrays and actions are column indices, as in connect4problem.py.
+    """
+
+    num_transforms = 2
+
+    def __init__(self, cols):
+        self._cols = cols
+
+    def transform_action(self, action, t):
+        return action if t == 0 else self._cols - 1 - action
+
+    def transform_board(self, board, t):
+        return board.copy() if t == 0 else board[:, ::-1].copy()
+
+    def inverse(self, t):
+        return t
+
+    def board_key(self, board):
+        return board.tobytes()
@@ -17,6 +17,8 @@
 
 from typing import Tuple
 from adversarialsearchproblem import AdversarialSearchProblem, GameState, GameUI
+from evalcache import EvaluationCache, cached_batch_evaluation, cached_evaluation
+from .symmetry import TTTSymmetry
 import time
 import numpy as np
 
@@ -66,8 +68,40 @@ class TTTProblem(AdversarialSearchProblem[TTTState, Action]):
         if board == None:
             board = [[SPACE for _ in range(dim)] for _ in range(dim)]
         self._start_state = TTTState(board, player_to_move)
-    
-
+        self._symmetry = TTTSymmetry(dim)
+        # Caches heuristic_func's results (see evalcache.py); None disables it
+        self.evaluation_cache = EvaluationCache()
+
+    def state_key(self, state):
+        return (tuple(tuple(row) for row in state.board), state.ptm)
+
+    def symmetry(self):
+        return self._symmetry
+
+    def moves_remaining(self, state):
+        return sum(row.count(SPACE) for row in state.board)
+
+    @cached_batch_evaluation
+    def heuristic_batch(self, states, player_index):
+        # heuristic_func over a stack of boards: every line is counted at once
+        boards = np.array([state.board for state in states])
+        lines = np.concatenate(
+            [
+                boards,
+                boards.transpose(0, 2, 1),
+                boards.diagonal(axis1=1, axis2=2)[:, None, :],
+                boards[:, :, ::-1].diagonal(axis1=1, axis2=2)[:, None, :],
+            ],
+            axis=1,
+        )
+        player = np.sum(lines == PLAYER_SYMBOLS[0], axis=2)
+        opponent = np.sum(lines == PLAYER_SYMBOLS[1], axis=2)
+        open_lines = np.minimum(player, opponent) == 0
+        player_score = np.sum(player ** 2 * open_lines, axis=1)
+        opponent_score = np.sum(opponent ** 2 * open_lines, axis=1)
+        return list(player_score / (player_score + opponent_score))
+
+    @cached_evaluation
     def heuristic_func(self, state: TTTState, player_index: int) -> float:
         """
         TODO: Fill this out with your own heuristic function! You should make sure that this
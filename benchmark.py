@@ -0,0 +1,292 @@
+import argparse
+import json
+import platform
+import statistics
+import time
+
+import adversarialsearch
+from asps.gamedag import random_game_dag
+from forwardpruning import LateMoveReductions
+import gameregistry
+
+###############################################################################
+# Benchmarks for the search entry points over a fixed corpus of positions.
+#
+# Every engine in a position's list is run `repeat` times, each time on a
+# freshly built position (so every run starts cold). The results record
+# the node count (which only changes when the search itself changes) and the
+# fastest and median wall times, and are written as JSON. Given a baseline
+# (a results file from an earlier run on the same machine), any benchmark
+# whose wall time grew, or whose nodes per second fell, by more than the
+# threshold is reported as a regression.
+#
+# Engines are named "minimax", "alpha_beta" or "alpha_beta_cutoff:<ply>",
+# optionally followed by "+iterative" for the non-recursive search and, for
+# the cutoff search, "+lmr" for late-move reductions and "+batch" for batched
+# evaluation of the frontier. The cutoff search uses the game's heuristic for
+# the player to move.
+#
+# mcts_scaling() measures how parallel MCTS playouts per second grow with the
+# number of worker processes, on the same position with a fixed time budget
+# per search. It is not compared against baselines, since it depends on the
+# number of cores.
+#
+# Typical use:
+#   python benchmark.py --output before.json
+#   python benchmark.py --baseline before.json
+#   python benchmark.py --filter c4-opening --mcts-scaling 1,2,4,8,16,32
+###############################################################################
+
+
+class BenchmarkPosition:
+    def __init__(self, name, engines, game=None, dimension=None, moves=(), dag=None):
+        """
+        Inputs:
+                name- a unique name for the position
+                engines- the engine names to benchmark on it
+                game, dimension- the registered game and board dimension
+                moves- the moves played from the game's start state
+                dag- for a synthetic position instead of a game, the arguments
+                        of random_game_dag
+        """
+        self.name = name
+        self.engines = engines
+        self.game = game
+        self.dimension = dimension
+        self.moves = moves
+        self.dag = dag
+
+    def build(self):
+        if self.dag is not None:
+            return random_game_dag(**self.dag)
+        asp = gameregistry.get_game(self.game).make_problem(self.dimension)
+        state = asp.get_start_state()
+        for action in self.moves:
+            state = asp.transition(state, action)
+        asp.set_start_state(state)
+        return asp
+
+
+CORPUS = [
+    BenchmarkPosition(
+        "ttt3-center",
+        ["minimax", "alpha_beta", "alpha_beta_cutoff:3", "minimax+iterative", "alpha_beta+iterative"],
+        game="ttt", moves=[(1, 1)],
+    ),
+    BenchmarkPosition(
+        "ttt3-opening", ["minimax", "alpha_beta", "alpha_beta_cutoff:2", "alpha_beta_cutoff:4"],
+        game="ttt", moves=[(0, 0), (1, 1)],
+    ),
+    BenchmarkPosition(
+        "ttt4-middlegame", ["alpha_beta_cutoff:2", "alpha_beta_cutoff:3", "alpha_beta_cutoff:4"],
+        game="ttt", dimension=4, moves=[(0, 0), (1, 1), (2, 2), (3, 3), (0, 3), (3, 0)],
+    ),
+    BenchmarkPosition(
+        "ttt4-endgame", ["alpha_beta", "alpha_beta_cutoff:3"],
+        game="ttt", dimension=4,
+        moves=[(0, 0), (1, 1), (2, 2), (3, 3), (0, 3), (3, 0), (1, 2), (2, 1)],
+    ),
+    BenchmarkPosition(
+        "c4-opening", ["alpha_beta_cutoff:2", "alpha_beta_cutoff:3", "alpha_beta_cutoff:4"],
+        game="connect4", moves=[3, 1],
+    ),
+    BenchmarkPosition(
+        "c4-middlegame",
+        [
+            "alpha_beta_cutoff:2", "alpha_beta_cutoff:3", "alpha_beta_cutoff:4",
+            "alpha_beta_cutoff:4+iterative", "alpha_beta_cutoff:4+lmr", "alpha_beta_cutoff:5+lmr",
+            "alpha_beta_cutoff:4+batch",
+        ],
+        game="connect4", moves=[3, 1, 1, 6, 1, 4, 5, 6, 5, 1, 0, 5, 0, 2],
+    ),
+    BenchmarkPosition(
+        "c4-endgame-a", ["alpha_beta", "alpha_beta_cutoff:4"],
+        game="connect4",
+        moves=[3, 1, 1, 6, 1, 4, 5, 6, 5, 1, 0, 5, 0, 2, 6, 1, 5, 0, 2, 2, 5, 4, 6, 5, 2, 4, 6, 0],
+    ),
+    BenchmarkPosition(
+        "c4-endgame-b", ["alpha_beta", "alpha_beta_cutoff:4"],
+        game="connect4",
+        moves=[0, 3, 0, 6, 1, 3, 0, 5, 4, 1, 1, 1, 1, 2, 4, 3, 5, 2, 3, 3, 1, 4, 2, 4, 3, 0, 0, 2],
+    ),
+    BenchmarkPosition(
+        "dag-small", ["minimax", "alpha_beta", "alpha_beta_cutoff:2", "alpha_beta_cutoff:4"],
+        dag={"depth": 8, "width": 12, "branching": 4, "seed": 1},
+    ),
+    BenchmarkPosition(
+        "dag-large",
+        ["minimax", "alpha_beta", "alpha_beta_cutoff:4", "minimax+iterative", "alpha_beta+iterative"],
+        dag={"depth": 12, "width": 30, "branching": 4, "seed": 2},
+    ),
+]
+
+
+def run_engine(asp, engine: str):
+    """
+    Runs the named engine once from the start state of asp and returns its
+    (action, SearchStats).
+    """
+    engine, *options = engine.split("+")
+    for option in options:
+        if option not in ("iterative", "lmr", "batch"):
+            raise ValueError(f"Unknown engine option: {option}")
+    iterative = "iterative" in options
+    name, _, parameter = engine.partition(":")
+    if name == "minimax":
+        return adversarialsearch.minimax(asp, return_stats=True, iterative=iterative)
+    if name == "alpha_beta":
+        return adversarialsearch.alpha_beta(asp, return_stats=True, iterative=iterative)
+    if name == "alpha_beta_cutoff":
+        player = asp.get_start_state().player_to_move()
+        return adversarialsearch.alpha_beta_cutoff(
+            asp, int(parameter), lambda s: asp.heuristic_func(s, player),
+            return_stats=True, iterative=iterative,
+            lmr=LateMoveReductions() if "lmr" in options else None,
+            batch_heuristic_func=(lambda states: asp.heuristic_batch(states, player)) if "batch" in options else None,
+        )
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def benchmark(position: BenchmarkPosition, engine: str, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        # A fresh problem per repeat, so no repeat starts with the evaluation
+        # cache of the one before it
+        asp = position.build()
+        start = time.perf_counter()
+        action, stats = run_engine(asp, engine)
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "action": repr(action),
+        "nodes": stats.nodes,
+        "wall_time": best,
+        "median_time": statistics.median(times),
+        "nodes_per_second": stats.nodes / best if best > 0 else 0.0,
+    }
+
+
+def mcts_scaling(position: BenchmarkPosition, worker_counts, mode: str = "root", time_limit_ms: float = 1000):
+    """
+    Runs ParallelMCTS from the position for time_limit_ms with each number of
+    workers, and returns a dict from "<position>/mcts-<mode>:<workers>" to its
+    playouts, playouts per second, and speedup over the first worker count.
+    """
+    from parallelmcts import ParallelMCTS
+
+    results = {}
+    base = None
+    for workers in worker_counts:
+        with ParallelMCTS(position.build(), workers, mode=mode, seed=0) as engine:
+            # Start the workers before timing
+            engine.search(iterations=workers)
+            engine.search(time_limit_ms=time_limit_ms)
+            rate = engine.playouts_per_second
+        if base is None:
+            base = rate
+        results[f"{position.name}/mcts-{mode}:{workers}"] = {
+            "workers": workers,
+            "playouts": engine.playouts,
+            "playouts_per_second": rate,
+            "speedup": rate / base if base > 0 else 0.0,
+        }
+    return results
+
+
+def run_suite(corpus=CORPUS, repeat=5, name_filter=None, verbose=False):
+    """
+    Benchmarks every (position, engine) pair of the corpus whose key
+    ("<position>/<engine>") contains name_filter. Returns the results document.
+    """
+    results = {}
+    for position in corpus:
+        for engine in position.engines:
+            key = f"{position.name}/{engine}"
+            if name_filter and name_filter not in key:
+                continue
+            results[key] = benchmark(position, engine, repeat)
+            if verbose:
+                result = results[key]
+                print(
+                    f"{key:<40}{result['nodes']:>10}{result['wall_time']:>10.4f}s"
+                    f"{result['nodes_per_second']:>12.0f}/s"
+                )
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.1):
+    """
+    Returns a list of (key, metric, baseline value, current value) for every
+    benchmark in both documents whose wall time or nodes per second got worse
+    by more than threshold (a fraction), or whose node count changed.
+    """
+    changes = []
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        base = baseline["results"][key]
+        if result["nodes"] != base["nodes"]:
+            changes.append((key, "nodes", base["nodes"], result["nodes"]))
+        if result["wall_time"] > base["wall_time"] * (1 + threshold):
+            changes.append((key, "wall_time", base["wall_time"], result["wall_time"]))
+        if result["nodes_per_second"] < base["nodes_per_second"] * (1 - threshold):
+            changes.append(
+                (key, "nodes_per_second", base["nodes_per_second"], result["nodes_per_second"])
+            )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose key contains this")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", default=None, help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, as a fraction")
+    parser.add_argument(
+        "--mcts-scaling", default=None,
+        help="comma-separated worker counts to measure parallel MCTS playouts/s with, "
+        "on every position matching --filter",
+    )
+    parser.add_argument("--mcts-mode", choices=["root", "tree"], default="root")
+    parser.add_argument(
+        "--mcts-time", type=float, default=1000, help="MCTS time per search, in milliseconds"
+    )
+    args = parser.parse_args()
+
+    current = run_suite(repeat=args.repeat, name_filter=args.filter, verbose=True)
+    if args.mcts_scaling:
+        worker_counts = [int(count) for count in args.mcts_scaling.split(",")]
+        current["mcts_scaling"] = {}
+        for position in CORPUS:
+            if position.dag is not None or (args.filter and args.filter not in position.name):
+                continue
+            results = mcts_scaling(position, worker_counts, args.mcts_mode, args.mcts_time)
+            for key, result in results.items():
+                print(
+                    f"{key:<40}{result['playouts']:>10}{result['playouts_per_second']:>12.0f}/s"
+                    f"{result['speedup']:>8.2f}x"
+                )
+            current["mcts_scaling"].update(results)
+    with open(args.output, "w") as output:
+        json.dump(current, output, indent=2)
+    print(f"results in {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        changes = compare(current, baseline, args.threshold)
+        for key, metric, before, after in changes:
+            label = "changed" if metric == "nodes" else "REGRESSION"
+            print(f"{label} {key} {metric}: {before:.6g} -> {after:.6g}")
+        if any(metric != "nodes" for _, metric, _, _ in changes):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+from abc import ABC, abstractmethod
+import threading
+from typing import Callable, List, Optional
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+    forward_hooks,
+)
+import adversarialsearch
+from forwardpruning import LateMoveReductions, ProbCut
+from mcts import MCTS
+from searchstats import SearchStats
+from transposition import TranspositionTable, from_table_action, table_key
+
+###############################################################################
+# A Bot is a player for gamerunner.run_game that keeps state between moves.
+#
+# Plain functions that take an ASP and return an action can still be used as
+# bots, but they start every move from scratch. A Bot object is asked for a
+# move with choose(asp), and is told about every move made in the game (by
+# either player) through notify(action), so it can carry its search work over
+# to its next move.
+#
+# A Bot may also ponder: while its opponent decides on a move, run_game can
+# call ponder(asp, state, stop) on a background thread, and the bot searches
+# the opponent's possible replies until the stop event is set.
+###############################################################################
+
+
+class Bot(ABC):
+    @abstractmethod
+    def choose(self, asp: AdversarialSearchProblem[GameState, Action]) -> Action:
+        """
+        Input:
+                asp- the game, whose start state is the current position
+        Output:
+                Returns the action to play from the current position
+        """
+        pass
+
+    def notify(self, action: Action):
+        """
+        Called after every move of the game, including this bot's own moves.
+
+        Input:
+                action- the action that was just played
+        """
+        pass
+
+    def ponder(self, asp: AdversarialSearchProblem[GameState, Action], state: GameState, stop: threading.Event):
+        """
+        Searches on the opponent's time. Called on a background thread while
+        the opponent chooses a move from state; must return soon after stop is
+        set. choose() and notify() are only called once pondering has stopped.
+        The default does nothing.
+        """
+        pass
+
+
+def choose_action(bot, asp: AdversarialSearchProblem[GameState, Action]) -> Action:
+    """
+    Asks a Bot or a function-style bot for its move.
+    """
+    if isinstance(bot, Bot):
+        return bot.choose(asp)
+    return bot(asp)
+
+
+class Ponderer:
+    """
+    Runs a bot's ponder() on a background thread.
+    """
+
+    def __init__(self, bot: Bot, asp: AdversarialSearchProblem[GameState, Action], state: GameState):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=bot.ponder, args=(asp, state, self._stop), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class PonderInterrupted(Exception):
+    pass
+
+
+class InterruptibleASP(AdversarialSearchProblem[GameState, Action]):
+    """
+    Wraps an ASP so that any search over it raises PonderInterrupted as soon
+    as stop.is_set() is true. stop can be a threading.Event or any other
+    object with an is_set() method (e.g. one that is set once a deadline has
+    passed). Everything else is passed on to the asp.
+    """
+
+    def __init__(self, asp, stop):
+        self._asp = asp
+        self._stop = stop
+        forward_hooks(self, asp)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._asp, name)
+
+    def get_available_actions(self, state):
+        if self._stop.is_set():
+            raise PonderInterrupted()
+        return self._asp.get_available_actions(state)
+
+    def transition(self, state, action):
+        return self._asp.transition(state, action)
+
+    def is_terminal_state(self, state):
+        return self._asp.is_terminal_state(state)
+
+    def evaluate_terminal(self, state):
+        return self._asp.evaluate_terminal(state)
+
+    def heuristic_func(self, state, player_index):
+        return self._asp.heuristic_func(state, player_index)
+
+
+class AlphaBetaCutoffBot(Bot):
+    """
+    Plays with alpha_beta_cutoff, deepening one ply at a time up to cutoff_ply.
+    A single transposition table is kept for the whole game, so each search
+    starts with the results and move ordering of the ones before it.
+
+    When pondering, it deepens the positions after each opponent reply in
+    turn, starting with the reply its table expects, so that its next search
+    finds its root already in the table.
+
+    With endgame_moves, positions with at most that many moves left are
+    solved exactly (see alpha_beta_cutoff), and deepening stops once the
+    search reaches the end of the game. With quiescence, every search keeps
+    following forcing moves that many plies past its cutoff. lmr, probcut and
+    batch_heuristic_func are passed on to every search (see
+    alpha_beta_cutoff).
+
+    If verbose, the SearchStats of every iteration of a move are combined into
+    last_stats and printed.
+    """
+
+    def __init__(
+        self,
+        cutoff_ply: int,
+        heuristic_func: Callable[[GameState], float],
+        tt: Optional[TranspositionTable] = None,
+        verbose: bool = False,
+        endgame_moves: Optional[int] = None,
+        quiescence: int = 0,
+        lmr: Optional[LateMoveReductions] = None,
+        probcut: Optional[ProbCut] = None,
+        batch_heuristic_func: Optional[Callable[[List[GameState]], List[float]]] = None,
+    ):
+        self.cutoff_ply = cutoff_ply
+        self.heuristic_func = heuristic_func
+        self.endgame_moves = endgame_moves
+        self.quiescence = quiescence
+        self.lmr = lmr
+        self.probcut = probcut
+        self.batch_heuristic_func = batch_heuristic_func
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.verbose = verbose
+        self.last_stats = None
+
+    def choose(self, asp):
+        decision = None
+        if self.verbose:
+            self.last_stats = SearchStats()
+        for depth in range(1, self.cutoff_ply + 1):
+            if self.verbose:
+                decision, stats = adversarialsearch.alpha_beta_cutoff(
+                    asp, depth, self.heuristic_func, tt=self.tt, return_stats=True,
+                    endgame_moves=self.endgame_moves, quiescence=self.quiescence,
+                    lmr=self.lmr, probcut=self.probcut, batch_heuristic_func=self.batch_heuristic_func,
+                )
+                self.last_stats.merge(stats)
+            else:
+                decision = adversarialsearch.alpha_beta_cutoff(
+                    asp, depth, self.heuristic_func, tt=self.tt,
+                    endgame_moves=self.endgame_moves, quiescence=self.quiescence,
+                    lmr=self.lmr, probcut=self.probcut, batch_heuristic_func=self.batch_heuristic_func,
+                )
+            if adversarialsearch.search_is_exact(asp, asp.get_start_state(), depth, self.endgame_moves):
+                break
+        if self.verbose:
+            print(self.last_stats.report())
+        return decision
+
+    def ponder(self, asp, state, stop):
+        if asp.is_terminal_state(state):
+            return
+        replies = list(asp.get_available_actions(state))
+        key, key_transform = table_key(asp, state, self.tt.canonical)
+        entry = self.tt.lookup(key)
+        expected = from_table_action(asp, entry[3], key_transform) if entry is not None else None
+        if expected in replies:
+            replies.remove(expected)
+            replies.insert(0, expected)
+        positions = [asp.transition(state, reply) for reply in replies]
+
+        interruptible = InterruptibleASP(asp, stop)
+        inf = float("inf")
+        try:
+            for depth in range(1, self.cutoff_ply + 1):
+                for position in positions:
+                    exact = adversarialsearch.search_is_exact(asp, position, depth, self.endgame_moves)
+                    adversarialsearch.simulate_alpha_beta_cutoff(
+                        interruptible, position, -inf, inf, depth, self.heuristic_func, tt=self.tt,
+                        endgame_moves=self.endgame_moves, quiescence=self.quiescence,
+                        lmr=None if exact else self.lmr, probcut=None if exact else self.probcut,
+                        batch_heuristic_func=self.batch_heuristic_func,
+                    )
+        except PonderInterrupted:
+            pass
+
+
+class MCTSBot(Bot):
+    """
+    Plays with an MCTS or ParallelMCTS engine, moving the engine's tree along
+    with the game so that the subtree under each move played is kept.
+
+    An MCTS engine ponders by growing its tree from the opponent's position;
+    the subtree under the reply actually played survives notify().
+    """
+
+    PONDER_ITERATIONS = 100
+
+    def __init__(
+        self,
+        engine,
+        iterations: Optional[int] = None,
+        time_limit_ms: Optional[float] = None,
+        verbose: bool = True,
+    ):
+        self.engine = engine
+        self.iterations = iterations
+        self.time_limit_ms = time_limit_ms
+        self.verbose = verbose
+
+    def choose(self, asp):
+        decision = self.engine.search(self.iterations, self.time_limit_ms)
+        if self.verbose:
+            print(
+                f"MCTS: {self.engine.playouts} playouts in {self.engine.elapsed:.2f}s "
+                f"({self.engine.playouts_per_second:.0f} playouts/s)"
+            )
+        return decision
+
+    def notify(self, action):
+        self.engine.advance(action)
+
+    def close(self):
+        """
+        Shuts down the engine's worker processes, if it has any.
+        """
+        if hasattr(self.engine, "close"):
+            self.engine.close()
+
+    def ponder(self, asp, state, stop):
+        if not isinstance(self.engine, MCTS) or asp.is_terminal_state(state):
+            return
+        playouts, elapsed = self.engine.playouts, self.engine.elapsed
+        while not stop.is_set():
+            self.engine.search(iterations=MCTSBot.PONDER_ITERATIONS)
+        # Keep reporting the metrics of the last real search
+        self.engine.playouts, self.engine.elapsed = playouts, elapsed
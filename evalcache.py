@@ -0,0 +1,128 @@
+import functools
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from transposition import table_key
+
+###############################################################################
+# A bounded cache of heuristic evaluations.
+#
+# heuristic_func is a pure function of (state, player_index), but a cutoff
+# search evaluates the same positions again on every iteration of iterative
+# deepening, and wherever move orders transpose. An EvaluationCache keeps the
+# most recently used evaluations, keyed on (asp.state_key(state),
+# player_index), and evicts the least recently used one when it is full.
+#
+# Games opt in by decorating their heuristic_func with @cached_evaluation (and
+# heuristic_batch with @cached_batch_evaluation) and setting
+# self.evaluation_cache (None disables caching). A cache created with
+# canonical=True keys positions on their symmetry class (see
+# transposition.table_key), so symmetric positions share one evaluation.
+#
+# A cache is shared by everything that uses its problem, including a bot
+# pondering on a background thread, so lookup and store hold a lock. Pickling
+# a cache (e.g. with its problem, to send it to a worker process) keeps only
+# its size: the copy starts out empty.
+###############################################################################
+
+
+class EvaluationCache:
+    DEFAULT_MAX_ENTRIES = 1 << 16
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, canonical: bool = False):
+        """
+        Input:
+                max_entries- the maximum number of evaluations to keep
+                canonical- if True, symmetric positions share one entry
+        """
+        self.max_entries = max_entries
+        self.canonical = canonical
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        return {"max_entries": self.max_entries, "canonical": self.canonical}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_entries"], state["canonical"])
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def lookup(self, key) -> Optional[float]:
+        """
+        Output- Returns the evaluation stored for key, or None.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def store(self, key, value: float):
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def cached_evaluation(heuristic_func):
+    """
+    Decorates an AdversarialSearchProblem's heuristic_func(self, state,
+    player_index) to go through self.evaluation_cache, if it is not None.
+    """
+
+    @functools.wraps(heuristic_func)
+    def cached(self, state, player_index):
+        cache = self.evaluation_cache
+        if cache is None:
+            return heuristic_func(self, state, player_index)
+        key = (table_key(self, state, cache.canonical)[0], player_index)
+        value = cache.lookup(key)
+        if value is None:
+            value = heuristic_func(self, state, player_index)
+            cache.store(key, value)
+        return value
+
+    return cached
+
+
+def cached_batch_evaluation(heuristic_batch):
+    """
+    Decorates an AdversarialSearchProblem's heuristic_batch(self, states,
+    player_index) to go through self.evaluation_cache, if it is not None.
+    Only the states missing from the cache are passed on, in one batch.
+    """
+
+    @functools.wraps(heuristic_batch)
+    def cached(self, states, player_index):
+        cache = self.evaluation_cache
+        if cache is None:
+            return heuristic_batch(self, states, player_index)
+        keys = [(table_key(self, state, cache.canonical)[0], player_index) for state in states]
+        values = [cache.lookup(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if missing:
+            computed = heuristic_batch(self, [states[index] for index in missing], player_index)
+            for index, value in zip(missing, computed):
+                values[index] = value
+                cache.store(keys[index], value)
+        return values
+
+    return cached
@@ -0,0 +1,83 @@
+import math
+
+###############################################################################
+# Forward pruning for alpha_beta_cutoff.
+#
+# Both techniques give up exactness for depth, on the assumption that the
+# move ordering (the transposition table's best move first) puts the moves
+# that matter early:
+#
+# - Late-move reductions search the moves after the first few at each node
+#   to a reduced depth, and search a move again at full depth only if the
+#   reduced search says it improves on the moves before it.
+# - ProbCut runs a shallow search at a node first, with a null window placed
+#   margin beyond the node's own window. If even the shallow search fails
+#   outside it, the full search is assumed to fail outside the node's window
+#   too, and the node is cut off.
+#
+# Neither is used at the root, in the forcing-move extension past the cutoff,
+# or once a search is solving an endgame exactly.
+###############################################################################
+
+
+class LateMoveReductions:
+    def __init__(self, min_depth: int = 3, full_moves: int = 3, reduction: int = 1):
+        """
+        Input:
+                min_depth- the smallest remaining cutoff at which moves are
+                reduced
+                full_moves- the number of moves searched first at each node
+                that are never reduced
+                reduction- the number of plies late moves are reduced by
+        """
+        self.min_depth = min_depth
+        self.full_moves = full_moves
+        self.reduction = reduction
+
+    def reduce(self, cutoff: int, move_number: int) -> int:
+        """
+        Output- Returns the number of plies to reduce the move_number-th move
+                (counting from 0) of a node with the given remaining cutoff by.
+        """
+        if cutoff < self.min_depth or move_number < self.full_moves:
+            return 0
+        return max(0, min(self.reduction, cutoff - 1))
+
+
+class ProbCut:
+    def __init__(self, margin: float, min_depth: int = 4, reduction: int = 2):
+        """
+        Input:
+                margin- how far beyond the node's window, in heuristic_func's
+                units, the shallow search must fail for the node to be cut
+                min_depth- the smallest remaining cutoff at which the shallow
+                search is tried
+                reduction- how many plies shallower than the node's cutoff
+                the shallow search is
+        """
+        self.margin = margin
+        self.min_depth = min_depth
+        self.reduction = reduction
+
+    def window(self, player: int, alpha: float, beta: float):
+        """
+        Output- Returns the null window (alpha, beta) of the shallow search at
+                a node where player moves, or None if the node's window is
+                unbounded on the side that would be cut.
+        """
+        if player == 0:
+            bound = beta + self.margin
+            if math.isinf(bound):
+                return None
+            return (math.nextafter(bound, -math.inf), bound)
+        bound = alpha - self.margin
+        if math.isinf(bound):
+            return None
+        return (bound, math.nextafter(bound, math.inf))
+
+    def cuts(self, player: int, value: float, window) -> bool:
+        """
+        Output- Returns whether the shallow search's value, searched with
+                window, cuts off a node where player moves.
+        """
+        return value >= window[1] if player == 0 else value <= window[0]
@@ -0,0 +1,118 @@
+from typing import Callable, Dict, Optional
+
+from adversarialsearchproblem import AdversarialSearchProblem, GameUI
+
+###############################################################################
+# A registry of the games that gamerunner.py and tournament.py can play.
+#
+# Each game is described by a GameSpec whose factories import the game's
+# modules only when called, so choosing one game never loads another game's
+# dependencies (e.g. a Tic-Tac-Toe run does not import pygame).
+#
+# Games outside this repository can register themselves with register_game(),
+# or through a package entry point in the "adversarialsearch.games" group that
+# refers to a GameSpec; entry points are only loaded when their game is chosen.
+###############################################################################
+
+ENTRY_POINT_GROUP = "adversarialsearch.games"
+
+
+class GameSpec:
+    def __init__(
+        self,
+        make_problem: Callable[[Optional[int]], AdversarialSearchProblem],
+        make_ui: Callable[[AdversarialSearchProblem], GameUI],
+        make_headless_ui: Optional[Callable[[AdversarialSearchProblem], GameUI]] = None,
+        min_dimension: Optional[int] = None,
+    ):
+        """
+        Inputs:
+                make_problem- builds the game's ASP, given a board dimension or
+                        None for the default board
+                make_ui- builds the game's interactive GameUI for an ASP
+                make_headless_ui- builds a GameUI that needs no display (defaults
+                        to make_ui)
+                min_dimension- the smallest supported board dimension
+        """
+        self.make_problem = make_problem
+        self.make_ui = make_ui
+        self.make_headless_ui = make_headless_ui or make_ui
+        self.min_dimension = min_dimension
+
+
+_games: Dict[str, GameSpec] = {}
+
+
+def register_game(name: str, spec: GameSpec):
+    _games[name] = spec
+
+
+def game_names():
+    """
+    Output- Returns the names of all registered games, including entry points
+            (without loading them).
+    """
+    from importlib.metadata import entry_points
+
+    names = set(_games)
+    names.update(ep.name for ep in entry_points(group=ENTRY_POINT_GROUP))
+    return sorted(names)
+
+
+def get_game(name: str) -> GameSpec:
+    if name not in _games:
+        # Importing importlib.metadata takes longer than starting a built-in game
+        from importlib.metadata import entry_points
+
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            if ep.name == name:
+                _games[name] = ep.load()
+                break
+        else:
+            raise KeyError(f"Unknown game: {name}")
+    return _games[name]
+
+
+def _make_ttt(dimension):
+    from asps.tttproblem import TTTProblem
+
+    return TTTProblem() if dimension is None else TTTProblem(dim=dimension)
+
+
+def _make_ttt_ui(asp):
+    from asps.tttproblem import TTTUI
+
+    return TTTUI(asp)
+
+
+def _make_ttt_headless_ui(asp):
+    from asps.tttproblem import TTTUI
+
+    return TTTUI(asp, delay=0)
+
+
+def _make_connect4(dimension):
+    from asps.connect4problem import Connect4Problem
+
+    if dimension is None:
+        return Connect4Problem()
+    return Connect4Problem(dims=(dimension, dimension))
+
+
+def _make_connect4_gui(asp):
+    from asps.connect4gui import Connect4GUI
+
+    return Connect4GUI(asp)
+
+
+def _make_connect4_null_ui(asp):
+    from asps.connect4problem import Connect4NullUI
+
+    return Connect4NullUI(asp)
+
+
+register_game("ttt", GameSpec(_make_ttt, _make_ttt_ui, _make_ttt_headless_ui, min_dimension=3))
+register_game(
+    "connect4",
+    GameSpec(_make_connect4, _make_connect4_gui, _make_connect4_null_ui, min_dimension=4),
+)
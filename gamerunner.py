@@ -3,8 +3,10 @@ import time
 
 from adversarialsearchproblem import AdversarialSearchProblem
 import adversarialsearch as MyImplementation
-from asps.tttproblem import TTTProblem, TTTUI
-from asps.connect4problem import Connect4Problem, Connect4GUI
+from bots import AlphaBetaCutoffBot, Bot, MCTSBot, Ponderer, choose_action
+from forwardpruning import LateMoveReductions, ProbCut
+import gameregistry
+from mcts import MCTS, HeuristicRollout, random_rollout
 
 
 def get_custom_asp(args):
@@ -30,16 +32,19 @@ def get_custom_asp(args):
 ########################################################
 
 
-def run_game(asp: AdversarialSearchProblem, bots, game_ui=None):
+def run_game(asp: AdversarialSearchProblem, bots, game_ui=None, ponder=False):
     """
     Inputs:
             - asp: a game to play, represented as an adversarial search problem
             - bots: a list in which the i'th element is adversarial search
                     algorithm that player i will use.
-                    The algorithm must take in an ASP only and output an action.
+                    The algorithm must take in an ASP only and output an action,
+                    or be a bots.Bot, which is also notified of every move.
             - game_ui (optional): a GameUI that visualizes ASPs and allows for
                     direct input in place of a bot that is None. If no argument is
                     passed, run_game() will not be interactive.
+            - ponder (optional): if True, each bots.Bot searches in the background
+                    (see Bot.ponder) while its opponent is choosing a move.
     Output:
             - the evaluation of the terminal state.
     """
@@ -53,12 +58,21 @@ def run_game(asp: AdversarialSearchProblem, bots, game_ui=None):
         game_ui.update_state(state)
         game_ui.render()
 
+    ponderers = []
     while not (asp.is_terminal_state(state)):
         curr_bot = bots[state.player_to_move()]
 
+        # Bots that are waiting for their opponent think on its time:
+        if ponder:
+            ponderers = [
+                Ponderer(bot, asp, state)
+                for bot in bots
+                if isinstance(bot, Bot) and bot is not curr_bot
+            ]
+
         # Obtain decision from the bot itself, or from GameUI if bot is None:
         if curr_bot:
-            decision = curr_bot(asp)
+            decision = choose_action(curr_bot, asp)
 
             # If the bot tries to make an invalid action,
             # returns any valid action:
@@ -68,10 +82,17 @@ def run_game(asp: AdversarialSearchProblem, bots, game_ui=None):
         else:
             decision = game_ui.get_user_input_action()
 
+        for ponderer in ponderers:
+            ponderer.stop()
+
         result_state = asp.transition(state, decision)
         asp.set_start_state(result_state)
         state = result_state
 
+        # Let stateful bots follow the game (once each, even if playing both sides)
+        for bot in {id(bot): bot for bot in bots if hasattr(bot, "notify")}.values():
+            bot.notify(decision)
+
         if game_ui:
             game_ui.update_state(state)
             game_ui.render()
@@ -79,69 +100,168 @@ def run_game(asp: AdversarialSearchProblem, bots, game_ui=None):
     return asp.evaluate_terminal(asp.get_start_state())
 
 
+def make_mcts_bot(asp: AdversarialSearchProblem, args):
+    """
+    Builds an MCTS bot using the budget, rollout policy and parallelism given
+    on the command line.
+    """
+    if args.rollout == "batched":
+        from asps.connect4batch import BatchedRollout
+
+        rollout_policy = BatchedRollout()
+    elif args.rollout == "heuristic":
+        rollout_policy = HeuristicRollout()
+    else:
+        rollout_policy = random_rollout
+    if args.workers > 1:
+        from parallelmcts import ParallelMCTS
+
+        engine = ParallelMCTS(asp, args.workers, rollout_policy, mode=args.parallel)
+    else:
+        engine = MCTS(asp, rollout_policy)
+    return MCTSBot(engine, args.iterations, args.time_limit)
+
+
+def with_stats_report(algorithm):
+    """
+    Wraps a search entry point (e.g. minimax) into a bot that prints the
+    SearchStats of every search it makes.
+    """
+
+    def bot(asp):
+        decision, stats = algorithm(asp, return_stats=True)
+        print(stats.report())
+        return decision
+
+    return bot
+
+
 def main():
     # Setup parser; Default behavior is Tic-Tac-Toe, minimax, player vs. bot.
     parser = argparse.ArgumentParser()
-    parser.add_argument("--game", choices=["ttt", "connect4", "custom"], default="ttt")
+    parser.add_argument(
+        "--game", default="ttt",
+        help="ttt, connect4, custom, or any game registered in gameregistry.py",
+    )
     parser.add_argument("--dimension", type=int, default=None)
     parser.add_argument(
-        "--player1", choices=["self", "minimax", "ab", "ab-cutoff"], default="self"
+        "--player1", choices=["self", "minimax", "ab", "ab-cutoff", "mcts"], default="self"
     )
     parser.add_argument(
-        "--player2", choices=["self", "minimax", "ab", "ab-cutoff"], default="minimax"
+        "--player2", choices=["self", "minimax", "ab", "ab-cutoff", "mcts"], default="minimax"
     )
     parser.add_argument("--cutoff", type=int, default=None)
+    parser.add_argument(
+        "--endgame", type=int, default=None,
+        help="let ab-cutoff players solve positions with at most this many moves left",
+    )
+    parser.add_argument(
+        "--quiescence", type=int, default=0,
+        help="plies of forcing moves ab-cutoff players search past the cutoff",
+    )
+    parser.add_argument(
+        "--lmr", action="store_true", help="let ab-cutoff players reduce late moves"
+    )
+    parser.add_argument(
+        "--probcut-margin", type=float, default=None,
+        help="let ab-cutoff players prune with ProbCut, with this margin",
+    )
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="let ab-cutoff players evaluate the children of a node at the cutoff in one batch",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=None, help="MCTS iterations per move"
+    )
+    parser.add_argument(
+        "--time-limit", type=float, default=None, help="MCTS time per move, in milliseconds"
+    )
+    parser.add_argument(
+        "--rollout", choices=["random", "heuristic", "batched"], default="random"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="MCTS worker processes"
+    )
+    parser.add_argument(
+        "--parallel", choices=["root", "tree"], default="root",
+        help="MCTS parallelization mode when --workers > 1",
+    )
+    parser.add_argument(
+        "--ponder", action="store_true",
+        help="let ab-cutoff and mcts players think on their opponent's time",
+    )
+    parser.add_argument(
+        "--headless", action="store_true",
+        help="use a UI that needs no display (and does not pause between moves)",
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="print search statistics after every minimax, ab and ab-cutoff move",
+    )
     args = parser.parse_args()
     player_args = [args.player1, args.player2]
 
+    if args.rollout == "batched" and args.game != "connect4":
+        parser.error("--rollout=batched is only available for Connect Four")
+
     # Ensure cutoff is present, if required:
     if "ab-cutoff" in player_args and args.cutoff is None:
         parser.error(
             "Cannot run ab-cutoff without a cutoff set! Use the argument --cutoff=<your cutoff>."
         )
 
+    ### Game: any registered game (see gameregistry.py)
+    if args.game != "custom":
+        try:
+            spec = gameregistry.get_game(args.game)
+        except KeyError:
+            parser.error(
+                f"--game must be one of: {', '.join(gameregistry.game_names() + ['custom'])}"
+            )
+        if args.dimension is not None and spec.min_dimension is not None:
+            if args.dimension < spec.min_dimension:
+                parser.error(
+                    f"--dimension must be at least {spec.min_dimension} for {args.game}"
+                )
+        game = spec.make_problem(args.dimension)
+        game_ui = spec.make_headless_ui(game) if args.headless else spec.make_ui(game)
+
+    ### Game: Custom
+    if args.game == "custom":
+        game, game_ui = get_custom_asp(args)
+
     # Assign players:
     players = [None, None]
     algorithm_dict = {
         "self": None,
         "minimax": MyImplementation.minimax,
         "ab": MyImplementation.alpha_beta,
-    }  # (if not in dict, player is ab-cutoff)
+    }  # (if not in dict, player is ab-cutoff or mcts)
     for i, player in enumerate(player_args):
-        players[i] = algorithm_dict.get(
-            player,
-            lambda asp, i=i: MyImplementation.alpha_beta_cutoff(
-                asp, args.cutoff, lambda s: asp.heuristic_func(s, i)
-            ),
-        )
-
-    ### Game: Tic-Tac-Toe
-    if args.game == "ttt":
-        if args.dimension is not None:
-            if args.dimension < 3:
-                parser.error("--dimension must be at least 3 for Tic-Tac-Toe")
-            game = TTTProblem(dim=args.dimension)
+        if player == "mcts":
+            players[i] = make_mcts_bot(game, args)
+        elif player == "ab-cutoff":
+            players[i] = AlphaBetaCutoffBot(
+                args.cutoff, lambda s, i=i: game.heuristic_func(s, i), verbose=args.stats,
+                endgame_moves=args.endgame, quiescence=args.quiescence,
+                lmr=LateMoveReductions() if args.lmr else None,
+                probcut=None if args.probcut_margin is None else ProbCut(args.probcut_margin),
+                batch_heuristic_func=(lambda states, i=i: game.heuristic_batch(states, i)) if args.batch else None,
+            )
+        elif args.stats and algorithm_dict[player] is not None:
+            players[i] = with_stats_report(algorithm_dict[player])
         else:
-            game = TTTProblem()
-        game_ui = TTTUI(game)
-
-    ### Game: Connect Four
-    if args.game == "connect4":
-        if args.dimension is not None:
-            if args.dimension < 4:
-                parser.error("--dimension must be at least 4 for Connect Four")
-            game = Connect4Problem(dims=(args.dimension, args.dimension))
-        else:
-            game = Connect4Problem()
-        game_ui = Connect4GUI(game)
-
-    ### Game: Custom
-    if args.game == "custom":
-        game, game_ui = get_custom_asp(args)
+            players[i] = algorithm_dict[player]
 
     ### Run the game and print the final scores:
     print(f"PLAYERS: {args.player1} (P1) vs. {args.player2} (P2)")
-    p1_score, p2_score = run_game(game, players, game_ui)
+    try:
+        p1_score, p2_score = run_game(game, players, game_ui, ponder=args.ponder)
+    finally:
+        # Shut down the worker pools of parallel MCTS players
+        for player in players:
+            if isinstance(player, MCTSBot):
+                player.close()
     print(f"P1 score: {p1_score}, P2 score: {p2_score}")
 
     # time.sleep(10) #(uncomment to keep GUI visible after end of game)
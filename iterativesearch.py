@@ -0,0 +1,321 @@
+from typing import Callable, List, Set, Tuple
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+)
+from forwardpruning import LateMoveReductions, ProbCut
+from searchstats import SearchStats
+from searchtrace import SearchTracer
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable, from_table_action, table_key, to_table_action
+
+###############################################################################
+# Non-recursive versions of the simulate functions in adversarialsearch.py.
+#
+# The search keeps its own stack of frames (one per ply, reused between
+# nodes) instead of recursing, so its depth is not limited by Python's
+# recursion limit. Each function takes the same arguments as its recursive
+# counterpart and returns the same result, with the same statistics and trace.
+# The entry points in adversarialsearch.py use them when called with
+# iterative=True.
+###############################################################################
+
+
+_INITIAL_FRAMES = 32
+_DONE = object()
+
+
+class _Frame:
+    __slots__ = (
+        "state",
+        "actions",
+        "action",
+        "alpha",
+        "beta",
+        "alpha_orig",
+        "beta_orig",
+        "cutoff",
+        "child_cutoff",
+        "child_quiescence",
+        "endgame",
+        "forward",
+        "move_number",
+        "reduction",
+        "child",
+        "batch",
+        "frontier",
+        "ply",
+        "key",
+        "key_transform",
+        "player",
+        "best_value",
+        "best_action",
+    )
+
+
+def _search(asp, state, alpha, beta, cutoff, heuristic_func, actions, tt, stats, trace, ply, prune, endgame=None, quiescence=0, lmr=None, probcut=None, batch_heuristic_func=None):
+    # The state to visit next is described by state, alpha, beta, cutoff,
+    # endgame, quiescence, forward, actions and ply. Visiting it either
+    # evaluates it at once (value, best_action) or opens a frame for it on the
+    # stack. forward is whether lmr and probcut apply below it.
+    is_terminal_state = asp.is_terminal_state
+    transition = asp.transition
+    frames = [_Frame() for _ in range(_INITIAL_FRAMES)]
+    top = -1
+    win = asp.win_threshold() if endgame is not None else None
+    stopped = False
+    forward = True
+    while True:
+        if stats is not None:
+            stats.visit(ply)
+        opened = False
+        terminal = is_terminal_state(state)
+        # Endgame switch: search the rest of the game to the end
+        if not terminal and endgame is not None and cutoff < endgame:
+            remaining = asp.moves_remaining(state)
+            if remaining is not None and remaining <= endgame:
+                cutoff = max(cutoff, remaining)
+                endgame = None
+                forward = False
+        # Quiescence: past the cutoff, only forcing moves are searched
+        forced = None
+        if not terminal and cutoff == 0 and quiescence > 0:
+            forced = asp.forcing_actions(state)
+        if terminal:
+            if stats is not None:
+                stats.leaves += 1
+            value, best_action = asp.evaluate_terminal(state)[0], None
+        elif cutoff == 0 and not forced:
+            if stats is not None:
+                stats.heuristic_calls += 1
+            value, best_action = heuristic_func(state), None
+        else:
+            if forced:
+                if stats is not None:
+                    stats.extensions += 1
+                actions = forced
+            if actions is None:
+                actions = asp.get_available_actions(state)
+            key, key_transform = None, 0
+            value = None
+            alpha_orig, beta_orig = alpha, beta
+            # Reuse or narrow the window with a stored result, and search its best action first
+            if tt is not None:
+                key, key_transform = table_key(asp, state, tt.canonical)
+                entry = tt.lookup(key)
+                if entry is not None:
+                    if stats is not None:
+                        stats.tt_hits += 1
+                    depth, tt_value, flag, tt_action = entry
+                    tt_action = from_table_action(asp, tt_action, key_transform)
+                    if depth >= cutoff:
+                        if flag == EXACT:
+                            value, best_action = tt_value, tt_action
+                        else:
+                            if flag == LOWER_BOUND:
+                                alpha = max(alpha, tt_value)
+                            else:
+                                beta = min(beta, tt_value)
+                            if alpha >= beta:
+                                value, best_action = tt_value, tt_action
+                    if value is None and tt_action in actions:
+                        actions = [tt_action] + [action for action in actions if action != tt_action]
+            # Mate-distance pruning: no line from here ends outside value_bounds
+            if value is None and prune:
+                lower, upper = asp.value_bounds(state)
+                if upper <= alpha or lower >= beta:
+                    if stats is not None:
+                        stats.cutoff(ply)
+                    value, best_action = (upper if upper <= alpha else lower), None
+                else:
+                    alpha, beta = max(alpha, lower), min(beta, upper)
+            # ProbCut: a shallow search failing far outside the window
+            # predicts that this search fails outside it too
+            if value is None and forward and probcut is not None and ply > 0 and cutoff >= probcut.min_depth:
+                player = state.player_to_move()
+                window = probcut.window(player, alpha, beta)
+                if window is not None:
+                    shallow = _search(
+                        asp, state, window[0], window[1], cutoff - probcut.reduction, heuristic_func,
+                        actions, tt, stats, None, ply, prune, endgame, quiescence, lmr, probcut,
+                        batch_heuristic_func,
+                    )[0]
+                    if probcut.cuts(player, shallow, window):
+                        if stats is not None:
+                            stats.probcuts += 1
+                        value, best_action = shallow, None
+            if value is None:
+                top += 1
+                if top == len(frames):
+                    frames.append(_Frame())
+                frame = frames[top]
+                frame.state = state
+                frame.actions = iter(actions)
+                frame.alpha, frame.beta = alpha, beta
+                frame.alpha_orig, frame.beta_orig = alpha_orig, beta_orig
+                frame.cutoff = cutoff
+                if cutoff == 0:
+                    frame.child_cutoff, frame.child_quiescence = 0, quiescence - 1
+                else:
+                    frame.child_cutoff, frame.child_quiescence = cutoff - 1, quiescence
+                frame.endgame = endgame
+                frame.forward = forward
+                frame.move_number = -1
+                frame.reduction = 0
+                frame.ply = ply
+                frame.key, frame.key_transform = key, key_transform
+                frame.player = state.player_to_move()
+                frame.best_value = float('-inf') if frame.player == 0 else float('inf')
+                frame.best_action = None
+                # Frontier: every child is a leaf. The first child often
+                # cuts the node off on its own, so the rest are evaluated in
+                # one batch once it has not.
+                frame.batch = frame.frontier = None
+                if (
+                    batch_heuristic_func is not None
+                    and frame.child_cutoff == 0
+                    and frame.child_quiescence == 0
+                    and endgame is None
+                ):
+                    frame.batch = list(actions)
+                    frame.actions = iter(frame.batch)
+                opened = True
+
+        # Hand finished values to their parents until a frame has another
+        # child to visit, or the root is finished
+        while True:
+            if top < 0:
+                return (value, best_action)
+            frame = frames[top]
+            finished = False
+            if opened:
+                opened = False
+            else:
+                child_score = value
+                if frame.reduction:
+                    frame.reduction = 0
+                    if stats is not None:
+                        stats.reductions += 1
+                    # A reduced move that would raise the bound is searched again in full
+                    if child_score > frame.alpha if frame.player == 0 else child_score < frame.beta:
+                        if stats is not None:
+                            stats.researches += 1
+                        # The reduced search and the full one are traced as two nodes
+                        if trace is not None:
+                            trace.exit(child_score, False)
+                            trace.enter(frame.ply + 1, frame.action, frame.alpha, frame.beta)
+                        state = frame.child
+                        alpha, beta = frame.alpha, frame.beta
+                        cutoff, quiescence = frame.child_cutoff, frame.child_quiescence
+                        endgame, forward = frame.endgame, frame.forward
+                        actions = None
+                        ply = frame.ply + 1
+                        break
+                if trace is not None:
+                    trace.exit(
+                        child_score,
+                        child_score >= frame.beta if frame.player == 0 else child_score <= frame.alpha,
+                    )
+                if stats is not None and frame.ply == 0:
+                    stats.root_scores.append((frame.action, child_score))
+                if win is not None and frame.ply == 0 and (
+                    child_score >= win if frame.player == 0 else child_score <= -win
+                ):
+                    # Stop at the first proven win at the root
+                    frame.best_value, frame.best_action = child_score, frame.action
+                    stopped = True
+                elif frame.player == 0:
+                    if frame.best_value < child_score:
+                        frame.best_value, frame.best_action = child_score, frame.action
+                    if prune:
+                        if frame.best_value >= frame.beta:
+                            finished = True
+                        else:
+                            frame.alpha = max(frame.alpha, frame.best_value)
+                else:
+                    if frame.best_value > child_score:
+                        frame.best_value, frame.best_action = child_score, frame.action
+                    if prune:
+                        if frame.best_value <= frame.alpha:
+                            finished = True
+                        else:
+                            frame.beta = min(frame.beta, frame.best_value)
+                if finished and stats is not None:
+                    stats.cutoff(frame.ply)
+
+            if not finished and not stopped:
+                action = next(frame.actions, _DONE)
+                if action is not _DONE:
+                    frame.action = action
+                    frame.move_number += 1
+                    if frame.batch is not None and frame.move_number == 1:
+                        children = [transition(frame.state, later) for later in frame.batch[1:]]
+                        ends = [is_terminal_state(child) for child in children]
+                        leaves = [child for child, is_terminal in zip(children, ends) if not is_terminal]
+                        values = iter(batch_heuristic_func(leaves) if leaves else ())
+                        frame.frontier = [
+                            (asp.evaluate_terminal(child)[0], True) if is_terminal else (next(values), False)
+                            for child, is_terminal in zip(children, ends)
+                        ]
+                        if stats is not None:
+                            stats.heuristic_calls += len(leaves)
+                    if frame.frontier is not None:
+                        if trace is not None:
+                            trace.enter(frame.ply + 1, action, frame.alpha, frame.beta)
+                        value, is_terminal = frame.frontier[frame.move_number - 1]
+                        if stats is not None:
+                            stats.visit(frame.ply + 1)
+                            if is_terminal:
+                                stats.leaves += 1
+                        continue
+                    state = transition(frame.state, action)
+                    if trace is not None:
+                        trace.enter(frame.ply + 1, action, frame.alpha, frame.beta)
+                    alpha, beta = frame.alpha, frame.beta
+                    cutoff, quiescence = frame.child_cutoff, frame.child_quiescence
+                    endgame, forward = frame.endgame, frame.forward
+                    if forward and lmr is not None and frame.ply > 0:
+                        frame.reduction = lmr.reduce(frame.cutoff, frame.move_number)
+                        if frame.reduction:
+                            frame.child = state
+                            cutoff -= frame.reduction
+                    actions = None
+                    ply = frame.ply + 1
+                    break
+
+            value, best_action = frame.best_value, frame.best_action
+            if tt is not None:
+                if stopped:
+                    # The actions after the win were not searched
+                    flag = LOWER_BOUND if frame.player == 0 else UPPER_BOUND
+                elif value <= frame.alpha_orig:
+                    flag = UPPER_BOUND
+                elif value >= frame.beta_orig:
+                    flag = LOWER_BOUND
+                else:
+                    flag = EXACT
+                tt.store(frame.key, frame.cutoff, value, flag, to_table_action(asp, best_action, frame.key_transform))
+            frame.state = frame.actions = frame.child = frame.batch = frame.frontier = None
+            top -= 1
+
+
+def simulate_state_iterative(asp: AdversarialSearchProblem[GameState, Action], state: GameState, actions: Set[Action] = None, stats: SearchStats = None, ply: int = 0) -> Tuple[float, Action]:
+    """
+    Non-recursive simulate_state: returns the minimax (value, action) of state.
+    """
+    return _search(asp, state, float('-inf'), float('inf'), float('inf'), None, actions, None, stats, None, ply, False)
+
+
+def simulate_alpha_beta_iterative(asp: AdversarialSearchProblem[GameState, Action], state: GameState, alpha: float, beta: float, actions: Set[Action] = None, stats: SearchStats = None, ply: int = 0, trace: SearchTracer = None) -> Tuple[float, Action]:
+    """
+    Non-recursive simulate_alpha_beta.
+    """
+    return _search(asp, state, alpha, beta, float('inf'), None, actions, None, stats, trace, ply, True)
+
+
+def simulate_alpha_beta_cutoff_iterative(asp: AdversarialSearchProblem[GameState, Action], state: GameState, alpha: float, beta: float, cutoff: int, heuristic_func: Callable[[GameState], float], actions: Set[Action] = None, tt: TranspositionTable = None, stats: SearchStats = None, ply: int = 0, trace: SearchTracer = None, endgame_moves: int = None, quiescence: int = 0, lmr: LateMoveReductions = None, probcut: ProbCut = None, batch_heuristic_func: Callable[[List[GameState]], List[float]] = None) -> Tuple[float, Action]:
+    """
+    Non-recursive simulate_alpha_beta_cutoff.
+    """
+    return _search(asp, state, alpha, beta, cutoff, heuristic_func, actions, tt, stats, trace, ply, True, endgame_moves, quiescence, lmr, probcut, batch_heuristic_func)
@@ -0,0 +1,250 @@
+import math
+import random
+import time
+from typing import Callable, Optional, Tuple
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+)
+
+###############################################################################
+# Monte Carlo Tree Search (UCT) for any AdversarialSearchProblem.
+#
+# Rather than evaluating states with a heuristic at a fixed depth, MCTS grows a
+# search tree one node per iteration and scores new nodes by playing the game
+# out to the end (a "rollout"). Terminal states are scored as a win (1), draw
+# (0.5) or loss (0) by comparing the two players' values from
+# evaluate_terminal, so any 2-player ASP can be searched.
+#
+# A rollout policy is a function (asp, state, rng) -> float that plays out the
+# game from state and returns player 0's reward in [0, 1]. A policy that plays
+# several playouts per call and returns their mean reward (e.g.
+# asps/connect4batch.BatchedRollout) has a batch_size attribute, and each of
+# its rollouts counts as batch_size playouts.
+###############################################################################
+
+
+def terminal_rewards(asp: AdversarialSearchProblem[GameState, Action], state: GameState) -> Tuple[float, float]:
+    """
+    Converts the evaluation of a terminal state into a (win/draw/loss) reward
+    per player: 1 for the player with the higher value, 0 for the other, and
+    0.5 each when the values are equal.
+    """
+    values = asp.evaluate_terminal(state)
+    if values[0] > values[1]:
+        return (1.0, 0.0)
+    if values[0] < values[1]:
+        return (0.0, 1.0)
+    return (0.5, 0.5)
+
+
+def random_rollout(asp: AdversarialSearchProblem[GameState, Action], state: GameState, rng: random.Random) -> float:
+    """
+    Plays uniformly random moves until the game ends.
+    """
+    while not asp.is_terminal_state(state):
+        action = rng.choice(tuple(asp.get_available_actions(state)))
+        state = asp.transition(state, action)
+    return terminal_rewards(asp, state)[0]
+
+
+class HeuristicRollout:
+    """
+    A rollout policy that plays the move whose resulting state the mover's
+    heuristic_func rates best, or a random move with probability epsilon.
+    Immediate wins are always taken; other game-ending moves are played only
+    when nothing else is available.
+    """
+
+    def __init__(self, epsilon: float = 0.1):
+        self.epsilon = epsilon
+
+    def __call__(self, asp, state, rng):
+        while not asp.is_terminal_state(state):
+            actions = tuple(asp.get_available_actions(state))
+            if rng.random() < self.epsilon:
+                state = asp.transition(state, rng.choice(actions))
+                continue
+
+            player = state.player_to_move()
+            best_score, best_state = float("-inf"), None
+            for action in actions:
+                child = asp.transition(state, action)
+                if asp.is_terminal_state(child):
+                    if terminal_rewards(asp, child)[player] == 1:
+                        best_state = child
+                        break
+                    score = float("-inf")
+                else:
+                    score = asp.heuristic_func(child, player)
+                if best_state is None or score > best_score:
+                    best_score, best_state = score, child
+            state = best_state
+        return terminal_rewards(asp, state)[0]
+
+
+class MCTSNode:
+    __slots__ = ("state", "parent", "action", "children", "untried", "visits", "reward")
+
+    def __init__(self, asp, state, parent=None, action=None):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.children = {}
+        # Actions not yet expanded into children
+        if asp.is_terminal_state(state):
+            self.untried = []
+        else:
+            self.untried = list(asp.get_available_actions(state))
+        self.visits = 0
+        # Total reward for the player who moved into this node
+        self.reward = 0.0
+
+    def uct_child(self, exploration: float) -> "MCTSNode":
+        log_visits = math.log(self.visits)
+        return max(
+            self.children.values(),
+            key=lambda child: child.reward / child.visits
+            + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTS:
+    """
+    A UCT search engine over an AdversarialSearchProblem. The tree is rooted at
+    asp.get_start_state() and is rebuilt if the start state changes, unless
+    advance() has moved the root along with the game.
+
+    After each call to search(), playouts, elapsed and playouts_per_second
+    describe the work done by that call.
+    """
+
+    DEFAULT_ITERATIONS = 1000
+
+    def __init__(
+        self,
+        asp: AdversarialSearchProblem[GameState, Action],
+        rollout_policy: Callable[[AdversarialSearchProblem, GameState, random.Random], float] = random_rollout,
+        exploration: float = math.sqrt(2),
+        seed: Optional[int] = None,
+    ):
+        self._asp = asp
+        self.rollout_policy = rollout_policy
+        self.exploration = exploration
+        self._rng = random.Random(seed)
+        self.root = None
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def _sync_root(self):
+        state = self._asp.get_start_state()
+        if self.root is None or self._asp.state_key(self.root.state) != self._asp.state_key(state):
+            self.root = MCTSNode(self._asp, state)
+
+    def advance(self, action: Action):
+        """
+        Re-roots the tree at the child reached by the given action, keeping the
+        statistics gathered below it for the next search.
+        """
+        child = self.root.children.get(action) if self.root is not None else None
+        if child is not None:
+            child.parent = None
+        self.root = child
+
+    def search(self, iterations: Optional[int] = None, time_limit_ms: Optional[float] = None) -> Action:
+        """
+        Runs MCTS iterations from the start state of the asp until the budget
+        is spent, then returns the most visited action at the root.
+
+        Input:
+            iterations - the maximum number of iterations to run
+            time_limit_ms - the maximum wall-clock time to search, in milliseconds
+            If neither is given, DEFAULT_ITERATIONS iterations are run.
+        Output:
+            an action (an element of asp.get_available_actions(asp.get_start_state()))
+        """
+        if iterations is None and time_limit_ms is None:
+            iterations = MCTS.DEFAULT_ITERATIONS
+        self._sync_root()
+
+        start = time.perf_counter()
+        deadline = None if time_limit_ms is None else start + time_limit_ms / 1000
+        self.playouts = 0
+        done = 0
+        while iterations is None or done < iterations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate()
+            done += 1
+        self.elapsed = time.perf_counter() - start
+
+        return self.best_action()
+
+    def best_action(self) -> Action:
+        if not self.root.children:
+            return None
+        return max(self.root.children.values(), key=lambda child: child.visits).action
+
+    def _iterate(self):
+        asp = self._asp
+        node = self.root
+
+        # Selection
+        while not node.untried and node.children:
+            node = node.uct_child(self.exploration)
+
+        # Expansion
+        if node.untried:
+            action = node.untried.pop(self._rng.randrange(len(node.untried)))
+            child = MCTSNode(asp, asp.transition(node.state, action), node, action)
+            node.children[action] = child
+            node = child
+
+        # Simulation
+        if asp.is_terminal_state(node.state):
+            reward = terminal_rewards(asp, node.state)[0]
+            self.playouts += 1
+        else:
+            reward = self.rollout_policy(asp, node.state, self._rng)
+            self.playouts += getattr(self.rollout_policy, "batch_size", 1)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if node.parent is not None:
+                mover = node.parent.state.player_to_move()
+                node.reward += reward if mover == 0 else 1 - reward
+            node = node.parent
+
+
+def mcts(
+    asp: AdversarialSearchProblem[GameState, Action],
+    iterations: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    rollout_policy: Callable[[AdversarialSearchProblem, GameState, random.Random], float] = random_rollout,
+    exploration: float = math.sqrt(2),
+    seed: Optional[int] = None,
+) -> Action:
+    """
+    Chooses an action from the start state of the asp with Monte Carlo Tree
+    Search (see MCTS).
+
+    Input:
+        asp - an AdversarialSearchProblem
+        iterations - the maximum number of iterations to run
+        time_limit_ms - the maximum wall-clock time to search, in milliseconds
+        rollout_policy - the policy used to play out new nodes, such as
+            random_rollout or HeuristicRollout()
+        exploration - the UCT exploration constant
+        seed - seed for the random number generator
+    Output:
+        an action (an element of asp.get_available_actions(asp.get_start_state()))
+    """
+    engine = MCTS(asp, rollout_policy, exploration, seed)
+    return engine.search(iterations, time_limit_ms)
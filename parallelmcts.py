@@ -0,0 +1,359 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+)
+from mcts import MCTS, random_rollout, terminal_rewards
+
+###############################################################################
+# Parallel Monte Carlo Tree Search across a process pool.
+#
+# - "root" mode runs an independent MCTS tree in every worker and sums the
+#   visit counts of the root children before picking the most visited action.
+#
+# - "tree" mode has all workers grow one shared tree, stored as flat arrays in
+#   shared memory (the node arena). A worker that descends through a node adds
+#   a virtual loss to it until its playout is backed up, steering the other
+#   workers onto different lines.
+#
+# In tree mode, a node's children are laid out contiguously in the arena in
+# the order of sorted(asp.get_available_actions(state)), so every worker can
+# rebuild a node's state by replaying actions from the root. Actions must
+# therefore be sortable.
+#
+# Only tree mode keeps its tree between moves: advance() moves the subtree
+# under the move played to the front of the arena. Root-mode trees live in
+# the workers' tasks and are rebuilt for every search.
+###############################################################################
+
+
+class ParallelMCTS:
+    """
+    An MCTS engine that spreads its iterations over a pool of worker processes.
+    It has the same search() interface and playout metrics as mcts.MCTS.
+    The asp and rollout policy must be picklable.
+
+    Input:
+        asp - an AdversarialSearchProblem
+        workers - the number of worker processes (defaults to the CPU count)
+        mode - "root" or "tree" (see above)
+        arena_size - the maximum number of tree nodes in "tree" mode
+    """
+
+    def __init__(
+        self,
+        asp: AdversarialSearchProblem[GameState, Action],
+        workers: Optional[int] = None,
+        rollout_policy: Callable[[AdversarialSearchProblem, GameState, random.Random], float] = random_rollout,
+        exploration: float = math.sqrt(2),
+        seed: Optional[int] = None,
+        mode: str = "root",
+        arena_size: int = 1 << 20,
+    ):
+        if mode not in ("root", "tree"):
+            raise ValueError("mode must be 'root' or 'tree'")
+        self._asp = asp
+        self.workers = workers or os.cpu_count() or 1
+        self.rollout_policy = rollout_policy
+        self.exploration = exploration
+        self.mode = mode
+        self._arena_size = arena_size
+        self._rng = random.Random(seed)
+        self._pool = None
+        self._root_state = None  # the state at node 0 of the arena, in tree mode
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "tree":
+                self._arena = _NodeArena.allocate(self._arena_size)
+                self._pool = multiprocessing.Pool(
+                    self.workers,
+                    initializer=_init_tree_worker,
+                    initargs=(self._arena.buffers, self._asp, self.rollout_policy, self.exploration),
+                )
+            else:
+                self._pool = multiprocessing.Pool(self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def advance(self, action: Action):
+        """
+        In tree mode, re-roots the arena at the child reached by the given
+        action, keeping the statistics gathered below it for the next search.
+        Does nothing in root mode, whose trees are rebuilt for every search.
+        """
+        if self.mode != "tree" or self._root_state is None:
+            return
+        arena, state = self._arena, self._root_state
+        self._root_state = None
+        if arena.first_child[0] < 0 or action not in self._asp.get_available_actions(state):
+            return
+        index = sorted(self._asp.get_available_actions(state)).index(action)
+        arena.reroot(arena.first_child[0] + index)
+        self._root_state = self._asp.transition(state, action)
+
+    def search(self, iterations: Optional[int] = None, time_limit_ms: Optional[float] = None) -> Action:
+        """
+        Runs MCTS on all workers until the budget is spent and returns the most
+        visited action at the root. The iteration budget is split between the
+        workers; the time budget applies to each of them.
+        """
+        if iterations is None and time_limit_ms is None:
+            iterations = MCTS.DEFAULT_ITERATIONS
+        pool = self._get_pool()
+        state = self._asp.get_start_state()
+
+        shares = [None] * self.workers
+        if iterations is not None:
+            shares = [
+                iterations // self.workers + (i < iterations % self.workers)
+                for i in range(self.workers)
+            ]
+        seeds = [self._rng.getrandbits(32) for _ in range(self.workers)]
+
+        start = time.perf_counter()
+        if self.mode == "tree":
+            asp = self._asp
+            if self._root_state is None or asp.state_key(self._root_state) != asp.state_key(state):
+                self._arena.reset()
+                self._root_state = state
+            results = pool.starmap(
+                _tree_worker, [(state, n, time_limit_ms, s) for n, s in zip(shares, seeds)]
+            )
+        else:
+            results = pool.starmap(
+                _root_worker,
+                [
+                    (self._asp, state, n, time_limit_ms, self.rollout_policy, self.exploration, s)
+                    for n, s in zip(shares, seeds)
+                ],
+            )
+        self.elapsed = time.perf_counter() - start
+        self.playouts = sum(playouts for playouts, _ in results)
+
+        if self.mode == "tree":
+            return self._arena.best_action(self._asp, state)
+        visits = {}
+        for _, root_visits in results:
+            for action, count in root_visits.items():
+                visits[action] = visits.get(action, 0) + count
+        if not visits:
+            return None
+        return max(visits, key=visits.get)
+
+
+def parallel_mcts(
+    asp: AdversarialSearchProblem[GameState, Action],
+    iterations: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    workers: Optional[int] = None,
+    mode: str = "root",
+    rollout_policy: Callable[[AdversarialSearchProblem, GameState, random.Random], float] = random_rollout,
+    seed: Optional[int] = None,
+) -> Action:
+    """
+    Chooses an action from the start state of the asp with parallel MCTS
+    (see ParallelMCTS). The worker pool lasts for this call only.
+    """
+    with ParallelMCTS(asp, workers, rollout_policy, seed=seed, mode=mode) as engine:
+        return engine.search(iterations, time_limit_ms)
+
+
+def _root_worker(asp, state, iterations, time_limit_ms, rollout_policy, exploration, seed):
+    asp.set_start_state(state)
+    engine = MCTS(asp, rollout_policy, exploration, seed)
+    engine.search(iterations, time_limit_ms)
+    root_visits = {action: child.visits for action, child in engine.root.children.items()}
+    return engine.playouts, root_visits
+
+
+class _NodeArena:
+    """
+    A tree stored as flat arrays in shared memory. Node 0 is the root.
+    first_child is -1 until a node is expanded; its children then occupy
+    first_child .. first_child + num_children - 1.
+    """
+
+    FIELDS = [
+        ("visits", "d", np.float64),
+        ("reward", "d", np.float64),
+        ("virtual_loss", "i", np.int32),
+        ("first_child", "i", np.int32),
+        ("num_children", "i", np.int32),
+    ]
+
+    def __init__(self, buffers):
+        self.buffers = buffers
+        self.lock, self.size, arrays = buffers
+        for (name, _, dtype), array in zip(_NodeArena.FIELDS, arrays):
+            setattr(self, name, np.frombuffer(array, dtype=dtype))
+
+    @staticmethod
+    def allocate(capacity):
+        arrays = [multiprocessing.RawArray(code, capacity) for _, code, _ in _NodeArena.FIELDS]
+        buffers = (multiprocessing.Lock(), multiprocessing.RawValue("i", 1), arrays)
+        return _NodeArena(buffers)
+
+    def reset(self):
+        self.size.value = 1
+        self.visits[0] = self.reward[0] = 0
+        self.virtual_loss[0] = 0
+        self.first_child[0] = -1
+        self.num_children[0] = 0
+
+    def reroot(self, node):
+        """
+        Moves the subtree below node to the front of the arena, with node as
+        the new root, and drops every other node. Must not be called while
+        workers are searching.
+        """
+        size = self.size.value
+        first_child = self.first_child[:size].copy()
+        num_children = self.num_children[:size].copy()
+        # Lay the subtree out breadth first, so each node's children stay
+        # contiguous; order[i] is the old index of new node i
+        order = [node]
+        new_first_child = []
+        for old in order:
+            if first_child[old] < 0:
+                new_first_child.append(-1)
+            else:
+                new_first_child.append(len(order))
+                order.extend(range(first_child[old], first_child[old] + num_children[old]))
+        order = np.array(order)
+        kept = slice(0, len(order))
+        self.visits[kept] = self.visits[order]
+        self.reward[kept] = self.reward[order]
+        self.num_children[kept] = num_children[order]
+        self.first_child[kept] = new_first_child
+        self.virtual_loss[kept] = 0
+        self.size.value = len(order)
+
+    def expand(self, node, num_children):
+        """
+        Allocates children for a node. Must be called with the lock held.
+        Returns False if the arena is full.
+        """
+        base = self.size.value
+        if base + num_children > len(self.visits):
+            return False
+        children = slice(base, base + num_children)
+        self.visits[children] = self.reward[children] = 0
+        self.virtual_loss[children] = 0
+        self.first_child[children] = -1
+        self.num_children[children] = 0
+        self.size.value = base + num_children
+        self.num_children[node] = num_children
+        self.first_child[node] = base
+        return True
+
+    def select_child(self, node, exploration, rng):
+        first = self.first_child[node]
+        children = slice(first, first + self.num_children[node])
+        # Virtual losses count as visits that earned no reward
+        visits = self.visits[children] + self.virtual_loss[children]
+        unvisited = np.flatnonzero(visits == 0)
+        if len(unvisited):
+            return int(rng.choice(unvisited))
+        log_visits = math.log(self.visits[node] + self.virtual_loss[node])
+        scores = self.reward[children] / visits + exploration * np.sqrt(log_visits / visits)
+        return int(scores.argmax())
+
+    def best_action(self, asp, state):
+        if self.first_child[0] < 0:
+            return None
+        first = self.first_child[0]
+        visits = self.visits[first : first + self.num_children[0]]
+        return sorted(asp.get_available_actions(state))[int(visits.argmax())]
+
+
+# Worker-process globals for tree mode, set by _init_tree_worker
+_arena = None
+_worker_config = None
+
+
+def _init_tree_worker(buffers, asp, rollout_policy, exploration):
+    global _arena, _worker_config
+    _arena = _NodeArena(buffers)
+    _worker_config = (asp, rollout_policy, exploration)
+
+
+def _tree_worker(state, iterations, time_limit_ms, seed):
+    asp, rollout_policy, exploration = _worker_config
+    arena = _arena
+    rng = random.Random(seed)
+    deadline = None if time_limit_ms is None else time.perf_counter() + time_limit_ms / 1000
+
+    playouts = 0
+    done = 0
+    while iterations is None or done < iterations:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        done += 1
+
+        # Selection, adding a virtual loss to every node on the path
+        node, node_state = 0, state
+        path = [(0, None)]
+        with arena.lock:
+            arena.virtual_loss[0] += 1
+        while not asp.is_terminal_state(node_state):
+            if arena.first_child[node] < 0:
+                # Expand leaves that have been played out before (and the root)
+                if node != 0 and arena.visits[node] == 0:
+                    break
+                actions = sorted(asp.get_available_actions(node_state))
+                with arena.lock:
+                    if arena.first_child[node] < 0 and not arena.expand(node, len(actions)):
+                        break
+            else:
+                actions = sorted(asp.get_available_actions(node_state))
+            with arena.lock:
+                index = arena.select_child(node, exploration, rng)
+                child = arena.first_child[node] + index
+                arena.virtual_loss[child] += 1
+            path.append((child, node_state.player_to_move()))
+            node, node_state = child, asp.transition(node_state, actions[index])
+
+        # Simulation
+        if asp.is_terminal_state(node_state):
+            reward = terminal_rewards(asp, node_state)[0]
+            playouts += 1
+        else:
+            reward = rollout_policy(asp, node_state, rng)
+            playouts += getattr(rollout_policy, "batch_size", 1)
+
+        # Backpropagation, removing the virtual losses
+        with arena.lock:
+            for node, mover in path:
+                arena.visits[node] += 1
+                arena.virtual_loss[node] -= 1
+                if mover is not None:
+                    arena.reward[node] += reward if mover == 0 else 1 - reward
+
+    return playouts, None
@@ -0,0 +1,123 @@
+import argparse
+import time
+
+from adversarialsearchproblem import AdversarialSearchProblem
+import gameregistry
+
+###############################################################################
+# Perft: counts the states reachable from a state in exactly a given number of
+# plies, by exhaustively calling get_available_actions, transition and
+# is_terminal_state. Terminal states end their line, so they are only counted
+# at the depth where they occur.
+#
+# The counts make a regression oracle for any change to a game's state
+# representation (they must not change), and the time taken measures the raw
+# speed of the game's move generation, with no search or evaluation on top.
+#
+# Run e.g. `python perft.py --game connect4 --depth 6` to check and time a game
+# against its reference counts.
+###############################################################################
+
+
+# REFERENCE_COUNTS[(game, dimension)][d] is the perft count at depth d from the
+# start state of the default game with that dimension.
+REFERENCE_COUNTS = {
+    ("ttt", None): [1, 9, 72, 504, 3024, 15120, 54720, 148176, 200448, 127872],
+    ("connect4", None): [1, 7, 49, 343, 2401, 16807, 117649, 823536],
+}
+
+
+class PerftResult:
+    def __init__(self, depth, leaves, nodes, elapsed):
+        self.depth = depth
+        self.leaves = leaves  # states exactly depth plies from the root
+        self.nodes = nodes  # states generated, including the root
+        self.elapsed = elapsed  # seconds
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (
+            f"depth {self.depth}: {self.leaves} leaves, {self.nodes} nodes "
+            f"in {self.elapsed:.3f}s ({self.nodes_per_second:.0f} nodes/s)"
+        )
+
+
+def _perft(asp, state, depth, counts):
+    counts[0] += 1
+    if depth == 0:
+        return 1
+    if asp.is_terminal_state(state):
+        return 0
+    leaves = 0
+    for action in asp.get_available_actions(state):
+        leaves += _perft(asp, asp.transition(state, action), depth - 1, counts)
+    return leaves
+
+
+def perft(asp: AdversarialSearchProblem, depth: int, state=None) -> PerftResult:
+    """
+    Input:
+            asp- an AdversarialSearchProblem
+            depth- the number of plies to expand
+            state- the state to count from (defaults to the start state)
+    Output:
+            A PerftResult with the number of states exactly depth plies from
+            state, the number of states generated on the way, and the time
+            taken.
+    """
+    if state is None:
+        state = asp.get_start_state()
+    counts = [0]
+    start = time.perf_counter()
+    leaves = _perft(asp, state, depth, counts)
+    return PerftResult(depth, leaves, counts[0], time.perf_counter() - start)
+
+
+def perft_divide(asp: AdversarialSearchProblem, depth: int, state=None):
+    """
+    Returns a dict mapping each action available from state to the perft
+    count of depth - 1 below it, for locating a count that went wrong.
+    """
+    if state is None:
+        state = asp.get_start_state()
+    return {
+        action: perft(asp, depth - 1, asp.transition(state, action)).leaves
+        for action in asp.get_available_actions(state)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--game", choices=gameregistry.game_names(), default="ttt")
+    parser.add_argument("--dimension", type=int, default=None)
+    parser.add_argument("--depth", type=int, default=None, help="defaults to every reference depth")
+    parser.add_argument("--divide", action="store_true", help="print the count below each root move")
+    args = parser.parse_args()
+
+    asp = gameregistry.get_game(args.game).make_problem(args.dimension)
+    reference = REFERENCE_COUNTS.get((args.game, args.dimension), [])
+    if args.depth is None and not reference:
+        parser.error("no reference counts for this game; pass --depth")
+    depths = [args.depth] if args.depth is not None else range(1, len(reference))
+
+    failed = False
+    for depth in depths:
+        result = perft(asp, depth)
+        line = repr(result)
+        if depth < len(reference):
+            ok = result.leaves == reference[depth]
+            failed = failed or not ok
+            line += " ok" if ok else f" MISMATCH (expected {reference[depth]})"
+        print(line)
+    if args.divide and args.depth is not None:
+        for action, leaves in sorted(perft_divide(asp, args.depth).items()):
+            print(f"  {action}: {leaves}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import pickle
+import time
+from typing import Optional
+
+import numpy as np
+
+###############################################################################
+# A transposition table backed by a memory-mapped file, for long searches that
+# must survive being interrupted.
+#
+# It has the interface of TranspositionTable (see transposition.py), but its
+# entries live in a fixed-size open-addressing hash table in the file rather
+# than in a dict, and lookups read them straight from the mapping. Opening an
+# existing file resumes with everything stored in it; opening a new file with
+# warm_start copies the entries of an earlier run's file first. Either way,
+# earlier knowledge is available at once, without being loaded into Python
+# objects.
+#
+# Keys are reduced to 64-bit BLAKE2 digests of their repr(), which (unlike
+# hash()) are the same in every process. Each key may sit in any of PROBES
+# consecutive slots; when all of them hold other positions, the shallowest
+# of them is replaced by a search at least as deep. Actions are pickled into
+# a fixed-size field, so they must pickle to at most action_size bytes.
+#
+# The operating system writes dirty pages back on its own, and writes survive
+# the process being killed. A checkpoint flushes them to disk, so that they
+# also survive the machine going down; one is taken every checkpoint_seconds
+# of storing, and on close().
+###############################################################################
+
+MAGIC = b"ASTT"
+VERSION = 1
+PROBES = 4
+
+_HEADER = np.dtype(
+    [("magic", "S4"), ("version", "<u4"), ("capacity", "<u8"), ("action_size", "<u4")]
+)
+_HEADER_BYTES = 64
+
+
+def _record_dtype(action_size):
+    return np.dtype(
+        [
+            ("check", "<u8"),  # the key's digest, or 0 for an empty slot
+            ("depth", "<i4"),
+            ("flag", "u1"),
+            ("value", "<f8"),
+            ("action", f"S{action_size}"),
+        ]
+    )
+
+
+def key_digest(key) -> int:
+    """
+    Output- Returns a nonzero 64-bit digest of key that is the same in every
+            process.
+    """
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class PersistentTranspositionTable:
+    DEFAULT_CAPACITY = 1 << 20
+    DEFAULT_ACTION_SIZE = 16
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = DEFAULT_CAPACITY,
+        action_size: int = DEFAULT_ACTION_SIZE,
+        warm_start: Optional[str] = None,
+        checkpoint_seconds: Optional[float] = 60.0,
+        canonical: bool = False,
+    ):
+        """
+        Input:
+                path- the file to keep the table in. If it exists, the table
+                resumes with its entries, and capacity and action_size are
+                taken from it.
+                capacity- the number of slots of a new table
+                action_size- the bytes available to each pickled action
+                warm_start- the file of an earlier table, whose entries a new
+                table starts with
+                checkpoint_seconds- the time between checkpoints while
+                storing, or None to checkpoint only when asked to
+                canonical- if True, symmetric positions share one entry (see
+                transposition.table_key). A file must always be opened with
+                the same setting.
+        """
+        self.path = path
+        self.canonical = canonical
+        self.checkpoint_seconds = checkpoint_seconds
+        self.hits = 0
+        self.misses = 0
+        self.checkpoints = 0
+        if not os.path.exists(path):
+            self._create(path, capacity, action_size)
+        self._open(path)
+        if warm_start is not None and self._count == 0:
+            self.merge_file(warm_start)
+        self._last_checkpoint = time.monotonic()
+
+    @property
+    def max_entries(self) -> int:
+        return self.capacity
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _create(path, capacity, action_size):
+        header = np.zeros(1, _HEADER)
+        header[0] = (MAGIC, VERSION, capacity, action_size)
+        with open(path, "wb") as file:
+            file.write(header.tobytes().ljust(_HEADER_BYTES, b"\0"))
+            file.truncate(_HEADER_BYTES + capacity * _record_dtype(action_size).itemsize)
+
+    def _open(self, path):
+        header = np.fromfile(path, _HEADER, count=1)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} is not a transposition table file")
+        self.capacity = int(header["capacity"])
+        self.action_size = int(header["action_size"])
+        self._records = np.memmap(
+            path, _record_dtype(self.action_size), "r+", _HEADER_BYTES, (self.capacity,)
+        )
+        self._count = int(np.count_nonzero(self._records["check"]))
+
+    def _slots(self, check):
+        start = check % self.capacity
+        return [(start + probe) % self.capacity for probe in range(min(PROBES, self.capacity))]
+
+    def lookup(self, key):
+        """
+        Output- Returns the entry (depth, value, flag, action) stored for key,
+                or None.
+        """
+        check = key_digest(key)
+        records = self._records
+        for slot in self._slots(check):
+            record = records[slot]
+            if record["check"] == check:
+                self.hits += 1
+                return (
+                    int(record["depth"]),
+                    float(record["value"]),
+                    int(record["flag"]),
+                    pickle.loads(record["action"]),
+                )
+            if record["check"] == 0:
+                break
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag, action):
+        """
+        Stores a search result, keeping the existing entry if it came from a
+        deeper search.
+        """
+        encoded = pickle.dumps(action, 2)
+        if len(encoded) > self.action_size:
+            raise ValueError(f"action {action!r} pickles to more than {self.action_size} bytes")
+        self._put(key_digest(key), depth, value, flag, encoded)
+        if (
+            self.checkpoint_seconds is not None
+            and time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds
+        ):
+            self.checkpoint()
+
+    def _put(self, check, depth, value, flag, encoded):
+        records = self._records
+        target = None
+        for slot in self._slots(check):
+            stored = records[slot]["check"]
+            if stored == check:
+                if records[slot]["depth"] > depth:
+                    return
+                target = slot
+                break
+            if stored == 0:
+                target = slot
+                self._count += 1
+                break
+            if target is None or records[slot]["depth"] < records[target]["depth"]:
+                target = slot
+        else:
+            # Every slot holds another position: replace the shallowest
+            if records[target]["depth"] > depth:
+                return
+        records[target] = (check, depth, flag, value, encoded)
+
+    def merge_file(self, path: str):
+        """
+        Stores every entry of the table file at path in this table.
+        """
+        header = np.fromfile(path, _HEADER, count=1)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} is not a transposition table file")
+        other = np.memmap(
+            path, _record_dtype(int(header["action_size"])), "r", _HEADER_BYTES,
+            (int(header["capacity"]),),
+        )
+        for record in other[other["check"] != 0]:
+            encoded = bytes(record["action"])
+            if len(encoded) <= self.action_size:
+                self._put(
+                    int(record["check"]), int(record["depth"]), float(record["value"]),
+                    int(record["flag"]), encoded,
+                )
+        del other
+
+    def checkpoint(self):
+        """
+        Flushes every entry stored so far to disk.
+        """
+        self._records.flush()
+        self.checkpoints += 1
+        self._last_checkpoint = time.monotonic()
+
+    def clear(self):
+        self._records[:] = np.zeros(1, self._records.dtype)
+        self.checkpoint()
+        self._count = 0
+
+    def close(self):
+        if self._records is not None:
+            self.checkpoint()
+            self._records = None
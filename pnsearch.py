@@ -0,0 +1,318 @@
+import argparse
+import json
+import time
+from typing import Callable, Optional
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+)
+import gameregistry
+from mcts import terminal_rewards
+
+###############################################################################
+# Depth-first proof-number search (df-pn) for any AdversarialSearchProblem.
+#
+# Proof-number search answers a yes/no question about a position: can the
+# attacker force a win? (A draw counts as "no", so a draw is proven by
+# disproving a win for each player in turn.) Every node has a proof number,
+# the fewest unsolved leaves that would have to turn out wins to prove it, and
+# a disproof number, the fewest that would have to turn out otherwise to
+# disprove it. The search always expands a most-proving node, which makes it
+# far stronger than alpha-beta on positions decided by a narrow forcing line.
+#
+# df-pn searches depth first, staying below a node until its numbers cross
+# thresholds inherited from its parent, and keeps the numbers of the nodes it
+# has left in a table keyed on asp.state_key(state). The table holds at most
+# max_entries nodes; when it is full, the quarter of its nodes with the least
+# work below them (solved nodes last) are dropped and searched again if
+# needed.
+###############################################################################
+
+
+INF = 1 << 40  # the proof or disproof number of a solved node
+
+
+class PNResult:
+    def __init__(self, outcome, action, proof, disproof, nodes, elapsed, entries):
+        """
+        Inputs:
+                outcome- True if the attacker can force a win, False if it
+                        cannot, or None if the budget ran out first
+                action- the best action from the root: a winning action if
+                        the player to move wins, a refuting action if its
+                        opponent is proven not to win, otherwise the action
+                        that was most promising for the player to move
+                proof, disproof- the proof and disproof numbers of the root
+                nodes- the number of nodes expanded
+                elapsed- seconds spent in the search
+                entries- the number of nodes in the table at the end
+        """
+        self.outcome = outcome
+        self.action = action
+        self.proof = proof
+        self.disproof = disproof
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.entries = entries
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class ProofNumberSearch:
+    """
+    A df-pn solver over an AdversarialSearchProblem. The table is kept
+    between calls to solve(), so later questions about related positions
+    reuse earlier work, as long as they ask about the same attacker.
+
+    If given, progress(nodes, proof, disproof, entries) is called every
+    progress_interval expanded nodes with the numbers of the root.
+    """
+
+    DEFAULT_MAX_ENTRIES = 1 << 20
+
+    def __init__(
+        self,
+        asp: AdversarialSearchProblem[GameState, Action],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        progress: Optional[Callable[[int, int, int, int], None]] = None,
+        progress_interval: int = 10000,
+    ):
+        self._asp = asp
+        self.max_entries = max_entries
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self._table = {}  # key -> [proof, disproof, work]
+        self._attacker = None
+        self._root_key = None
+        self.nodes = 0
+
+    def __len__(self):
+        return len(self._table)
+
+    def solve(
+        self,
+        state: Optional[GameState] = None,
+        attacker: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+        time_limit_ms: Optional[float] = None,
+    ) -> PNResult:
+        """
+        Input:
+            state - the position to solve (by default the asp's start state)
+            attacker - the player to prove a win for (by default the player
+                to move)
+            max_nodes - the maximum number of nodes to expand
+            time_limit_ms - the maximum wall-clock time to search, in
+                milliseconds
+        Output:
+            a PNResult
+        """
+        asp = self._asp
+        if state is None:
+            state = asp.get_start_state()
+        if attacker is None:
+            attacker = state.player_to_move()
+        if attacker != self._attacker:
+            self._table.clear()
+            self._attacker = attacker
+
+        start = time.perf_counter()
+        self.nodes = 0
+        self._max_nodes = max_nodes
+        self._deadline = None if time_limit_ms is None else start + time_limit_ms / 1000
+        self._root_key = asp.state_key(state)
+        try:
+            if not asp.is_terminal_state(state):
+                self._mid(state, self._root_key, INF, INF)
+        except _BudgetExhausted:
+            pass
+        proof, disproof = self._numbers(state, self._root_key)
+        outcome = True if proof == 0 else False if disproof == 0 else None
+        return PNResult(
+            outcome,
+            self._best_action(state),
+            proof,
+            disproof,
+            self.nodes,
+            time.perf_counter() - start,
+            len(self._table),
+        )
+
+    def _numbers(self, state, key):
+        # The (proof, disproof) numbers of a node: stored, solved at once if
+        # terminal, or (1, 1) if it has not been expanded
+        entry = self._table.get(key)
+        if entry is not None:
+            return entry[0], entry[1]
+        return self._terminal_numbers(state) or (1, 1)
+
+    def _terminal_numbers(self, state):
+        asp = self._asp
+        if not asp.is_terminal_state(state):
+            return None
+        if terminal_rewards(asp, state)[self._attacker] == 1.0:
+            return (0, INF)
+        return (INF, 0)
+
+    def _mid(self, state, key, proof_threshold, disproof_threshold):
+        # Searches below state until its proof number reaches
+        # proof_threshold or its disproof number reaches disproof_threshold
+        asp = self._asp
+        table = self._table
+        self._expand()
+        entry = table.get(key)
+        work = self.nodes - (entry[2] if entry else 0)
+        attacking = state.player_to_move() == self._attacker
+        children = []  # (state, key, numbers if terminal)
+        for action in asp.get_available_actions(state):
+            child = asp.transition(state, action)
+            children.append((child, asp.state_key(child), self._terminal_numbers(child)))
+
+        while True:
+            proofs, disproofs = [], []
+            for child, child_key, terminal in children:
+                numbers = terminal or table.get(child_key) or (1, 1)
+                proofs.append(numbers[0])
+                disproofs.append(numbers[1])
+            if attacking:
+                proof, disproof = min(proofs), min(INF, sum(disproofs))
+            else:
+                proof, disproof = min(INF, sum(proofs)), min(disproofs)
+            # Stored on every pass, so the numbers of the nodes on the current
+            # path (the root above all) are up to date while the search runs
+            self._store(key, proof, disproof, self.nodes - work)
+            if proof >= proof_threshold or disproof >= disproof_threshold:
+                break
+
+            # Descend into the most-proving child, until it stops being one
+            if attacking:
+                best, second = _two_smallest(proofs)
+                child_proof_threshold = min(proof_threshold, second + 1)
+                child_disproof_threshold = min(INF, disproof_threshold - disproof + disproofs[best])
+            else:
+                best, second = _two_smallest(disproofs)
+                child_proof_threshold = min(INF, proof_threshold - proof + proofs[best])
+                child_disproof_threshold = min(disproof_threshold, second + 1)
+            child, child_key, _ = children[best]
+            self._mid(child, child_key, child_proof_threshold, child_disproof_threshold)
+
+    def _expand(self):
+        if self._max_nodes is not None and self.nodes >= self._max_nodes:
+            raise _BudgetExhausted()
+        self.nodes += 1
+        if self.nodes % self.progress_interval == 0:
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                raise _BudgetExhausted()
+            if self.progress is not None:
+                entry = self._table.get(self._root_key, (1, 1))
+                self.progress(self.nodes, entry[0], entry[1], len(self._table))
+
+    def _store(self, key, proof, disproof, work):
+        table = self._table
+        if key not in table and len(table) >= self.max_entries:
+            self._collect()
+        table[key] = [proof, disproof, work]
+
+    def _collect(self):
+        # Drops the quarter of the table with the least work below it,
+        # keeping solved nodes over unsolved ones
+        table = self._table
+        ranked = sorted(
+            table, key=lambda key: (table[key][0] == 0 or table[key][1] == 0, table[key][2])
+        )
+        for key in ranked[: max(1, len(ranked) // 4)]:
+            if key != self._root_key:
+                del table[key]
+
+    def _best_action(self, state):
+        asp = self._asp
+        if asp.is_terminal_state(state):
+            return None
+        attacking = state.player_to_move() == self._attacker
+        best_action, best_numbers = None, None
+        for action in asp.get_available_actions(state):
+            child = asp.transition(state, action)
+            proof, disproof = self._numbers(child, asp.state_key(child))
+            # The attacker wants the smallest proof number, the defender the
+            # smallest disproof number
+            numbers = (proof, disproof) if attacking else (disproof, proof)
+            if best_numbers is None or numbers < best_numbers:
+                best_action, best_numbers = action, numbers
+        return best_action
+
+
+def _two_smallest(values):
+    # The index of the smallest value, and the second smallest value
+    best = min(range(len(values)), key=values.__getitem__)
+    second = min((value for index, value in enumerate(values) if index != best), default=INF)
+    return best, second
+
+
+def proof_number_search(
+    asp: AdversarialSearchProblem[GameState, Action],
+    attacker: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    time_limit_ms: Optional[float] = None,
+    max_entries: int = ProofNumberSearch.DEFAULT_MAX_ENTRIES,
+    progress: Optional[Callable[[int, int, int, int], None]] = None,
+) -> PNResult:
+    """
+    Proves or disproves a forced win for the attacker from the start state of
+    the asp with df-pn (see ProofNumberSearch).
+
+    Input:
+        asp - an AdversarialSearchProblem
+        attacker - the player to prove a win for (by default the player to
+            move)
+        max_nodes - the maximum number of nodes to expand
+        time_limit_ms - the maximum wall-clock time to search, in milliseconds
+        max_entries - the maximum number of nodes kept in the table
+        progress - called as progress(nodes, proof, disproof, entries) every
+            10000 expanded nodes
+    Output:
+        a PNResult
+    """
+    engine = ProofNumberSearch(asp, max_entries, progress)
+    return engine.solve(attacker=attacker, max_nodes=max_nodes, time_limit_ms=time_limit_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--game", choices=gameregistry.game_names(), default="connect4")
+    parser.add_argument("--dimension", type=int, default=None)
+    parser.add_argument(
+        "--moves", default="[]", help="JSON list of the moves played from the start state"
+    )
+    parser.add_argument("--attacker", type=int, default=None, help="defaults to the player to move")
+    parser.add_argument("--max-nodes", type=int, default=None)
+    parser.add_argument("--time-limit", type=float, default=None, help="in milliseconds")
+    parser.add_argument("--max-entries", type=int, default=ProofNumberSearch.DEFAULT_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    asp = gameregistry.get_game(args.game).make_problem(args.dimension)
+    state = asp.get_start_state()
+    for action in json.loads(args.moves):
+        state = asp.transition(state, tuple(action) if isinstance(action, list) else action)
+
+    def progress(nodes, proof, disproof, entries):
+        print(f"{nodes} nodes, proof {proof}, disproof {disproof}, {entries} entries")
+
+    engine = ProofNumberSearch(asp, args.max_entries, progress)
+    result = engine.solve(state, args.attacker, args.max_nodes, args.time_limit)
+    outcome = {True: "win", False: "no win", None: "unknown"}[result.outcome]
+    print(
+        f"{outcome} (best action {result.action}) after {result.nodes} nodes "
+        f"in {result.elapsed:.2f}s ({result.nodes_per_second:.0f} nodes/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import cProfile
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from adversarialsearchproblem import (
+    Action,
+    AdversarialSearchProblem,
+    State as GameState,
+    forward_hooks,
+)
+from searchstats import SearchStats
+
+###############################################################################
+# Opt-in profiling for searches.
+#
+# ProfiledASP wraps an AdversarialSearchProblem and times every call to its
+# interface (get_available_actions, transition, is_terminal_state,
+# evaluate_terminal, heuristic_func, heuristic_batch, state_key, value_bounds,
+# moves_remaining, forcing_actions) with time.perf_counter_ns, so that a search
+# run over the wrapper shows how its time splits between the game's methods.
+# Anything else is passed on to the wrapped game untimed. Since
+# alpha_beta_cutoff takes the heuristic as a separate function, pass it a
+# heuristic built from the wrapper (e.g.
+# lambda s: profiled.heuristic_func(s, 0)) or wrapped with profiled.wrap().
+#
+# profile_call runs any single call (e.g. one alpha_beta_cutoff) under cProfile
+# and can write a pstats file and/or a collapsed-stack file for flame graph
+# tools (e.g. flamegraph.pl or speedscope).
+#
+# profile_memory runs a single call under tracemalloc and reports its peak
+# memory, the call sites holding memory at the peak, and the bytes allocated
+# over the whole call (per node, for a search), including short-lived
+# temporaries. A ProfiledASP created with track_memory=True also records the
+# bytes each interface method leaves allocated (for transition, the size of
+# each new state) while it runs under profile_memory.
+###############################################################################
+
+
+class MethodProfile:
+    """
+    Call count, total time and a histogram of call durations for one method.
+    Bucket b of the histogram counts calls that took between 2**(b-1) and
+    2**b nanoseconds.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram: Dict[int, int] = {}
+        self.allocated_bytes = 0  # net bytes left allocated, if tracked
+
+    def record(self, elapsed_ns: int, allocated_bytes: int = 0):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.allocated_bytes += allocated_bytes
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        bucket = elapsed_ns.bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.calls if self.calls else 0.0
+
+    def percentile_ns(self, fraction: float) -> int:
+        """
+        Returns the upper edge of the histogram bucket holding the given
+        fraction (e.g. 0.5 for the median) of calls.
+        """
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= fraction * self.calls:
+                return 1 << bucket
+        return 0
+
+
+class ProfiledASP(AdversarialSearchProblem[GameState, Action]):
+    def __init__(self, asp: AdversarialSearchProblem[GameState, Action], track_memory: bool = False):
+        """
+        Input:
+            asp - the AdversarialSearchProblem to profile
+            track_memory - if True, also record the net bytes allocated by each
+                call, as traced by tracemalloc. Calls then raise RuntimeError
+                unless tracemalloc is tracing (e.g. under profile_memory).
+        """
+        self.asp = asp
+        self.track_memory = track_memory
+        self.profiles: Dict[str, MethodProfile] = {}
+        forward_hooks(self, asp)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or "asp" not in vars(self):
+            raise AttributeError(name)
+        return getattr(self.asp, name)
+
+    def _call(self, name, func, *args):
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = MethodProfile()
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError(
+                    "ProfiledASP(track_memory=True) needs tracemalloc to be tracing "
+                    "(e.g. under profile_memory)"
+                )
+            memory = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter_ns()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                profile.record(elapsed, tracemalloc.get_traced_memory()[0] - memory)
+        start = time.perf_counter_ns()
+        try:
+            return func(*args)
+        finally:
+            profile.record(time.perf_counter_ns() - start)
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Returns func, timed under the given name in this profile.
+        """
+        return lambda *args: self._call(name, func, *args)
+
+    def get_available_actions(self, state):
+        return self._call("get_available_actions", self.asp.get_available_actions, state)
+
+    def transition(self, state, action):
+        return self._call("transition", self.asp.transition, state, action)
+
+    def is_terminal_state(self, state):
+        return self._call("is_terminal_state", self.asp.is_terminal_state, state)
+
+    def evaluate_terminal(self, state):
+        return self._call("evaluate_terminal", self.asp.evaluate_terminal, state)
+
+    def heuristic_func(self, state, player_index):
+        return self._call("heuristic_func", self.asp.heuristic_func, state, player_index)
+
+    def heuristic_batch(self, states, player_index):
+        return self._call("heuristic_batch", self.asp.heuristic_batch, states, player_index)
+
+    def state_key(self, state):
+        return self._call("state_key", self.asp.state_key, state)
+
+    def value_bounds(self, state):
+        return self._call("value_bounds", self.asp.value_bounds, state)
+
+    def moves_remaining(self, state):
+        return self._call("moves_remaining", self.asp.moves_remaining, state)
+
+    def forcing_actions(self, state):
+        return self._call("forcing_actions", self.asp.forcing_actions, state)
+
+    def reset(self):
+        self.profiles.clear()
+
+    def report(self) -> str:
+        total_ns = sum(profile.total_ns for profile in self.profiles.values())
+        lines = [
+            f"{'method':<24}{'calls':>10}{'total ms':>11}{'share':>8}"
+            f"{'mean us':>10}{'p50 us':>9}{'p99 us':>9}{'max us':>9}"
+            + (f"{'B/call':>9}" if self.track_memory else "")
+        ]
+        for name, profile in sorted(self.profiles.items(), key=lambda item: -item[1].total_ns):
+            lines.append(
+                f"{name:<24}{profile.calls:>10}{profile.total_ns / 1e6:>11.2f}"
+                f"{profile.total_ns / total_ns if total_ns else 0:>8.1%}"
+                f"{profile.mean_ns / 1e3:>10.2f}{profile.percentile_ns(0.5) / 1e3:>9.2f}"
+                f"{profile.percentile_ns(0.99) / 1e3:>9.2f}{profile.max_ns / 1e3:>9.2f}"
+                + (f"{profile.allocated_bytes / profile.calls:>9.0f}" if self.track_memory else "")
+            )
+        return "\n".join(lines)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapsed_stacks(func, args, kwargs):
+    """
+    Runs func while timing every Python and builtin call, and returns the
+    result together with the self-time (in microseconds) of each call stack.
+    """
+    stack = []  # [start_ns, child_ns] per active call, parallel to path
+    totals: Dict[str, int] = {}
+    path = []
+
+    def profiler(frame, event, arg):
+        now = time.perf_counter_ns()
+        if event in ("call", "c_call"):
+            name = _frame_name(frame) if event == "call" else getattr(arg, "__qualname__", str(arg))
+            path.append(name)
+            stack.append([now, 0])
+        elif event in ("return", "c_return", "c_exception") and stack:
+            start, child_ns = stack.pop()
+            elapsed = now - start
+            key = ";".join(path)
+            totals[key] = totals.get(key, 0) + elapsed - child_ns
+            path.pop()
+            if stack:
+                stack[-1][1] += elapsed
+
+    sys.setprofile(profiler)
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        sys.setprofile(None)
+    return result, {key: ns // 1000 for key, ns in totals.items()}
+
+
+def profile_call(func, *args, pstats_path=None, collapsed_path=None, **kwargs):
+    """
+    Calls func(*args, **kwargs) under a profiler and returns its result.
+
+    Input:
+        pstats_path - if given, the call is run under cProfile and the
+            statistics are dumped to this file (read it with pstats.Stats)
+        collapsed_path - if given, the call is run under a stack-tracking
+            profiler and each call stack's self-time, in microseconds, is
+            written to this file in collapsed-stack format ("a;b;c 123")
+        If both are given, func is called twice.
+    """
+    result = None
+    if pstats_path is not None:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+        profiler.dump_stats(pstats_path)
+    if collapsed_path is not None:
+        result, stacks = _collapsed_stacks(func, args, kwargs)
+        with open(collapsed_path, "w") as output:
+            for stack, micros in sorted(stacks.items()):
+                if micros > 0:
+                    output.write(f"{stack} {micros}\n")
+    if pstats_path is None and collapsed_path is None:
+        result = func(*args, **kwargs)
+    return result
+
+
+class MemoryReport:
+    def __init__(self, peak_bytes, retained_bytes, allocated_bytes, nodes, peak_blocks, top_sites):
+        self.peak_bytes = peak_bytes  # peak traced memory above the start
+        self.retained_bytes = retained_bytes  # traced memory left after the call
+        self.allocated_bytes = allocated_bytes  # total growth of traced memory
+        self.nodes = nodes  # nodes searched, if the call returned SearchStats
+        self.peak_blocks = peak_blocks  # blocks allocated at the peak snapshot
+        self.top_sites = top_sites  # (site, bytes, blocks) held at the peak
+
+    @property
+    def allocated_bytes_per_node(self) -> float:
+        return self.allocated_bytes / self.nodes if self.nodes else 0.0
+
+    def report(self) -> str:
+        lines = [
+            f"peak: {self.peak_bytes / 1024:.1f} KiB in {self.peak_blocks} blocks, "
+            f"retained: {self.retained_bytes / 1024:.1f} KiB, "
+            f"allocated: {self.allocated_bytes / 1024:.1f} KiB",
+        ]
+        if self.nodes:
+            lines.append(
+                f"nodes: {self.nodes}, allocated bytes per node: {self.allocated_bytes_per_node:.1f}"
+            )
+        lines.append(f"{'KiB':>10}{'blocks':>9}  site")
+        for site, size, count in self.top_sites:
+            lines.append(f"{size / 1024:>10.1f}{count:>9}  {site}")
+        return "\n".join(lines)
+
+
+def profile_memory(func, *args, top=10, frames=1, **kwargs):
+    """
+    Calls func(*args, **kwargs) under tracemalloc and returns a tuple
+    (result, MemoryReport).
+
+    While the call runs, a snapshot of the traced memory is taken each time it
+    grows past the last snapshot by 5%, so the last snapshot shows what held
+    memory at (nearly) the peak. The top sites of the report are the source
+    lines that allocated the most of that memory.
+
+    Every growth of the traced memory between two calls or returns is also
+    added up into allocated_bytes, so short-lived allocations (e.g. NumPy
+    temporaries freed before the peak) are counted too. Allocations freed
+    again before the next call or return are missed, so this is a lower bound
+    on the bytes allocated. If the call returns (action, SearchStats), as the
+    search entry points do with return_stats=True, the report also gives the
+    allocated bytes per node.
+
+    Input:
+        top - the number of allocation sites to report
+        frames - the number of stack frames to group allocation sites by
+    """
+    if tracemalloc.is_tracing():
+        raise RuntimeError("profile_memory needs tracemalloc to be stopped")
+    tracemalloc.start(frames)
+    try:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        start_snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        peak = {"snapshot": None, "next": base}
+        growth = {"last": base, "allocated": 0}
+
+        def sampler(frame, event, arg):
+            current = tracemalloc.get_traced_memory()[0]
+            if current > growth["last"]:
+                growth["allocated"] += current - growth["last"]
+            growth["last"] = current
+            if event in ("call", "c_call") and current > peak["next"]:
+                peak["snapshot"] = None
+                peak["snapshot"] = tracemalloc.take_snapshot()
+                peak["next"] = current + (current - base) // 20
+                # Don't count the snapshot's own memory as the search's
+                growth["last"] = tracemalloc.get_traced_memory()[0]
+
+        sys.setprofile(sampler)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            sys.setprofile(None)
+        current, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    top_sites, peak_blocks = [], 0
+    if peak["snapshot"] is not None:
+        differences = peak["snapshot"].filter_traces(ignore).compare_to(start_snapshot, "traceback")
+        differences = [d for d in differences if d.size_diff > 0]
+        peak_blocks = sum(max(d.count_diff, 0) for d in differences)
+        top_sites = [
+            (" <- ".join(str(frame) for frame in d.traceback), d.size_diff, d.count_diff)
+            for d in sorted(differences, key=lambda d: -d.size_diff)[:top]
+        ]
+
+    nodes = None
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], SearchStats):
+        nodes = result[1].nodes
+    allocated = growth["allocated"] + max(current - growth["last"], 0)
+    report = MemoryReport(peak_memory - base, current - base, allocated, nodes, peak_blocks, top_sites)
+    return result, report
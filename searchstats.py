@@ -0,0 +1,86 @@
+###############################################################################
+# SearchStats collects counters from a single search. The search functions in
+# adversarialsearch.py fill one in when it is passed to them as stats, and skip
+# all bookkeeping when stats is None.
+#
+# Plies are counted from the root of the search: the root is at ply 0 and its
+# children are at ply 1.
+###############################################################################
+
+
+class SearchStats:
+    def __init__(self):
+        self.nodes = 0  # states visited, including leaves
+        self.leaves = 0  # terminal states evaluated
+        self.heuristic_calls = 0  # states evaluated with the heuristic
+        self.extensions = 0  # states past the cutoff searched for forcing moves
+        self.reductions = 0  # moves searched at reduced depth
+        self.researches = 0  # reduced moves searched again at full depth
+        self.probcuts = 0  # states cut off by a shallow search
+        self.tt_hits = 0  # transposition table lookups that found an entry
+        self.max_depth = 0  # deepest ply visited
+        self.cutoffs_per_ply = []  # cutoffs_per_ply[p] counts cutoffs at ply p
+        self.root_scores = []  # (action, score) for each root action searched
+        self.value = None  # the value of the root, to player 0
+        self.proven = False  # whether value is a game-theoretic value (or win/loss)
+        self.elapsed = 0.0  # seconds spent in the search
+
+    def visit(self, ply: int):
+        self.nodes += 1
+        if ply > self.max_depth:
+            self.max_depth = ply
+
+    def cutoff(self, ply: int):
+        while len(self.cutoffs_per_ply) <= ply:
+            self.cutoffs_per_ply.append(0)
+        self.cutoffs_per_ply[ply] += 1
+
+    @property
+    def cutoffs(self) -> int:
+        return sum(self.cutoffs_per_ply)
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def merge(self, other: "SearchStats"):
+        """
+        Adds the counts of another search (e.g. the next iteration of an
+        iterative deepening search) to these. Root scores and the root value
+        are replaced by the other search's.
+        """
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.heuristic_calls += other.heuristic_calls
+        self.extensions += other.extensions
+        self.reductions += other.reductions
+        self.researches += other.researches
+        self.probcuts += other.probcuts
+        self.tt_hits += other.tt_hits
+        self.max_depth = max(self.max_depth, other.max_depth)
+        while len(self.cutoffs_per_ply) < len(other.cutoffs_per_ply):
+            self.cutoffs_per_ply.append(0)
+        for ply, count in enumerate(other.cutoffs_per_ply):
+            self.cutoffs_per_ply[ply] += count
+        self.root_scores = list(other.root_scores)
+        self.value, self.proven = other.value, other.proven
+        self.elapsed += other.elapsed
+
+    def report(self) -> str:
+        lines = [
+            f"nodes: {self.nodes} ({self.nodes_per_second:.0f}/s), "
+            f"leaves: {self.leaves}, heuristic calls: {self.heuristic_calls}, "
+            f"extensions: {self.extensions}, tt hits: {self.tt_hits}",
+            f"max depth: {self.max_depth}, cutoffs: {self.cutoffs} "
+            f"(per ply: {self.cutoffs_per_ply}), elapsed: {self.elapsed:.3f}s",
+        ]
+        if self.reductions or self.probcuts:
+            lines.append(
+                f"reductions: {self.reductions} ({self.researches} searched again), "
+                f"probcuts: {self.probcuts}"
+            )
+        if self.value is not None:
+            lines.append(f"value: {self.value}" + (" (proven)" if self.proven else ""))
+        for action, score in self.root_scores:
+            lines.append(f"  action: {action} score: {score}")
+        return "\n".join(lines)
@@ -0,0 +1,172 @@
+import json
+import struct
+
+###############################################################################
+# Streaming traces of alpha-beta search trees.
+#
+# A SearchTracer passed as trace to alpha_beta or alpha_beta_cutoff (or to the
+# simulate functions) is told when the search enters a node, with the action
+# leading to it and the alpha/beta window it is searched with, and when it
+# leaves the node, with its value and whether that value caused a cutoff in
+# its parent. Each node is written out when it is left, so the tracer only
+# holds the path to the current node and memory stays flat however large the
+# search is.
+#
+# Two formats are supported:
+# - "jsonl": one JSON object per node, e.g.
+#   {"depth": 2, "path": [3, 4], "alpha": 0, "beta": Infinity, "value": 5,
+#    "cutoff": false}
+# - "binary": fixed-size enter and exit records, with each distinct action
+#   written once (as JSON) and then referred to by index.
+#
+# read_trace() streams the nodes of either format back, in the order they were
+# left (children before their parent), and subtree() rebuilds the tree below
+# a given action path.
+###############################################################################
+
+
+_ACTION = b"A"  # action index (uint32), JSON length (uint16), JSON
+_ENTER = b"E"  # depth (uint16), action index (uint32), alpha, beta (float64)
+_EXIT = b"X"  # value (float64), cutoff (uint8)
+_ACTION_HEADER = struct.Struct("<IH")
+_ENTER_RECORD = struct.Struct("<HIdd")
+_EXIT_RECORD = struct.Struct("<dB")
+_NO_ACTION = 0xFFFFFFFF  # the action index of the root
+
+
+class SearchTracer:
+    def __init__(self, path: str, format: str = "jsonl", buffer_size: int = 1 << 16):
+        """
+        Input:
+            path - the file to write the trace to
+            format - "jsonl" or "binary"
+            buffer_size - the size of the write buffer in bytes
+        """
+        if format not in ("jsonl", "binary"):
+            raise ValueError(f"Unknown trace format: {format}")
+        self.format = format
+        self.nodes = 0
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._stack = []  # (depth, action, alpha, beta) from the root
+        self._action_indices = {}
+
+    def enter(self, depth, action, alpha, beta):
+        if self.format == "binary":
+            index = _NO_ACTION if action is None else self._action_index(action)
+            self._file.write(_ENTER + _ENTER_RECORD.pack(depth, index, alpha, beta))
+        self._stack.append((depth, action, alpha, beta))
+
+    def exit(self, value, cutoff):
+        depth, action, alpha, beta = self._stack.pop()
+        self.nodes += 1
+        if self.format == "binary":
+            self._file.write(_EXIT + _EXIT_RECORD.pack(value, cutoff))
+            return
+        path = [entry[1] for entry in self._stack if entry[1] is not None]
+        if action is not None:
+            path.append(action)
+        record = {
+            "depth": depth,
+            "path": path,
+            "alpha": alpha,
+            "beta": beta,
+            "value": value,
+            "cutoff": bool(cutoff),
+        }
+        self._file.write(json.dumps(record).encode() + b"\n")
+
+    def _action_index(self, action):
+        index = self._action_indices.get(action)
+        if index is None:
+            index = self._action_indices[action] = len(self._action_indices)
+            encoded = json.dumps(action).encode()
+            self._file.write(_ACTION + _ACTION_HEADER.pack(index, len(encoded)) + encoded)
+        return index
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _to_action(value):
+    # JSON turns tuple actions into lists; turn them back into (hashable) tuples
+    if isinstance(value, list):
+        return tuple(_to_action(item) for item in value)
+    return value
+
+
+def _read_jsonl(trace_file):
+    for line in trace_file:
+        record = json.loads(line)
+        record["path"] = tuple(_to_action(action) for action in record["path"])
+        yield record
+
+
+def _read_binary(trace_file):
+    actions = []
+    stack = []
+    while True:
+        kind = trace_file.read(1)
+        if not kind:
+            return
+        if kind == _ACTION:
+            index, length = _ACTION_HEADER.unpack(trace_file.read(_ACTION_HEADER.size))
+            actions.append(_to_action(json.loads(trace_file.read(length))))
+        elif kind == _ENTER:
+            depth, index, alpha, beta = _ENTER_RECORD.unpack(trace_file.read(_ENTER_RECORD.size))
+            path = stack[-1][1] if stack else ()
+            if index != _NO_ACTION:
+                path = path + (actions[index],)
+            stack.append((depth, path, alpha, beta))
+        elif kind == _EXIT:
+            value, cutoff = _EXIT_RECORD.unpack(trace_file.read(_EXIT_RECORD.size))
+            depth, path, alpha, beta = stack.pop()
+            yield {
+                "depth": depth,
+                "path": path,
+                "alpha": alpha,
+                "beta": beta,
+                "value": value,
+                "cutoff": bool(cutoff),
+            }
+        else:
+            raise ValueError(f"Corrupt trace record: {kind!r}")
+
+
+def read_trace(path: str):
+    """
+    Yields the nodes of a trace file of either format as dicts with the keys
+    depth, path (a tuple of actions from the root), alpha, beta, value and
+    cutoff, in the order the search left them.
+    """
+    with open(path, "rb") as trace_file:
+        binary = trace_file.read(1) in (_ACTION, _ENTER)
+        trace_file.seek(0)
+        reader = _read_binary if binary else _read_jsonl
+        yield from reader(trace_file)
+
+
+def subtree(path: str, action_path=()):
+    """
+    Rebuilds the part of a traced search below the node reached by
+    action_path (the root by default). Returns that node's record with a
+    "children" list of records in the order they were searched, recursively,
+    or None if the search never reached it. Only the subtree is kept in
+    memory.
+    """
+    action_path = tuple(action_path)
+    pending = {}  # children seen so far, by their parent's path
+    for record in read_trace(path):
+        node_path = record["path"]
+        if node_path[: len(action_path)] != action_path:
+            continue
+        record["children"] = pending.pop(node_path, [])
+        if node_path == action_path:
+            return record
+        pending.setdefault(node_path[:-1], []).append(record)
+    return None
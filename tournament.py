@@ -0,0 +1,276 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import time
+
+from adversarialsearchproblem import AdversarialSearchProblem
+import adversarialsearch as MyImplementation
+from bots import AlphaBetaCutoffBot, Bot, MCTSBot, choose_action
+import gameregistry
+from gamerunner import run_game
+from mcts import MCTS
+
+###############################################################################
+# Headless tournaments between bots.
+#
+# Every pair of bots plays the same number of games. Games are played in pairs
+# from the same randomized opening (a few random moves from the start state),
+# once with each bot moving first. Games run in a process pool, each result is
+# appended to a JSONL file as soon as it is known, and the summary reports win
+# rates, Elo ratings and mean time per move for every bot.
+#
+# Bots are named by specs of the form "<name>[:<parameter>]":
+#   minimax, ab, ab-cutoff:<cutoff ply>[:<quiescence plies>],
+#   mcts:<iterations per move>
+###############################################################################
+
+
+def make_game(game: str, dimension=None) -> AdversarialSearchProblem:
+    return gameregistry.get_game(game).make_problem(dimension)
+
+
+def make_bot(spec: str, asp: AdversarialSearchProblem, player_index: int, seed=None):
+    """
+    Builds the bot named by spec to play as the given player.
+    """
+    name, _, parameter = spec.partition(":")
+    if name == "minimax":
+        return MyImplementation.minimax
+    if name == "ab":
+        return MyImplementation.alpha_beta
+    if name == "ab-cutoff":
+        cutoff, _, quiescence = parameter.partition(":")
+        return AlphaBetaCutoffBot(
+            int(cutoff), lambda s: asp.heuristic_func(s, player_index),
+            quiescence=int(quiescence or 0),
+        )
+    if name == "mcts":
+        iterations = int(parameter) if parameter else None
+        return MCTSBot(MCTS(asp, seed=seed), iterations, verbose=False)
+    raise ValueError(f"Unknown bot: {spec}")
+
+
+class _TimedBot(Bot):
+    """
+    Wraps a bot of either style and records how long each move takes.
+    """
+
+    def __init__(self, bot):
+        self._bot = bot
+        self.move_times = []
+
+    def choose(self, asp):
+        start = time.perf_counter()
+        decision = choose_action(self._bot, asp)
+        self.move_times.append(time.perf_counter() - start)
+        return decision
+
+    def notify(self, action):
+        if isinstance(self._bot, Bot):
+            self._bot.notify(action)
+
+
+def random_opening(asp: AdversarialSearchProblem, plies: int, rng: random.Random):
+    """
+    Returns up to the given number of random actions from the start state,
+    stopping before the game would end.
+    """
+    opening = []
+    state = asp.get_start_state()
+    for _ in range(plies):
+        actions = sorted(asp.get_available_actions(state))
+        rng.shuffle(actions)
+        for action in actions:
+            child = asp.transition(state, action)
+            if not asp.is_terminal_state(child):
+                break
+        else:
+            break
+        opening.append(action)
+        state = child
+    return opening
+
+
+def play_game(task):
+    """
+    Plays one headless game. task is a dict with the game index, the game
+    and dimension, the bot specs for each player, the opening and a seed.
+    """
+    asp = make_game(task["game"], task["dimension"])
+    state = asp.get_start_state()
+    for action in task["opening"]:
+        state = asp.transition(state, action)
+    asp.set_start_state(state)
+
+    bots = [
+        _TimedBot(make_bot(spec, asp, i, task["seed"] + i))
+        for i, spec in enumerate(task["players"])
+    ]
+    start = time.perf_counter()
+    values = run_game(asp, bots)
+    elapsed = time.perf_counter() - start
+
+    if values[0] > values[1]:
+        winner = 0
+    elif values[1] > values[0]:
+        winner = 1
+    else:
+        winner = None
+    return {
+        "index": task["index"],
+        "players": task["players"],
+        "opening": task["opening"],
+        "winner": winner,
+        "moves": [len(bot.move_times) for bot in bots],
+        "move_time": [sum(bot.move_times) for bot in bots],
+        "seconds": elapsed,
+    }
+
+
+def schedule(game, dimension, bot_specs, games_per_pair, random_plies, seed=0):
+    """
+    Lists the games of a round robin between bot_specs, as tasks for play_game.
+    """
+    rng = random.Random(seed)
+    asp = make_game(game, dimension)
+    tasks = []
+    for a, b in itertools.combinations(bot_specs, 2):
+        for g in range(games_per_pair):
+            if g % 2 == 0:
+                opening = random_opening(asp, random_plies, rng)
+            players = [a, b] if g % 2 == 0 else [b, a]
+            tasks.append(
+                {
+                    "index": len(tasks),
+                    "game": game,
+                    "dimension": dimension,
+                    "players": players,
+                    "opening": opening,
+                    "seed": rng.getrandbits(32),
+                }
+            )
+    return tasks
+
+
+def run_tournament(tasks, output_path=None, workers=None):
+    """
+    Plays the given tasks across a process pool, appending each result to
+    output_path (JSONL) as it arrives. Returns the list of results.
+    """
+    results = []
+    output = open(output_path, "w") if output_path else None
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap_unordered(play_game, tasks):
+                results.append(result)
+                if output:
+                    output.write(json.dumps(result) + "\n")
+                    output.flush()
+    finally:
+        if output:
+            output.close()
+    return results
+
+
+def elo_ratings(results, iterations=200):
+    """
+    Fits Elo ratings (with a mean of 0) to the game results by maximum
+    likelihood, counting draws as half a win for each side. Every bot also
+    gets one virtual draw against a 0-rated opponent, which keeps ratings
+    finite when a bot wins or loses every game.
+    """
+    ratings = {}
+    for result in results:
+        for spec in result["players"]:
+            ratings.setdefault(spec, 0.0)
+    games = {spec: 0 for spec in ratings}
+    for result in results:
+        for spec in result["players"]:
+            games[spec] += 1
+
+    for _ in range(iterations):
+        gradient = {
+            spec: 0.5 - 1 / (1 + 10 ** (-rating / 400)) for spec, rating in ratings.items()
+        }
+        for result in results:
+            first, second = result["players"]
+            expected = 1 / (1 + 10 ** ((ratings[second] - ratings[first]) / 400))
+            score = {0: 1.0, 1: 0.0, None: 0.5}[result["winner"]]
+            gradient[first] += score - expected
+            gradient[second] -= score - expected
+        for spec in ratings:
+            ratings[spec] += 400 * gradient[spec] / (games[spec] + 1)
+        mean = sum(ratings.values()) / len(ratings)
+        ratings = {spec: rating - mean for spec, rating in ratings.items()}
+    return ratings
+
+
+def summarize(results):
+    """
+    Returns per-bot statistics: games, wins, draws, losses, score rate, Elo
+    and mean seconds per move.
+    """
+    summary = {}
+    for result in results:
+        for i, spec in enumerate(result["players"]):
+            stats = summary.setdefault(
+                spec, {"games": 0, "wins": 0, "draws": 0, "losses": 0, "moves": 0, "move_time": 0.0}
+            )
+            stats["games"] += 1
+            if result["winner"] is None:
+                stats["draws"] += 1
+            elif result["winner"] == i:
+                stats["wins"] += 1
+            else:
+                stats["losses"] += 1
+            stats["moves"] += result["moves"][i]
+            stats["move_time"] += result["move_time"][i]
+
+    ratings = elo_ratings(results)
+    for spec, stats in summary.items():
+        stats["score"] = (stats["wins"] + 0.5 * stats["draws"]) / stats["games"]
+        stats["elo"] = ratings[spec]
+        stats["time_per_move"] = stats["move_time"] / stats["moves"] if stats["moves"] else math.nan
+    return summary
+
+
+def print_report(summary):
+    print(f"{'bot':<16}{'games':>7}{'W':>6}{'D':>6}{'L':>6}{'score':>8}{'elo':>8}{'s/move':>10}")
+    for spec, stats in sorted(summary.items(), key=lambda item: -item[1]["elo"]):
+        print(
+            f"{spec:<16}{stats['games']:>7}{stats['wins']:>6}{stats['draws']:>6}"
+            f"{stats['losses']:>6}{stats['score']:>8.3f}{stats['elo']:>8.0f}"
+            f"{stats['time_per_move']:>10.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--game", choices=gameregistry.game_names(), default="ttt")
+    parser.add_argument("--dimension", type=int, default=None)
+    parser.add_argument(
+        "--bots", nargs="+", required=True,
+        help="bot specs, e.g. minimax ab ab-cutoff:3 mcts:500",
+    )
+    parser.add_argument("--games", type=int, default=10, help="games per pair of bots")
+    parser.add_argument("--random-plies", type=int, default=2, help="random opening moves")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="tournament.jsonl")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if len(args.bots) < 2:
+        parser.error("--bots needs at least two bots")
+
+    tasks = schedule(args.game, args.dimension, args.bots, args.games, args.random_plies, args.seed)
+    start = time.perf_counter()
+    results = run_tournament(tasks, args.output, args.workers)
+    print(f"{len(results)} games in {time.perf_counter() - start:.1f}s, results in {args.output}")
+    print_report(summarize(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from typing import Optional
+
+###############################################################################
+# A transposition table caches search results keyed on asp.state_key(state),
+# so that a position reached through different move orders (or searched again
+# on a later move) does not have to be searched from scratch.
+#
+# Each entry records the depth that was searched below the position, its value
+# (from player 0's perspective, as in adversarialsearch.py), whether that value
+# is exact or only a bound, and the best action found.
+#
+# A table created with canonical=True keys positions on their symmetry class
+# instead (see asps/symmetry.py), so the up to 8 positions of a class share one
+# entry. Searches find a position's key with table_key(), and store best
+# actions in the frame of the class's canonical state (to_table_action), to
+# be mapped back into the frame of the position looked up (from_table_action).
+# This relies on the game's values and heuristic being symmetric.
+###############################################################################
+
+# Kinds of stored values
+EXACT = 0
+LOWER_BOUND = 1  # the true value is at least the stored value
+UPPER_BOUND = 2  # the true value is at most the stored value
+
+
+def table_key(asp, state, canonical: bool = False):
+    """
+    Returns a tuple (key, t): the key under which tables store state, and the
+    symmetry transform from state into the frame of that key. Without
+    canonical, or for a game without a symmetry, this is
+    (asp.state_key(state), 0).
+    """
+    symmetry = asp.symmetry() if canonical else None
+    if symmetry is None:
+        return asp.state_key(state), 0
+    return symmetry.canonical_frame(state)
+
+
+def to_table_action(asp, action, t):
+    """
+    Maps an action of a state into the frame of its table key (see table_key).
+    """
+    if t == 0 or action is None:
+        return action
+    return asp.symmetry().transform_action(action, t)
+
+
+def from_table_action(asp, action, t):
+    """
+    Maps an action stored under a state's table key back into its own frame.
+    """
+    if t == 0 or action is None:
+        return action
+    return asp.symmetry().restore_action(action, t)
+
+
+class TranspositionTable:
+    def __init__(self, max_entries: Optional[int] = None, canonical: bool = False):
+        """
+        Input:
+                max_entries- the maximum number of positions to store, or None
+                for no limit. A full table still replaces existing entries but
+                does not accept new positions.
+                canonical- if True, symmetric positions share one entry (see
+                table_key)
+        """
+        self.max_entries = max_entries
+        self.canonical = canonical
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def lookup(self, key):
+        """
+        Output- Returns the entry (depth, value, flag, action) stored for key,
+                or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key, depth, value, flag, action):
+        """
+        Stores a search result, keeping the existing entry if it came from a
+        deeper search.
+        """
+        old = self._entries.get(key)
+        if old is None:
+            if self.max_entries is not None and len(self._entries) >= self.max_entries:
+                return
+        elif old[0] > depth:
+            return
+        self._entries[key] = (depth, value, flag, action)
@@ -1,7 +1,43 @@
+import os
+import pickle
+import subprocess
+import sys
+import threading
 import unittest
 
-from adversarialsearch import alpha_beta, alpha_beta_cutoff, minimax
-from asps.gamedag import DAGState, GameDAG
+import numpy as np
+
+from adversarialsearchproblem import AdversarialSearchProblem
+from analysis import analyze_many
+from adversarialsearch import (
+    alpha_beta,
+    alpha_beta_cutoff,
+    minimax,
+    search_is_exact,
+    simulate_alpha_beta,
+    simulate_alpha_beta_cutoff,
+)
+from asps import connect4utils
+from asps.connect4batch import BatchedRollout, Connect4BatchSimulator
+from asps.connect4problem import Connect4Problem, Connect4State
+from asps.gamedag import DAGState, GameDAG, random_game_dag
+from asps.tttproblem import TTTProblem, TTTState
+from benchmark import CORPUS, compare, mcts_scaling, run_suite
+from evalcache import EvaluationCache
+from forwardpruning import LateMoveReductions, ProbCut
+from bots import AlphaBetaCutoffBot, InterruptibleASP, MCTSBot, Ponderer
+import gameregistry
+from gamerunner import run_game
+from mcts import HeuristicRollout, MCTS, mcts
+from parallelmcts import ParallelMCTS
+from perft import REFERENCE_COUNTS, perft, perft_divide
+from persistenttable import PersistentTranspositionTable
+from pnsearch import ProofNumberSearch, proof_number_search
+from profiling import ProfiledASP, profile_call, profile_memory
+from searchtrace import SearchTracer, read_trace, subtree
+from tournament import play_game, schedule, summarize
+from transposition import TranspositionTable
+import verify
 
 
 class IOTest(unittest.TestCase):
@@ -178,6 +214,1079 @@ class CorrectActionTest(unittest.TestCase):
         self._output_check_result(result, dag2)
         print("alpha-beta cutoff produces correct action for simple DAG")
 
+    def test_mcts(self):
+        self._output_check_algorithm(lambda asp: mcts(asp, iterations=200, seed=0))
+        print("mcts produces correct action for simple DAG")
+
+    def test_search_stats(self):
+        action, stats = minimax(self._get_test_dag_2(), return_stats=True)
+        self.assertEqual(action, 2)
+        self.assertEqual((stats.nodes, stats.leaves, stats.max_depth), (13, 9, 2))
+        self.assertEqual(sorted(stats.root_scores), [(1, -5), (2, 2), (3, -16)])
+
+        action, stats = alpha_beta(self._get_test_dag_2(), return_stats=True)
+        self.assertEqual(action, 2)
+        self.assertLess(stats.nodes, 13)
+        self.assertGreater(stats.cutoffs, 0)
+
+        action, stats = alpha_beta_cutoff(
+            self._get_test_dag_2(), 1, self._dummy_heuristic_func, return_stats=True
+        )
+        self.assertEqual((stats.heuristic_calls, stats.leaves), (3, 0))
+
+
+class SymmetryTest(unittest.TestCase):
+    """
+    Tests board-symmetry canonicalization for TTTProblem and Connect4Problem.
+    """
+
+    def test_ttt_opening_moves(self):
+        ttt = TTTProblem()
+        state = ttt.get_start_state()
+        actions = ttt.symmetry().distinct_actions(
+            state, ttt.get_available_actions(state)
+        )
+        self.assertEqual(len(actions), 3, "3x3 TTT has 3 distinct opening moves")
+
+    def test_ttt_canonical_form(self):
+        ttt = TTTProblem()
+        symmetry = ttt.symmetry()
+        corners = [(0, 0), (0, 2), (2, 0), (2, 2)]
+        states = [ttt.transition(ttt.get_start_state(), c) for c in corners]
+        keys = {symmetry.canonical_key(s) for s in states}
+        self.assertEqual(len(keys), 1, "All corner openings should be equivalent")
+
+        # An action chosen in the canonical frame maps back to the same cell
+        state = TTTState([["X", " ", " "], [" ", "O", " "], [" ", " ", " "]], 0)
+        for t in range(symmetry.num_transforms):
+            moved = symmetry.transform_state(state, t)
+            canonical, t2 = symmetry.canonicalize(moved)
+            action = symmetry.transform_action(symmetry.transform_action((0, 1), t), t2)
+            restored = symmetry.restore_action(symmetry.restore_action(action, t2), t)
+            self.assertEqual(restored, (0, 1))
+
+    def test_connect4_mirror(self):
+        c4 = Connect4Problem()
+        symmetry = c4.symmetry()
+        left = c4.transition(c4.get_start_state(), 0)
+        right = c4.transition(c4.get_start_state(), 6)
+        self.assertEqual(symmetry.canonical_key(left), symmetry.canonical_key(right))
+        start = c4.get_start_state()
+        actions = symmetry.distinct_actions(start, c4.get_available_actions(start))
+        self.assertEqual(actions, {0, 1, 2, 3})
+
+    def test_pruned_search_agrees(self):
+        ttt = TTTProblem()
+        ttt.set_start_state(
+            TTTState([["X", "O", "X"], [" ", "O", " "], [" ", " ", " "]], 0)
+        )
+        self.assertEqual(alpha_beta(ttt, prune_symmetric=True), (2, 1))
+
+    def test_canonical_tables(self):
+        ttt = TTTProblem()
+        expected = alpha_beta(ttt, return_stats=True)[1].value
+        raw, canonical = TranspositionTable(), TranspositionTable(canonical=True)
+        for iterative in (False, True):
+            for tt in (raw, canonical):
+                tt.clear()
+                action, stats = alpha_beta_cutoff(
+                    ttt, 9, lambda s: 0.5, tt=tt, return_stats=True, iterative=iterative
+                )
+                self.assertEqual(stats.value, expected)
+                child = ttt.transition(ttt.get_start_state(), action)
+                self.assertEqual(simulate_alpha_beta(ttt, child, -np.inf, np.inf)[0], expected)
+            self.assertLess(len(canonical), len(raw) / 4)
+
+        # Stored actions are mapped back into the frame of the mirrored position
+        c4 = Connect4Problem()
+        heuristic = lambda s: c4.heuristic_func(s, 0)
+        tt = TranspositionTable(canonical=True)
+        for column in (0, 6):
+            c4.set_start_state(c4.transition(Connect4Problem().get_start_state(), column))
+            action = alpha_beta_cutoff(c4, 4, heuristic, tt=tt)
+            self.assertEqual(action, alpha_beta_cutoff(c4, 4, heuristic, tt=TranspositionTable()))
+        self.assertGreater(tt.hits, 0)
+
+    def test_canonical_evaluation_cache(self):
+        c4 = Connect4Problem()
+        c4.evaluation_cache = EvaluationCache(canonical=True)
+        for column in (0, 6):
+            state = c4.transition(c4.get_start_state(), column)
+            self.assertEqual(c4.heuristic_func(state, 0), Connect4Problem().heuristic_func(state, 0))
+        self.assertEqual((len(c4.evaluation_cache), c4.evaluation_cache.hits), (1, 1))
+
+
+class MCTSTest(unittest.TestCase):
+    """
+    Tests the MCTS engine on Tic-Tac-Toe positions with a forced reply.
+    """
+
+    def _blocking_problem(self):
+        ttt = TTTProblem()
+        ttt.set_start_state(
+            TTTState([["X", "O", "X"], [" ", "O", " "], [" ", " ", " "]], 0)
+        )
+        return ttt
+
+    def test_random_rollout(self):
+        engine = MCTS(self._blocking_problem(), seed=0)
+        self.assertEqual(engine.search(iterations=2000), (2, 1))
+        self.assertEqual(engine.playouts, 2000)
+        self.assertGreater(engine.playouts_per_second, 0)
+
+    def test_heuristic_rollout_with_time_budget(self):
+        ttt = self._blocking_problem()
+        engine = MCTS(ttt, HeuristicRollout(), seed=0)
+        action = engine.search(time_limit_ms=50)
+        self.assertIn(action, ttt.get_available_actions(ttt.get_start_state()))
+
+    def test_parallel_modes(self):
+        for mode in ["root", "tree"]:
+            with ParallelMCTS(self._blocking_problem(), workers=2, mode=mode, seed=0) as engine:
+                self.assertEqual(engine.search(iterations=2000), (2, 1))
+                self.assertEqual(engine.playouts, 2000)
+
+    def test_tree_mode_reuses_subtree(self):
+        ttt = TTTProblem()
+        with ParallelMCTS(ttt, workers=2, mode="tree", seed=0) as engine:
+            action = engine.search(iterations=2000)
+            arena = engine._arena
+            first = arena.first_child[0]
+            index = sorted(ttt.get_available_actions(ttt.get_start_state())).index(action)
+            visits = arena.visits[first + index]
+            ttt.set_start_state(ttt.transition(ttt.get_start_state(), action))
+            engine.advance(action)
+            self.assertEqual(arena.visits[0], visits)
+            reply = engine.search(iterations=500)
+            self.assertIn(reply, ttt.get_available_actions(ttt.get_start_state()))
+            self.assertEqual(arena.visits[0], visits + 500)
+            # A start state the tree was not advanced to starts a new tree
+            ttt.set_start_state(ttt.transition(ttt.get_start_state(), reply))
+            engine.search(iterations=100)
+            self.assertEqual(arena.visits[0], 100)
+
+
+class Connect4BatchTest(unittest.TestCase):
+    """
+    Tests the batched Connect Four simulator against connect4utils.
+    """
+
+    def test_win_detection(self):
+        rng = np.random.default_rng(0)
+        boards = rng.integers(0, 3, size=(500, 6, 7))
+        expected = [connect4utils.winning_move(board, 1) for board in boards]
+        self.assertEqual(
+            list(Connect4BatchSimulator.has_four(boards == 1)), expected
+        )
+
+    def test_rollout(self):
+        boards = np.zeros((256, 6, 7), dtype=np.int8)
+        winners = Connect4BatchSimulator(seed=0).rollout(boards, 0)
+        self.assertTrue((Connect4BatchSimulator.winners(boards) == winners).all())
+        # Player 1 moves first, so never has fewer pieces than player 2
+        counts = (boards == 1).sum(axis=(1, 2)) - (boards == 2).sum(axis=(1, 2))
+        self.assertTrue(np.isin(counts, [0, 1]).all())
+
+    def test_mcts_with_batched_rollout(self):
+        c4 = Connect4Problem()
+        engine = MCTS(c4, BatchedRollout(batch_size=32, seed=0), seed=0)
+        engine.search(iterations=10)
+        self.assertEqual(engine.playouts, 320)
+
+    def test_terminal_nodes_count_one_playout(self):
+        # One empty cell left, and filling it ends the game in a draw
+        board = np.array(
+            [
+                [1, 1, 2, 1, 2, 1, 2],
+                [1, 2, 2, 2, 1, 1, 2],
+                [1, 2, 1, 2, 2, 2, 1],
+                [2, 1, 2, 1, 2, 1, 2],
+                [2, 1, 1, 1, 2, 1, 1],
+                [2, 0, 1, 2, 1, 2, 1],
+            ]
+        )
+        c4 = Connect4Problem()
+        c4.set_start_state(Connect4State(board, 1))
+        engine = MCTS(c4, BatchedRollout(batch_size=32, seed=0), seed=0)
+        self.assertEqual(engine.search(iterations=5), 1)
+        self.assertEqual(engine.playouts, 5)
+        with ParallelMCTS(c4, 2, BatchedRollout(batch_size=32, seed=0), mode="tree", seed=0) as engine:
+            self.assertEqual(engine.search(iterations=6), 1)
+            self.assertEqual(engine.playouts, 6)
+
+
+class StatefulBotTest(unittest.TestCase):
+    """
+    Tests the transposition table and bots that keep their search state
+    between moves.
+    """
+
+    def test_transposition_table_keeps_values(self):
+        ttt = TTTProblem()
+        ttt.set_start_state(
+            TTTState([["X", " ", " "], [" ", "O", " "], [" ", " ", " "]], 0)
+        )
+        state = ttt.get_start_state()
+        inf = float("inf")
+        expected = simulate_alpha_beta(ttt, state, -inf, inf)[0]
+        tt = TranspositionTable()
+        for _ in range(2):
+            value = simulate_alpha_beta_cutoff(
+                ttt, state, -inf, inf, 9, lambda s: 0.5, tt=tt
+            )[0]
+            self.assertEqual(value, expected)
+        self.assertGreater(tt.hits, 0)
+
+    def test_run_game_with_bots(self):
+        ttt = TTTProblem()
+        cutoff_bot = AlphaBetaCutoffBot(9, lambda s: 0.5)
+        self.assertEqual(run_game(ttt, [cutoff_bot, alpha_beta]), [0.5, 0.5])
+        self.assertGreater(len(cutoff_bot.tt), 0)
+
+    def test_pondering_fills_table(self):
+        ttt = TTTProblem()
+        ttt.set_start_state(
+            TTTState([["X", " ", " "], [" ", " ", " "], [" ", " ", " "]], 1)
+        )
+        bot = AlphaBetaCutoffBot(3, lambda s: 0.5)
+        state = ttt.get_start_state()
+        ponderer = Ponderer(bot, ttt, state)
+        ponderer._thread.join()
+        ponderer.stop()
+        for reply in ttt.get_available_actions(state):
+            entry = bot.tt.lookup(ttt.state_key(ttt.transition(state, reply)))
+            self.assertIsNotNone(entry)
+            self.assertEqual(entry[0], 3)
+
+    def test_run_game_with_pondering(self):
+        ttt = TTTProblem()
+        bots = [AlphaBetaCutoffBot(9, lambda s: 0.5), alpha_beta]
+        self.assertEqual(run_game(ttt, bots, ponder=True), [0.5, 0.5])
+
+    def test_mcts_bot_reuses_subtree(self):
+        ttt = TTTProblem()
+        bot = MCTSBot(MCTS(ttt, seed=0), iterations=500)
+        action = bot.choose(ttt)
+        visits = bot.engine.root.children[action].visits
+        ttt.set_start_state(ttt.transition(ttt.get_start_state(), action))
+        bot.notify(action)
+        self.assertEqual(bot.engine.root.visits, visits)
+        bot.choose(ttt)
+        self.assertEqual(bot.engine.root.visits, visits + 500)
+
+    def test_mcts_bot_closes_its_pool(self):
+        bot = MCTSBot(ParallelMCTS(TTTProblem(), workers=2, seed=0), iterations=50, verbose=False)
+        bot.choose(bot.engine._asp)
+        self.assertIsNotNone(bot.engine._pool)
+        bot.close()
+        self.assertIsNone(bot.engine._pool)
+        MCTSBot(MCTS(TTTProblem())).close()
+
+
+class TournamentTest(unittest.TestCase):
+    """
+    Tests scheduling, playing and summarizing headless tournament games.
+    """
+
+    def test_round_robin(self):
+        tasks = schedule("ttt", None, ["ab", "ab-cutoff:9", "mcts:50"], 2, 1)
+        self.assertEqual(len(tasks), 6)
+        # Each pair plays one opening with both colors (any first TTT move draws)
+        self.assertEqual(tasks[0]["opening"], tasks[1]["opening"])
+        self.assertEqual(tasks[0]["players"], tasks[1]["players"][::-1])
+
+        results = [play_game(task) for task in tasks]
+        summary = summarize(results)
+        self.assertEqual(summary["ab"]["losses"], 0)
+        self.assertEqual(summary["ab-cutoff:9"]["losses"], 0)
+        self.assertAlmostEqual(sum(stats["elo"] for stats in summary.values()), 0)
+        for stats in summary.values():
+            self.assertEqual(stats["games"], 4)
+            self.assertGreater(stats["time_per_move"], 0)
+
+
+class GameRegistryTest(unittest.TestCase):
+    """
+    Tests that registered games load lazily and can run without a display.
+    """
+
+    def test_headless_connect4(self):
+        spec = gameregistry.get_game("connect4")
+        game = spec.make_problem(5)
+        game_ui = spec.make_headless_ui(game)
+        bot = lambda asp: min(asp.get_available_actions(asp.get_start_state()))
+        values = run_game(game, [bot, bot], game_ui)
+        self.assertEqual(values, game.evaluate_terminal(game.get_start_state()))
+
+    def test_headless_input(self):
+        from unittest import mock
+
+        spec = gameregistry.get_game("connect4")
+        game_ui = spec.make_headless_ui(spec.make_problem(None))
+        with mock.patch("builtins.input", side_effect=["", "x", "9", "3"]), mock.patch("builtins.print"):
+            self.assertEqual(game_ui.get_user_input_action(), 3)
+        with mock.patch("builtins.input", side_effect=EOFError), self.assertRaises(SystemExit):
+            game_ui.get_user_input_action()
+
+    def test_lazy_imports(self):
+        code = (
+            "import sys, gamerunner, gameregistry\n"
+            "spec = gameregistry.get_game('ttt')\n"
+            "spec.make_headless_ui(spec.make_problem(None))\n"
+            "assert 'pygame' not in sys.modules\n"
+            "assert 'asps.connect4problem' not in sys.modules\n"
+            "spec = gameregistry.get_game('connect4')\n"
+            "spec.make_headless_ui(spec.make_problem(None))\n"
+            "assert 'pygame' not in sys.modules\n"
+        )
+        subprocess.run(
+            [sys.executable, "-c", code], check=True, cwd=os.path.dirname(__file__) or "."
+        )
+
+    def test_unknown_game(self):
+        with self.assertRaises(KeyError):
+            gameregistry.get_game("no-such-game")
+
+
+class ProfilingTest(unittest.TestCase):
+    def _blocking_problem(self):
+        """
+        X to move must block O's column at (2, 1).
+        """
+        board = [["X", "O", "X"], [" ", "O", " "], [" ", " ", " "]]
+        return TTTProblem(board=board, player_to_move=0)
+
+    def test_profiled_asp(self):
+        asp = ProfiledASP(self._blocking_problem())
+        heuristic = asp.wrap("heuristic", lambda s: 0.5)
+        self.assertEqual(alpha_beta_cutoff(asp, 3, heuristic), (2, 1))
+        self.assertGreater(asp.profiles["transition"].calls, 0)
+        self.assertGreater(asp.profiles["heuristic"].calls, 0)
+        profile = asp.profiles["is_terminal_state"]
+        self.assertEqual(sum(profile.histogram.values()), profile.calls)
+        self.assertIn("transition", asp.report())
+
+    def test_wrappers_pass_hooks_on(self):
+        c4 = Connect4Problem()
+        state = c4.get_start_state()
+        for wrapper in (ProfiledASP(c4), InterruptibleASP(c4, threading.Event())):
+            self.assertEqual(wrapper.get_start_state(), state)
+            self.assertEqual(wrapper.win_threshold(), c4.win_threshold())
+            self.assertEqual(wrapper.value_bounds(state), c4.value_bounds(state))
+            self.assertEqual(wrapper.moves_remaining(state), c4.moves_remaining(state))
+            self.assertIs(wrapper.symmetry(), c4.symmetry())
+            self.assertIs(wrapper.evaluation_cache, c4.evaluation_cache)
+            with self.assertRaises(AttributeError):
+                wrapper.no_such_hook
+
+    def test_profile_call(self):
+        import pstats
+        import tempfile
+
+        asp = self._blocking_problem()
+        with tempfile.TemporaryDirectory() as directory:
+            pstats_path = os.path.join(directory, "search.pstats")
+            collapsed_path = os.path.join(directory, "search.folded")
+            action = profile_call(
+                alpha_beta, asp, pstats_path=pstats_path, collapsed_path=collapsed_path
+            )
+            self.assertEqual(action, (2, 1))
+            self.assertGreater(pstats.Stats(pstats_path).total_calls, 0)
+            with open(collapsed_path) as collapsed:
+                self.assertIn("simulate_alpha_beta", collapsed.read())
+
+    def test_profile_memory(self):
+        import tracemalloc
+
+        asp = ProfiledASP(Connect4Problem(), track_memory=True)
+        (action, stats), report = profile_memory(
+            alpha_beta_cutoff, asp, 2, lambda s: asp.heuristic_func(s, 0), return_stats=True
+        )
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(report.nodes, stats.nodes)
+        self.assertGreater(report.peak_bytes, 0)
+        self.assertTrue(report.top_sites)
+        # Each transition allocates a new board
+        self.assertGreater(asp.profiles["transition"].allocated_bytes, 0)
+        self.assertIn("B/call", asp.report())
+        with self.assertRaises(RuntimeError):
+            asp.transition(asp.get_start_state(), 0)
+
+    def test_allocations_per_node(self):
+        # Temporaries freed before the peak still count as allocated, so
+        # allocation per node does not shrink as the search grows
+        c4 = Connect4Problem()
+        c4.evaluation_cache = None
+        heuristic = lambda s: c4.heuristic_func(s, 0)
+        reports = [
+            profile_memory(alpha_beta_cutoff, c4, depth, heuristic, return_stats=True)[1]
+            for depth in (2, 3)
+        ]
+        for report in reports:
+            self.assertGreater(report.allocated_bytes, report.peak_bytes)
+        self.assertGreater(
+            reports[1].allocated_bytes_per_node, reports[0].allocated_bytes_per_node / 2
+        )
+        self.assertIn("allocated bytes per node", reports[1].report())
+
+
+class PerftTest(unittest.TestCase):
+    def test_reference_counts(self):
+        for game, depths in [("ttt", 5), ("connect4", 4)]:
+            asp = gameregistry.get_game(game).make_problem(None)
+            for depth in range(depths):
+                self.assertEqual(
+                    perft(asp, depth).leaves, REFERENCE_COUNTS[(game, None)][depth], (game, depth)
+                )
+
+    def test_terminal_states_end_lines(self):
+        dag = IOTest()._get_test_dag()
+        self.assertEqual(perft(dag, 2).leaves, 4)
+        self.assertEqual(perft(dag, 3).leaves, 0)
+
+    def test_divide(self):
+        asp = TTTProblem()
+        divide = perft_divide(asp, 3)
+        self.assertEqual(len(divide), 9)
+        self.assertEqual(sum(divide.values()), REFERENCE_COUNTS[("ttt", None)][3])
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_random_game_dag(self):
+        dag = random_game_dag(depth=6, width=8, branching=3, seed=4)
+        self.assertEqual(minimax(dag), alpha_beta(dag))
+        self.assertEqual(perft(dag, 7).leaves, 0)
+
+    def test_suite_and_compare(self):
+        current = run_suite(repeat=1, name_filter="dag-small")
+        self.assertIn("dag-small/alpha_beta", current["results"])
+        self.assertEqual(compare(current, current), [])
+
+        baseline = {"results": {key: dict(result) for key, result in current["results"].items()}}
+        result = baseline["results"]["dag-small/minimax"]
+        result["wall_time"] /= 2
+        result["nodes_per_second"] *= 2
+        result["nodes"] += 1
+        self.assertEqual(
+            sorted(metric for key, metric, _, _ in compare(current, baseline)),
+            ["nodes", "nodes_per_second", "wall_time"],
+        )
+
+    def test_mcts_scaling(self):
+        position = next(position for position in CORPUS if position.name == "ttt3-center")
+        for mode in ("root", "tree"):
+            results = mcts_scaling(position, [1, 2], mode, time_limit_ms=50)
+            self.assertEqual(sorted(results), [f"ttt3-center/mcts-{mode}:1", f"ttt3-center/mcts-{mode}:2"])
+            self.assertEqual(results[f"ttt3-center/mcts-{mode}:1"]["speedup"], 1.0)
+            self.assertTrue(all(result["playouts"] > 0 for result in results.values()))
+
+
+class VerifyTest(unittest.TestCase):
+    def test_engines_agree(self):
+        cases = [(kind, seed) for kind in ["dag", "ttt"] for seed in range(20)]
+        cases.append(("connect4", 0))
+        for case in cases:
+            self.assertEqual(verify.check_case(case), [], case)
+
+    def test_detects_wrong_engine(self):
+        def first_action(asp, state):
+            action = min(asp.get_available_actions(state))
+            return simulate_alpha_beta(asp, asp.transition(state, action), -np.inf, np.inf)[0], action
+
+        verify.ENGINES["first_action"] = first_action
+        try:
+            mismatches = [m for seed in range(20) for m in verify.check_case(("ttt", seed))]
+        finally:
+            del verify.ENGINES["first_action"]
+        self.assertTrue(mismatches)
+        self.assertTrue(all("first_action" in m for m in mismatches))
+
+    def test_parallel(self):
+        self.assertEqual(verify.verify([("dag", seed) for seed in range(50)], workers=2), [])
+
+
+class SearchTraceTest(unittest.TestCase):
+    def _trace(self, directory, format, search):
+        path = os.path.join(directory, f"search.{format}")
+        with SearchTracer(path, format) as tracer:
+            _, stats = search(tracer)
+        self.assertEqual(tracer.nodes, stats.nodes)
+        return path, stats
+
+    def test_formats_agree(self):
+        import tempfile
+
+        asp = TTTProblem(board=[["X", "O", " "], [" ", " ", " "], [" ", " ", " "]])
+        search = lambda tracer: alpha_beta(asp, return_stats=True, trace=tracer)
+        with tempfile.TemporaryDirectory() as directory:
+            jsonl, stats = self._trace(directory, "jsonl", search)
+            binary, _ = self._trace(directory, "binary", search)
+            records = list(read_trace(jsonl))
+            self.assertEqual(records, list(read_trace(binary)))
+            self.assertEqual(sum(record["cutoff"] for record in records), stats.cutoffs)
+
+            root = subtree(binary)
+            self.assertEqual(root["path"], ())
+            self.assertEqual(len(root["children"]), 7)
+            node = subtree(jsonl, [(2, 2)])
+            self.assertEqual(node["path"], ((2, 2),))
+            self.assertTrue(all(child["path"][:1] == ((2, 2),) for child in node["children"]))
+            self.assertIsNone(subtree(jsonl, [(0, 0)]))
+
+    def test_cutoff_search(self):
+        import tempfile
+
+        asp = Connect4Problem()
+        heuristic = lambda s: asp.heuristic_func(s, 0)
+        search = lambda tracer: alpha_beta_cutoff(asp, 2, heuristic, return_stats=True, trace=tracer)
+        with tempfile.TemporaryDirectory() as directory:
+            path, stats = self._trace(directory, "binary", search)
+            root = subtree(path)
+            self.assertEqual(root["value"], max(score for _, score in stats.root_scores))
+            self.assertEqual(max(record["depth"] for record in read_trace(path)), 2)
+
+    def test_reduced_moves(self):
+        import tempfile
+
+        asp = Connect4Problem()
+        heuristic = lambda s: asp.heuristic_func(s, 0)
+        lmr = LateMoveReductions(min_depth=2, full_moves=1)
+
+        def count(node):
+            return 1 + sum(count(child) for child in node["children"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            traces = []
+            for iterative in (False, True):
+                search = lambda tracer: alpha_beta_cutoff(
+                    asp, 5, heuristic, return_stats=True, trace=tracer, lmr=lmr, iterative=iterative
+                )
+                path, stats = self._trace(directory, "jsonl", search)
+                self.assertGreater(stats.researches, 0)
+                # Every node is in the tree once, under its own parent
+                self.assertEqual(count(subtree(path)), stats.nodes)
+                traces.append(list(read_trace(path)))
+            self.assertEqual(traces[0], traces[1])
+
+
+class IterativeSearchTest(unittest.TestCase):
+    def _stats_fields(self, stats):
+        return (
+            stats.nodes,
+            stats.leaves,
+            stats.heuristic_calls,
+            stats.tt_hits,
+            stats.max_depth,
+            stats.cutoffs_per_ply,
+            stats.root_scores,
+        )
+
+    def test_same_results(self):
+        for kind, seed in [("dag", seed) for seed in range(10)] + [("ttt", 0), ("ttt", 1)]:
+            asp, state = verify.make_case(kind, seed)
+            asp.set_start_state(state)
+            heuristic = lambda s: 0.5
+            searches = [
+                lambda **kwargs: minimax(asp, **kwargs),
+                lambda **kwargs: alpha_beta(asp, **kwargs),
+                lambda **kwargs: alpha_beta_cutoff(asp, 2, heuristic, **kwargs),
+            ]
+            for search in searches:
+                recursive = search(return_stats=True)
+                iterative = search(return_stats=True, iterative=True)
+                self.assertEqual(recursive[0], iterative[0])
+                self.assertEqual(self._stats_fields(recursive[1]), self._stats_fields(iterative[1]))
+
+            tables = [TranspositionTable(), TranspositionTable()]
+            for cutoff in range(1, 4):
+                recursive = alpha_beta_cutoff(asp, cutoff, heuristic, tt=tables[0], return_stats=True)
+                iterative = alpha_beta_cutoff(
+                    asp, cutoff, heuristic, tt=tables[1], return_stats=True, iterative=True
+                )
+                self.assertEqual(self._stats_fields(recursive[1]), self._stats_fields(iterative[1]))
+            self.assertEqual(tables[0]._entries, tables[1]._entries)
+
+    def test_no_recursion_limit(self):
+        n = sys.getrecursionlimit() + 100
+        matrix = [[j == i + 1 for j in range(n)] for i in range(n)]
+        dag = GameDAG(matrix, DAGState(0, 0), {n - 1: (1, 0)})
+        with self.assertRaises(RecursionError):
+            minimax(dag)
+        self.assertEqual(minimax(dag, iterative=True), 1)
+        self.assertEqual(alpha_beta(dag, iterative=True), 1)
+
+
+class DistanceScoreTest(unittest.TestCase):
+    def test_connect4_prefers_sooner_wins(self):
+        c4 = Connect4Problem()
+        board = connect4utils.create_board()
+        board[0][0:3] = 1
+        board[0][4:6] = 2
+        board[1][4] = 2
+        c4.set_start_state(Connect4State(board, 0))
+        empty = 42 - 6
+        value, action = simulate_alpha_beta_cutoff(
+            c4, c4.get_start_state(), -np.inf, np.inf, 4, lambda s: c4.heuristic_func(s, 0)
+        )
+        self.assertEqual(action, 3)
+        self.assertEqual(value, Connect4Problem.WIN_SCORE + empty - 1)
+        self.assertEqual(
+            c4.value_bounds(c4.get_start_state()),
+            (-(Connect4Problem.WIN_SCORE + empty - 2), Connect4Problem.WIN_SCORE + empty - 1),
+        )
+
+    def test_mate_distance_pruning(self):
+        class Unbounded(Connect4Problem):
+            def value_bounds(self, state):
+                return AdversarialSearchProblem.value_bounds(self, state)
+
+        pruned_nodes = unpruned_nodes = 0
+        for seed in range(8):
+            _, state = verify.make_case("connect4", seed)
+            pruned, unpruned = Connect4Problem(), Unbounded()
+            pruned.set_start_state(state)
+            unpruned.set_start_state(state)
+            value = simulate_alpha_beta(pruned, state, -np.inf, np.inf)[0]
+            self.assertEqual(value, simulate_alpha_beta(unpruned, state, -np.inf, np.inf)[0])
+            pruned_nodes += alpha_beta(pruned, return_stats=True)[1].nodes
+            unpruned_nodes += alpha_beta(unpruned, return_stats=True)[1].nodes
+        self.assertLess(pruned_nodes, unpruned_nodes)
+
+
+class QuiescenceTest(unittest.TestCase):
+    def _threatened_problem(self):
+        # Player 1 (pieces 2) threatens to complete the bottom row in column 3
+        c4 = Connect4Problem()
+        board = connect4utils.create_board()
+        board[0][4:7] = 2
+        board[0][0] = 1
+        board[1][0] = 1
+        board[0][1] = 1
+        c4.set_start_state(Connect4State(board, 0))
+        return c4
+
+    def test_forcing_actions(self):
+        c4 = self._threatened_problem()
+        state = c4.get_start_state()
+        self.assertEqual(c4.forcing_actions(state), [3])
+        # Player 0 could connect four in column 0 first, which beats blocking
+        state = c4.transition(c4.transition(state, 0), 2)
+        self.assertEqual(c4.forcing_actions(state), [0])
+        self.assertEqual(c4.forcing_actions(Connect4Problem().get_start_state()), [])
+        self.assertEqual(TTTProblem().forcing_actions(TTTProblem().get_start_state()), [])
+        self.assertEqual(ProfiledASP(c4).forcing_actions(c4.get_start_state()), [3])
+
+    def test_threat_past_the_cutoff(self):
+        c4 = self._threatened_problem()
+        self.assertNotEqual(alpha_beta_cutoff(c4, 1, lambda s: 0), 3)
+        results = []
+        for iterative in (False, True):
+            action, stats = alpha_beta_cutoff(
+                c4, 1, lambda s: 0, tt=TranspositionTable(), return_stats=True,
+                iterative=iterative, quiescence=2,
+            )
+            self.assertEqual(action, 3)
+            self.assertGreater(stats.extensions, 0)
+            results.append((stats.nodes, stats.extensions, stats.heuristic_calls))
+        self.assertEqual(results[0], results[1])
+
+
+class ForwardPruningTest(unittest.TestCase):
+    def _counts(self, stats):
+        return (stats.nodes, stats.heuristic_calls, stats.reductions, stats.researches, stats.probcuts)
+
+    def test_late_move_reductions(self):
+        lmr = LateMoveReductions(min_depth=3, full_moves=2, reduction=2)
+        self.assertEqual([lmr.reduce(4, move) for move in range(4)], [0, 0, 2, 2])
+        self.assertEqual(lmr.reduce(3, 5), 2)
+        self.assertEqual(lmr.reduce(2, 5), 0)
+
+    def test_probcut_window(self):
+        probcut = ProbCut(margin=10)
+        low, high = probcut.window(0, 0, 5)
+        self.assertEqual(high, 15)
+        self.assertLess(low, high)
+        self.assertTrue(probcut.cuts(0, 15, (low, high)))
+        self.assertFalse(probcut.cuts(0, low, (low, high)))
+        self.assertEqual(probcut.window(1, -5, 0)[0], -15)
+        self.assertIsNone(probcut.window(0, 0, np.inf))
+
+    def test_same_results_iterative(self):
+        c4 = Connect4Problem()
+        state = c4.get_start_state()
+        for action in [3, 3, 2, 4]:
+            state = c4.transition(state, action)
+        c4.set_start_state(state)
+        heuristic = lambda s: c4.heuristic_func(s, 0) - c4.heuristic_func(s, 1)
+        options = {"lmr": LateMoveReductions(min_depth=2, full_moves=1), "probcut": ProbCut(4, min_depth=3)}
+        tables = [TranspositionTable(), TranspositionTable()]
+        for cutoff in range(1, 6):
+            recursive = alpha_beta_cutoff(c4, cutoff, heuristic, tt=tables[0], return_stats=True, **options)
+            iterative = alpha_beta_cutoff(
+                c4, cutoff, heuristic, tt=tables[1], return_stats=True, iterative=True, **options
+            )
+            self.assertEqual(recursive[0], iterative[0])
+            self.assertEqual(self._counts(recursive[1]), self._counts(iterative[1]))
+            self.assertEqual(recursive[1].root_scores, iterative[1].root_scores)
+        self.assertEqual(tables[0]._entries, tables[1]._entries)
+        self.assertGreater(recursive[1].reductions, 0)
+        self.assertGreater(recursive[1].researches, 0)
+        self.assertGreater(recursive[1].probcuts, 0)
+        plain = alpha_beta_cutoff(c4, 5, heuristic, return_stats=True)[1]
+        self.assertLess(recursive[1].nodes, plain.nodes)
+
+    def test_exact_searches_are_not_pruned(self):
+        ttt = TTTProblem()
+        options = {"lmr": LateMoveReductions(min_depth=2, full_moves=1), "probcut": ProbCut(0, min_depth=2)}
+        action, stats = alpha_beta_cutoff(ttt, 9, lambda s: 0.5, return_stats=True, **options)
+        self.assertEqual((stats.reductions, stats.probcuts), (0, 0))
+        self.assertTrue(stats.proven)
+        self.assertEqual(stats.value, alpha_beta(ttt, return_stats=True)[1].value)
+
+
+class EvaluationCacheTest(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = EvaluationCache(max_entries=2)
+        cache.store("a", 1)
+        cache.store("b", 2)
+        self.assertEqual(cache.lookup("a"), 1)
+        cache.store("c", 3)
+        self.assertIsNone(cache.lookup("b"))
+        self.assertEqual((cache.lookup("a"), cache.lookup("c")), (1, 3))
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (3, 1, 2))
+        self.assertEqual(cache.hit_rate, 0.75)
+
+    def test_shared_between_threads(self):
+        cache = EvaluationCache(max_entries=8)
+
+        def churn():
+            for i in range(20000):
+                cache.lookup(i % 16)
+                cache.store(i % 16, i)
+
+        threads = [threading.Thread(target=churn) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cache), 8)
+        self.assertEqual(cache.hits + cache.misses, 40000)
+
+    def test_pickles_empty(self):
+        asp = Connect4Problem()
+        alpha_beta_cutoff(asp, 3, lambda s: asp.heuristic_func(s, 0))
+        self.assertGreater(len(asp.evaluation_cache), 0)
+        copy = pickle.loads(pickle.dumps(asp))
+        self.assertEqual(len(copy.evaluation_cache), 0)
+        self.assertEqual(copy.evaluation_cache.max_entries, asp.evaluation_cache.max_entries)
+        copy.heuristic_func(copy.get_start_state(), 0)
+        self.assertEqual(len(copy.evaluation_cache), 1)
+
+    def test_cached_heuristics(self):
+        for asp in (TTTProblem(), Connect4Problem()):
+            uncached = type(asp)()
+            uncached.evaluation_cache = None
+            state = asp.get_start_state()
+            for action in list(asp.get_available_actions(state))[:2]:
+                state = asp.transition(state, action)
+            for player in (0, 1):
+                for _ in range(2):
+                    self.assertEqual(
+                        asp.heuristic_func(state, player), uncached.heuristic_func(state, player)
+                    )
+            self.assertEqual((asp.evaluation_cache.hits, asp.evaluation_cache.misses), (2, 2))
+
+    def test_deepening_reuses_evaluations(self):
+        cached, uncached = Connect4Problem(), Connect4Problem()
+        uncached.evaluation_cache = None
+        tables = [TranspositionTable(), TranspositionTable()]
+        for depth in range(1, 4):
+            actions = [
+                alpha_beta_cutoff(asp, depth, lambda s, asp=asp: asp.heuristic_func(s, 0), tt=tt)
+                for asp, tt in zip((cached, uncached), tables)
+            ]
+            self.assertEqual(actions[0], actions[1])
+        self.assertGreater(cached.evaluation_cache.hits, 0)
+
+
+class BatchEvaluationTest(unittest.TestCase):
+    def _states(self, asp, count):
+        # The states along a fixed line of play, from the start state
+        states = [asp.get_start_state()]
+        while len(states) < count and not asp.is_terminal_state(states[-1]):
+            actions = sorted(asp.get_available_actions(states[-1]))
+            states.append(asp.transition(states[-1], actions[len(states) % len(actions)]))
+        return [state for state in states if not asp.is_terminal_state(state)]
+
+    def test_batch_matches_heuristic(self):
+        for asp in (TTTProblem(), TTTProblem(dim=4), Connect4Problem()):
+            asp.evaluation_cache = None
+            states = self._states(asp, 8)
+            for player in (0, 1):
+                np.testing.assert_allclose(
+                    asp.heuristic_batch(states, player),
+                    [asp.heuristic_func(state, player) for state in states],
+                )
+
+    def test_batch_goes_through_cache(self):
+        asp = Connect4Problem()
+        states = self._states(asp, 6)
+        asp.heuristic_func(states[0], 0)
+        values = asp.heuristic_batch(states, 0)
+        self.assertEqual(values[0], asp.heuristic_func(states[0], 0))
+        self.assertEqual(len(asp.evaluation_cache), len(states))
+
+    def test_same_search(self):
+        c4 = Connect4Problem()
+        state = c4.get_start_state()
+        for action in [3, 3, 2, 4]:
+            state = c4.transition(state, action)
+        c4.set_start_state(state)
+        heuristic = lambda s: c4.heuristic_func(s, 0)
+        batch = lambda states: c4.heuristic_batch(states, 0)
+        for iterative in (False, True):
+            for cutoff in range(1, 5):
+                plain = alpha_beta_cutoff(c4, cutoff, heuristic, return_stats=True, iterative=iterative)
+                batched = alpha_beta_cutoff(
+                    c4, cutoff, heuristic, return_stats=True, iterative=iterative,
+                    batch_heuristic_func=batch,
+                )
+                self.assertEqual(plain[0], batched[0])
+                self.assertEqual(plain[1].value, batched[1].value)
+                self.assertEqual(plain[1].nodes, batched[1].nodes)
+                self.assertEqual(plain[1].root_scores, batched[1].root_scores)
+
+    def test_same_results_iterative(self):
+        c4 = Connect4Problem()
+        heuristic = lambda s: c4.heuristic_func(s, 0)
+        batch = lambda states: c4.heuristic_batch(states, 0)
+        tables = [TranspositionTable(), TranspositionTable()]
+        for cutoff in range(1, 5):
+            recursive = alpha_beta_cutoff(
+                c4, cutoff, heuristic, tt=tables[0], return_stats=True, batch_heuristic_func=batch
+            )
+            iterative = alpha_beta_cutoff(
+                c4, cutoff, heuristic, tt=tables[1], return_stats=True, iterative=True,
+                batch_heuristic_func=batch,
+            )
+            self.assertEqual(recursive[0], iterative[0])
+            self.assertEqual(
+                (recursive[1].nodes, recursive[1].heuristic_calls),
+                (iterative[1].nodes, iterative[1].heuristic_calls),
+            )
+        self.assertEqual(tables[0]._entries, tables[1]._entries)
+
+
+class AnalysisTest(unittest.TestCase):
+    def _review(self, asp, moves):
+        states = [asp.get_start_state()]
+        for action in moves:
+            states.append(asp.transition(states[-1], action))
+        return states
+
+    def test_analyze_game(self):
+        ttt = TTTProblem()
+        start = ttt.get_start_state()
+        states = self._review(ttt, [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)])
+        results = list(analyze_many(ttt, states, depth=9))
+        self.assertEqual([result.index for result in results], list(range(len(states))))
+        self.assertIs(ttt.get_start_state(), start)
+        for state, result in zip(states, results):
+            self.assertTrue(result.proven)
+            reference = TTTProblem()
+            reference.set_start_state(state)
+            self.assertEqual(result.value, simulate_alpha_beta(reference, state, -np.inf, np.inf)[0])
+        self.assertIsNone(results[-1].action)
+        self.assertEqual(results[-1].depth, 0)
+
+    def test_time_limit(self):
+        c4 = Connect4Problem()
+        states = self._review(c4, [3, 3, 2])
+        results = list(analyze_many(c4, states, time_limit_ms=20))
+        self.assertEqual(len(results), len(states))
+        for result in results:
+            self.assertGreaterEqual(result.depth, 1)
+            self.assertIn(result.action, c4.get_available_actions(states[result.index]))
+        with self.assertRaises(ValueError):
+            next(analyze_many(c4, states))
+
+    def test_workers(self):
+        ttt = TTTProblem()
+        states = self._review(ttt, [(1, 1), (0, 0), (0, 2)])
+        serial = [(result.value, result.depth) for result in analyze_many(ttt, states, depth=9)]
+        pooled = analyze_many(ttt, states, depth=9, workers=2, chunksize=2)
+        self.assertEqual([(result.value, result.depth) for result in pooled], serial)
+
+
+class PersistentTableTest(unittest.TestCase):
+    def test_store_and_reopen(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table.tt")
+            with PersistentTranspositionTable(path, capacity=64) as tt:
+                tt.store("a", 2, 0.5, 0, (1, 1))
+                tt.store("a", 1, 0.0, 1, (0, 0))  # shallower: kept out
+                tt.store("b", 3, -np.inf, 2, None)
+                self.assertEqual(tt.lookup("a"), (2, 0.5, 0, (1, 1)))
+                self.assertIsNone(tt.lookup("c"))
+                with self.assertRaises(ValueError):
+                    tt.store("c", 1, 0.0, 0, "an action that does not fit")
+            with PersistentTranspositionTable(path, capacity=8) as tt:
+                self.assertEqual((tt.capacity, len(tt)), (64, 2))
+                self.assertEqual(tt.lookup("b"), (3, -np.inf, 2, None))
+                self.assertEqual((tt.hits, tt.misses), (1, 0))
+
+    def test_full_table_keeps_deeper_entries(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            with PersistentTranspositionTable(os.path.join(directory, "table.tt"), capacity=4) as tt:
+                for index in range(4):
+                    tt.store(index, 5, index, 0, index)
+                tt.store("shallow", 1, 0, 0, None)
+                self.assertIsNone(tt.lookup("shallow"))
+                tt.store("deep", 9, 0, 0, None)
+                self.assertEqual(len(tt), 4)
+                self.assertEqual(tt.lookup("deep")[0], 9)
+
+    def test_resume_and_warm_start(self):
+        import tempfile
+
+        c4 = Connect4Problem()
+        heuristic = lambda s: c4.heuristic_func(s, 0)
+        reference = alpha_beta_cutoff(c4, 4, heuristic, tt=TranspositionTable(), return_stats=True)
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = os.path.join(directory, "first.tt"), os.path.join(directory, "second.tt")
+            with PersistentTranspositionTable(first, capacity=1 << 12) as tt:
+                action, stats = alpha_beta_cutoff(c4, 4, heuristic, tt=tt, return_stats=True)
+                self.assertEqual((action, stats.nodes), (reference[0], reference[1].nodes))
+            with PersistentTranspositionTable(first) as tt:
+                action, stats = alpha_beta_cutoff(c4, 4, heuristic, tt=tt, return_stats=True)
+                self.assertEqual((action, stats.nodes), (reference[0], 1))
+            with PersistentTranspositionTable(second, capacity=1 << 10, warm_start=first) as tt:
+                self.assertGreater(len(tt), 0)
+                self.assertEqual(alpha_beta_cutoff(c4, 4, heuristic, tt=tt), reference[0])
+
+    def test_canonical_keys(self):
+        import tempfile
+
+        ttt = TTTProblem()
+        expected = alpha_beta(ttt, return_stats=True)[1].value
+        raw = TranspositionTable()
+        alpha_beta_cutoff(ttt, 9, lambda s: 0.5, tt=raw)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table.tt")
+            with PersistentTranspositionTable(path, capacity=1 << 14, canonical=True) as tt:
+                _, stats = alpha_beta_cutoff(ttt, 9, lambda s: 0.5, tt=tt, return_stats=True)
+                self.assertEqual(stats.value, expected)
+                self.assertLess(len(tt), len(raw) / 4)
+
+
+class EndgameSolverTest(unittest.TestCase):
+    def _no_heuristic(self, state):
+        raise AssertionError("the endgame search called the heuristic")
+
+    def test_endgame_is_solved_exactly(self):
+        for seed in range(4):
+            _, state = verify.make_case("connect4", seed)
+            if Connect4Problem().is_terminal_state(state):
+                continue
+            c4 = Connect4Problem()
+            c4.set_start_state(state)
+            self.assertTrue(search_is_exact(c4, state, 1, 42))
+            value = simulate_alpha_beta(c4, state, -np.inf, np.inf)[0]
+            results = []
+            for iterative in (False, True):
+                action, stats = alpha_beta_cutoff(
+                    c4, 1, self._no_heuristic, tt=TranspositionTable(), return_stats=True,
+                    iterative=iterative, endgame_moves=42,
+                )
+                self.assertEqual(stats.heuristic_calls, 0)
+                self.assertTrue(stats.proven)
+                self.assertEqual(np.sign(stats.value), np.sign(value))
+                results.append((action, stats.value, stats.nodes))
+            self.assertEqual(results[0], results[1])
+
+    def test_root_stops_at_proven_win(self):
+        c4 = Connect4Problem()
+        board = connect4utils.create_board()
+        board[0][0:3] = 1
+        board[0][4:6] = 2
+        board[1][4] = 2
+        c4.set_start_state(Connect4State(board, 0))
+        for iterative in (False, True):
+            action, stats = alpha_beta_cutoff(
+                c4, 2, lambda s: c4.heuristic_func(s, 0), return_stats=True,
+                iterative=iterative, endgame_moves=4,
+            )
+            self.assertEqual(action, 3)
+            self.assertEqual([a for a, _ in stats.root_scores], [0, 1, 2, 3])
+            self.assertTrue(stats.proven)
+            self.assertIn("(proven)", stats.report())
+
+    def test_heuristic_values_are_not_proven(self):
+        ttt = TTTProblem()
+        self.assertEqual(ttt.moves_remaining(ttt.get_start_state()), 9)
+        self.assertFalse(search_is_exact(ttt, ttt.get_start_state(), 2, 8))
+        _, stats = alpha_beta_cutoff(ttt, 2, lambda s: 0.5, return_stats=True, endgame_moves=8)
+        self.assertFalse(stats.proven)
+        _, stats = alpha_beta_cutoff(ttt, 2, lambda s: 0.5, return_stats=True, endgame_moves=9)
+        self.assertTrue(stats.proven)
+        self.assertEqual(stats.heuristic_calls, 0)
+
+    def test_endgame_uses_a_table(self):
+        ttt = TTTProblem()
+        _, with_table = alpha_beta_cutoff(
+            ttt, 1, self._no_heuristic, tt=TranspositionTable(), return_stats=True, endgame_moves=9
+        )
+        _, without = alpha_beta_cutoff(ttt, 1, self._no_heuristic, return_stats=True, endgame_moves=9)
+        self.assertEqual((without.value, without.nodes), (with_table.value, with_table.nodes))
+        self.assertGreater(without.tt_hits, 0)
+
+
+class ProofNumberSearchTest(unittest.TestCase):
+    def test_ttt_is_a_draw(self):
+        ttt = TTTProblem()
+        for attacker in (0, 1):
+            result = proof_number_search(ttt, attacker=attacker)
+            self.assertFalse(result.outcome)
+            self.assertEqual(result.disproof, 0)
+
+    def test_agrees_with_alpha_beta(self):
+        for seed in range(12):
+            asp, state = verify.make_case("connect4", seed)
+            if asp.is_terminal_state(state):
+                continue
+            value = simulate_alpha_beta(asp, state, -np.inf, np.inf)[0]
+            mover = state.player_to_move()
+            wins = value > 0 if mover == 0 else value < 0
+            for max_entries in (ProofNumberSearch.DEFAULT_MAX_ENTRIES, 20):
+                result = ProofNumberSearch(asp, max_entries).solve(state)
+                self.assertEqual(result.outcome, wins)
+                self.assertLessEqual(result.entries, max_entries)
+                if wins:
+                    child_value = simulate_alpha_beta(
+                        asp, asp.transition(state, result.action), -np.inf, np.inf
+                    )[0]
+                    self.assertEqual(np.sign(child_value), np.sign(value))
+
+    def test_budget_and_progress(self):
+        calls = []
+        engine = ProofNumberSearch(
+            TTTProblem(), progress=lambda *numbers: calls.append(numbers), progress_interval=10
+        )
+        result = engine.solve(max_nodes=100)
+        self.assertIsNone(result.outcome)
+        self.assertEqual(result.nodes, 100)
+        self.assertEqual(len(calls), 10)
+        self.assertEqual([nodes for nodes, _, _, _ in calls], list(range(10, 101, 10)))
+        # The root's numbers are reported as they grow, not the (1, 1) of an
+        # unexpanded node
+        self.assertNotIn((1, 1), [(proof, disproof) for _, proof, disproof, _ in calls])
+        self.assertLess(calls[0][2], calls[-1][2])
+        self.assertEqual((result.proof, result.disproof), calls[-1][1:3])
+
 
 if __name__ == "__main__":
     unittest.main()
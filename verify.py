@@ -0,0 +1,224 @@
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+from adversarialsearch import simulate_alpha_beta, simulate_alpha_beta_cutoff, simulate_state
+from asps.connect4problem import Connect4Problem
+from asps.gamedag import random_game_dag
+from asps.tttproblem import TTTProblem
+from iterativesearch import (
+    simulate_alpha_beta_cutoff_iterative,
+    simulate_alpha_beta_iterative,
+    simulate_state_iterative,
+)
+from tournament import random_opening
+from transposition import TranspositionTable
+
+###############################################################################
+# Differential verification of the search engines.
+#
+# Every case is a random position: a random GameDAG, or a random Tic-Tac-Toe or
+# Connect Four position close enough to the end of the game to be solved. Plain
+# minimax (simulate_state) is the reference: each engine in ENGINES must return
+# the same game value, and an action whose minimax value is that game value.
+#
+# A case is identified by its kind and seed, so any mismatch can be reproduced
+# with check_case((kind, seed)). Cases are checked across a process pool.
+#
+# Engines searching to the end of the game use a cutoff deeper than any game
+# here, so the heuristic is never called. The endgame engine stops at the
+# first winning root action rather than the fastest, so only its outcome (win,
+# draw or loss, see AdversarialSearchProblem:win_threshold) is compared.
+###############################################################################
+
+
+FULL_DEPTH = 1 << 20
+
+
+def _no_heuristic(state):
+    raise AssertionError("a full-depth search called the heuristic")
+
+
+def _alpha_beta(asp, state):
+    return simulate_alpha_beta(asp, state, -math.inf, math.inf)
+
+
+def _alpha_beta_symmetric(asp, state):
+    actions = asp.get_available_actions(state)
+    symmetry = asp.symmetry()
+    if symmetry is not None:
+        actions = symmetry.distinct_actions(state, actions)
+    return simulate_alpha_beta(asp, state, -math.inf, math.inf, actions)
+
+
+def _alpha_beta_cutoff(asp, state):
+    return simulate_alpha_beta_cutoff(asp, state, -math.inf, math.inf, FULL_DEPTH, _no_heuristic)
+
+
+def _alpha_beta_cutoff_tt(asp, state):
+    return simulate_alpha_beta_cutoff(
+        asp, state, -math.inf, math.inf, FULL_DEPTH, _no_heuristic, tt=TranspositionTable()
+    )
+
+
+def _minimax_iterative(asp, state):
+    return simulate_state_iterative(asp, state)
+
+
+def _alpha_beta_iterative(asp, state):
+    return simulate_alpha_beta_iterative(asp, state, -math.inf, math.inf)
+
+
+def _alpha_beta_cutoff_tt_iterative(asp, state):
+    return simulate_alpha_beta_cutoff_iterative(
+        asp, state, -math.inf, math.inf, FULL_DEPTH, _no_heuristic, tt=TranspositionTable()
+    )
+
+
+def _alpha_beta_cutoff_endgame(asp, state):
+    if asp.moves_remaining(state) is None:
+        return None
+    return simulate_alpha_beta_cutoff(
+        asp, state, -math.inf, math.inf, 2, _no_heuristic,
+        tt=TranspositionTable(), endgame_moves=FULL_DEPTH,
+    )
+
+
+# Each engine maps (asp, state) to (value for player 0, action), or to None if
+# it does not apply to the game.
+ENGINES = {
+    "alpha_beta": _alpha_beta,
+    "alpha_beta_symmetric": _alpha_beta_symmetric,
+    "alpha_beta_cutoff": _alpha_beta_cutoff,
+    "alpha_beta_cutoff_tt": _alpha_beta_cutoff_tt,
+    "minimax_iterative": _minimax_iterative,
+    "alpha_beta_iterative": _alpha_beta_iterative,
+    "alpha_beta_cutoff_tt_iterative": _alpha_beta_cutoff_tt_iterative,
+    "alpha_beta_cutoff_endgame": _alpha_beta_cutoff_endgame,
+}
+
+OUTCOME_ONLY = {"alpha_beta_cutoff_endgame"}
+
+KINDS = ["dag", "ttt", "connect4"]
+
+
+def make_case(kind: str, seed: int):
+    """
+    Builds the random position of a case and returns (asp, state).
+    """
+    rng = random.Random(f"{kind}:{seed}")
+    if kind == "dag":
+        asp = random_game_dag(
+            depth=rng.randint(1, 8),
+            width=rng.randint(1, 10),
+            branching=rng.randint(1, 4),
+            seed=rng.getrandbits(32),
+            terminal_probability=rng.random() * 0.3,
+        )
+        return asp, asp.get_start_state()
+    if kind == "ttt":
+        asp, plies = TTTProblem(), rng.randint(3, 8)
+    elif kind == "connect4":
+        asp, plies = Connect4Problem(), rng.randint(34, 41)
+    else:
+        raise ValueError(f"Unknown case kind: {kind}")
+    state = asp.get_start_state()
+    for action in random_opening(asp, plies, rng):
+        state = asp.transition(state, action)
+    return asp, state
+
+
+def _outcome(asp, value):
+    # 1, 0 or -1 for a win, draw or loss for player 0; the value itself for
+    # games that do not separate wins from other values
+    win = asp.win_threshold()
+    if win is None or value is None:
+        return value
+    return 1 if value >= win else -1 if value <= -win else 0
+
+
+def check_case(case):
+    """
+    Checks every engine on the case (kind, seed) against minimax. Returns a
+    list of mismatch descriptions, which is empty if all engines agree.
+    """
+    kind, seed = case
+    asp, state = make_case(kind, seed)
+    if asp.is_terminal_state(state):
+        return []
+    child_values = {
+        action: simulate_state(asp, asp.transition(state, action))[0]
+        for action in asp.get_available_actions(state)
+    }
+    best = max if state.player_to_move() == 0 else min
+    reference = best(child_values.values())
+
+    mismatches = []
+    for name, engine in ENGINES.items():
+        result = engine(asp, state)
+        if result is None:
+            continue
+        value, action = result
+        if name in OUTCOME_ONLY:
+            if _outcome(asp, value) != _outcome(asp, reference):
+                mismatches.append(f"{kind}:{seed} {name}: value {value}, minimax {reference}")
+            elif _outcome(asp, child_values.get(action)) != _outcome(asp, reference):
+                mismatches.append(
+                    f"{kind}:{seed} {name}: action {action} is worth "
+                    f"{child_values.get(action)}, not the outcome of {reference}"
+                )
+        elif value != reference:
+            mismatches.append(f"{kind}:{seed} {name}: value {value}, minimax {reference}")
+        elif action is None:
+            # When every action loses outright (a value of +/-inf), no action
+            # beats the initial bound and the engines return None.
+            if not math.isinf(value):
+                mismatches.append(f"{kind}:{seed} {name}: no action for value {value}")
+        elif child_values.get(action) != reference:
+            mismatches.append(
+                f"{kind}:{seed} {name}: action {action} is worth "
+                f"{child_values.get(action)}, not {reference}"
+            )
+    return mismatches
+
+
+def verify(cases, workers=None, chunksize=16):
+    """
+    Checks the given cases across a process pool and returns all mismatches.
+    """
+    mismatches = []
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(check_case, cases, chunksize):
+            mismatches.extend(result)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=1000, help="cases of each kind")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=KINDS)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first case")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    cases = [
+        (kind, seed)
+        for kind in args.kinds
+        for seed in range(args.seed, args.seed + args.cases)
+    ]
+    start = time.perf_counter()
+    mismatches = verify(cases, args.workers)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(
+        f"{len(cases)} cases, {len(mismatches)} mismatches "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()